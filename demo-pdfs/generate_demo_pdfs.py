@@ -2,17 +2,90 @@
 """
 Generador de PDFs ficticios para demo BidEval v2.
 Proyecto: Ingenieria y Construccion de Planta de Procesamiento de Gas Natural - Fase FEED
+
+Sin argumentos genera el set demo (3 RFPs + 4 proveedores x 4 documentos).
+Con --corpus genera N proyectos x M proveedores procedurales y reproducibles
+(--seed) para pruebas de carga de ingesta, embeddings y scoring. Con -j los
+documentos se reparten entre procesos (son independientes entre si):
+
+    python demo-pdfs/generate_demo_pdfs.py --corpus --projects 10 --suppliers 8 --pages 120 --out /tmp/corpus -j 0
+
+La generacion es incremental: un manifiesto (.generation-manifest.json) guarda
+el hash de las entradas de cada PDF (proveedor, constantes del proyecto y
+codigo del generador) y solo se regeneran los que han cambiado (--force para
+todo). Las variantes escaneadas y mixtas entran en el mismo manifiesto, con el
+hash de su PDF de origen y de --dpi/--noise/--skew/--mixed-ratio. La salida es
+determinista, asi que los PDFs sin cambios quedan identicos byte a byte.
+
+Junto a cada PDF se escribe <nombre>.json con la verdad de referencia: datos
+del proyecto y del proveedor, importes CAPEX/OPEX/IVA/LCC y desgloses de la
+oferta economica, certificaciones y nivel de compliance, y todas las tablas
+tal y como se han renderizado. Sirve para medir la precision de extraccion
+("Extract Economic Data", "LLM Extractor Tech-Econ") junto al rendimiento.
+
+Para probar la rama OCR ("Necesita OCR?" -> "Docling OCR"), --scan y --mixed
+crean variantes rasterizadas (_scan.pdf solo imagen, _mixed.pdf con una
+fraccion de paginas escaneadas) con --dpi, --noise y --skew configurables; su
+.json indica las paginas escaneadas y si la heuristica needsOCR del workflow
+(< 100 caracteres/pagina) deberia activarse:
+
+    python demo-pdfs/generate_demo_pdfs.py --corpus --projects 2 --scan '*Anexos*' --mixed '*Oferta_Tecnica*' --noise 0.08 --skew 1.5
+
+Para documentos con tablas muy grandes, --boq-items N anade a cada oferta
+economica un anexo BoQ de N lineas que suman exactamente el CAPEX declarado
+(su .json guarda los totales por partida). Esas tablas usan
+BasePDF.add_large_table(), que acepta iteradores y dibuja con text()/line()
+en lugar de una celda por valor; add_table() delega en ella a partir de
+LARGE_TABLE_ROWS filas. --bench-table N compara ambas rutas:
+
+    python demo-pdfs/generate_demo_pdfs.py --corpus --projects 2 --boq-items 20000
+    python demo-pdfs/generate_demo_pdfs.py --bench-table 5000
+
+Por defecto fpdf2 mantiene todo el documento en memoria hasta output(), asi
+que el RSS crece con las paginas y limita cuantos procesos caben con -j. Con
+--split-pages N los anexos largos (BoQ y apendices) se vuelcan a disco en
+partes de ~N paginas, cortando entre secciones o filas, y al final se
+concatenan en un unico PDF sin cargarlas a la vez; el pie "Pag. x/total" se
+completa al fusionar. --bench-memory compara el RSS pico de ambos modos; por
+debajo de ~1000 paginas domina el interprete con fpdf/pypdf (~65 MB) y apenas
+hay diferencia, pero con 3000 paginas el modo completo sube a ~120 MB y el
+partido se queda en ~70 MB:
+
+    python demo-pdfs/generate_demo_pdfs.py --corpus --pages 500 --boq-items 20000 --split-pages 50 -j 0
+    python demo-pdfs/generate_demo_pdfs.py --bench-memory 300 1000 3000 --split-pages 50
+
+Como libreria, render_document() devuelve los bytes de un documento e
+iter_documents() produce documentos bajo demanda sin tocar disco:
+
+    from generate_demo_pdfs import iter_documents, SUPPLIER_GENERATORS
+    for doc in iter_documents(n_projects=None, kinds=SUPPLIER_GENERATORS):
+        enviar(doc["name"], doc["data"])
 """
 
+import argparse
+import fnmatch
+import gc
+import hashlib
+import inspect
+import io
+import itertools
+import json
 import os
+import random
+import shutil
 import sys
 import subprocess
+import tempfile
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
 
 try:
     from fpdf import FPDF
 except ImportError:
     subprocess.check_call([sys.executable, "-m", "pip", "install", "fpdf2"])
     from fpdf import FPDF
+import fpdf
 
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 
@@ -78,6 +151,13 @@ SUPPLIERS = {
 PROJECT_NAME = "Proyecto de Ingenieria y Construccion de Planta de Procesamiento de Gas Natural - Fase FEED"
 PROJECT_REF = "RFP-2025-FEED-GNL-001"
 CLIENT_NAME = "Energias del Levante S.A."
+CORPUS_SEED = 0
+BOQ_ITEMS = 0
+SPLIT_PAGES = 0
+PART_NB_ALIAS = "{total}"
+# Fixed so reruns produce byte-identical PDFs (fpdf2 derives /ID from the content).
+DOC_DATE = datetime(2025, 2, 1, tzinfo=timezone.utc)
+MANIFEST_NAME = ".generation-manifest.json"
 
 
 # ─── PDF base class ───────────────────────────────────────────────────────────
@@ -87,6 +167,19 @@ class BasePDF(FPDF):
     doc_subtitle = ""
     company_name = ""
 
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.set_creation_date(DOC_DATE)
+        # Ground truth: values embedded in the document, plus every table as rendered.
+        self.truth = {}
+        self.tables = []
+        self.record_tables = True
+        self.current_section = ""
+        # Split mode (SPLIT_PAGES): pages already flushed to part files on disk.
+        self.page_offset = 0
+        self.part_paths = []
+        self.part_dir = None
+
     def header(self):
         self.set_font("Helvetica", "B", 9)
         self.set_text_color(100, 100, 100)
@@ -101,7 +194,9 @@ class BasePDF(FPDF):
         self.set_y(-15)
         self.set_font("Helvetica", "I", 8)
         self.set_text_color(128, 128, 128)
-        self.cell(0, 10, f"Ref: {PROJECT_REF}  |  Pag. {self.page_no()}/{{nb}}", align="C")
+        # Split parts cannot know the document total; merge_parts() fills PART_NB_ALIAS in.
+        total = PART_NB_ALIAS if SPLIT_PAGES else "{nb}"
+        self.cell(0, 10, f"Ref: {PROJECT_REF}  |  Pag. {self.total_pages()}/{total}", align="C")
 
     def add_cover(self, title, subtitle, extra_lines=None):
         self.add_page()
@@ -126,6 +221,7 @@ class BasePDF(FPDF):
         self.cell(0, 7, "Clasificacion: CONFIDENCIAL", new_x="LMARGIN", new_y="NEXT", align="C")
 
     def section_title(self, num, title):
+        self.current_section = f"{num}. {title}" if num else title
         self.ln(6)
         self.set_font("Helvetica", "B", 14)
         self.set_text_color(0, 51, 102)
@@ -154,16 +250,51 @@ class BasePDF(FPDF):
             self.cell(0, 6, f"  - {item}", new_x="LMARGIN", new_y="NEXT")
         self.ln(3)
 
-    def add_table(self, headers, rows, col_widths=None, total_row=False):
-        if col_widths is None:
-            col_widths = [190 / len(headers)] * len(headers)
-        # header
+    PART_STATE = ("doc_title", "doc_subtitle", "company_name", "truth", "tables", "record_tables",
+                  "current_section", "page_offset", "part_paths", "part_dir")
+
+    def total_pages(self):
+        return self.page_offset + self.page_no()
+
+    def _write_part(self):
+        if self.part_dir is None:
+            self.part_dir = tempfile.mkdtemp(prefix="bidevaldemo-")
+        path = os.path.join(self.part_dir, f"part-{len(self.part_paths):04d}.pdf")
+        self.output(path)
+        self.part_paths.append(path)
+        self.page_offset += self.page_no()
+
+    def flush_part(self):
+        """In split mode, once the current part reaches SPLIT_PAGES pages, write it
+        to disk and continue on a fresh page of an empty document. Only called at
+        section/row boundaries, so no cell or paragraph spans two parts.
+        """
+        if not SPLIT_PAGES or self.page_no() < SPLIT_PAGES:
+            return False
+        self._write_part()
+        state = {k: getattr(self, k) for k in self.PART_STATE}
+        self.__init__()
+        self.__dict__.update(state)
+        self.add_page()
+        return True
+
+    def _table_header(self, headers, col_widths):
         self.set_font("Helvetica", "B", 9)
         self.set_fill_color(0, 51, 102)
         self.set_text_color(255, 255, 255)
         for i, h in enumerate(headers):
             self.cell(col_widths[i], 7, h, border=1, fill=True, align="C")
         self.ln()
+
+    def add_table(self, headers, rows, col_widths=None, total_row=False):
+        if not isinstance(rows, (list, tuple)) or len(rows) > LARGE_TABLE_ROWS:
+            return self.add_large_table(headers, rows, col_widths, total_row=total_row)
+        if col_widths is None:
+            col_widths = [190 / len(headers)] * len(headers)
+        if self.record_tables:
+            self.tables.append({"seccion": self.current_section, "cabecera": list(headers),
+                                "filas": [[str(v) for v in row] for row in rows]})
+        self._table_header(headers, col_widths)
         # rows
         self.set_font("Helvetica", "", 9)
         self.set_text_color(40, 40, 40)
@@ -182,15 +313,388 @@ class BasePDF(FPDF):
             fill = not fill
         self.ln(4)
 
+    def add_large_table(self, headers, rows, col_widths=None, aligns=None, formats=None, zebra=True,
+                        total_row=False):
+        """High-volume table for thousands of rows (BoQ annexes).
+
+        ``rows`` may be any iterable and is consumed lazily. Alignment comes
+        from ``aligns`` or is inferred once from the first row, ``formats``
+        holds optional per-column callables, and the header is repeated after
+        every page break. Rows are drawn with text()/line() and a single font
+        and colour setup per page instead of a cell() per value. With
+        ``total_row`` the last row is highlighted as in add_table(). Returns
+        the number of rows drawn.
+        """
+        n_cols = len(headers)
+        if col_widths is None:
+            col_widths = [190 / n_cols] * n_cols
+        formats = formats or [None] * n_cols
+        rows = iter(rows)
+        first = next(rows, None)
+        if aligns is None:
+            sample = first or [""] * n_cols
+            aligns = ["R" if i > 0 and any(c.isdigit() for c in str(v)) else "L" for i, v in enumerate(sample)]
+        row_h = 6.5
+        left = self.l_margin
+        right = left + sum(col_widths)
+        edges = [left]
+        for w in col_widths:
+            edges.append(edges[-1] + w)
+        c_margin = self.c_margin
+        # Break pages ourselves so a row never splits and the header can be repeated.
+        auto_break, margin, limit = self.auto_page_break, self.b_margin, self.page_break_trigger
+        self.set_auto_page_break(False)
+
+        def start_block():
+            self._table_header(headers, col_widths)
+            self.set_font("Helvetica", "", 9)
+            self.set_text_color(40, 40, 40)
+            self.set_fill_color(245, 245, 245)
+            self.set_draw_color(0, 0, 0)
+            self.set_line_width(0.2)
+            return self.get_y()
+
+        def string_width(text):
+            # Same result as get_string_width() for the plain body font, minus its per-call
+            # bidi/markdown preprocessing, which dominated the cost of right-aligned columns.
+            return self.current_font.get_text_width(text, self.font_size_pt, None)[1] / self.k
+
+        def close_block(top, bottom):
+            for x in edges:
+                self.line(x, top, x, bottom)
+            self.line(left, top, right, top)
+
+        top = start_block()
+        count = 0
+        row = first
+        while row is not None:
+            # One row of lookahead tells the last row apart without materialising ``rows``
+            following = next(rows, None)
+            is_total = total_row and following is None
+            y = self.get_y()
+            if y + row_h > limit:
+                close_block(top, y)
+                if not self.flush_part():
+                    self.add_page()
+                self.set_auto_page_break(False)
+                top = start_block()
+                y = top
+            if is_total:
+                self.set_font("Helvetica", "B", 9)
+                self.set_fill_color(230, 240, 250)
+                self.rect(left, y, right - left, row_h, style="F")
+            elif zebra and count % 2:
+                self.rect(left, y, right - left, row_h, style="F")
+            baseline = y + row_h * 0.68
+            for x, w, val, f, align in zip(edges, col_widths, row, formats, aligns):
+                text = f(val) if f else str(val)
+                if align == "R":
+                    self.text(x + w - c_margin - string_width(text), baseline, text)
+                elif align == "C":
+                    self.text(x + (w - string_width(text)) / 2, baseline, text)
+                else:
+                    self.text(x + c_margin, baseline, text)
+            self.line(left, y + row_h, right, y + row_h)
+            self.set_y(y + row_h)
+            count += 1
+            row = following
+        close_block(top, self.get_y())
+        self.set_auto_page_break(auto_break, margin)
+        if self.record_tables:
+            self.tables.append({"seccion": self.current_section, "cabecera": list(headers), "n_filas": count})
+        self.ln(4)
+        return count
+
+
+LARGE_TABLE_ROWS = 500
+
 
 def fmt(n):
     """Format number as European currency string."""
     return f"{n:,.2f} EUR".replace(",", "X").replace(".", ",").replace("X", ".")
 
 
+FILLER_SUBJECTS = [
+    "Hoja de datos de equipo", "Memoria de calculo", "Especificacion de materiales",
+    "Lista de instrumentos", "Estudio de alternativas", "Procedimiento de ejecucion",
+]
+FILLER_SENTENCES = [
+    "Las condiciones de diseno se han establecido segun la Design Basis del proyecto.",
+    "El margen de diseno sobre las condiciones de operacion normal es del 10% en caudal.",
+    "Los materiales seleccionados cumplen NACE MR0175 para servicio acido.",
+    "La presion de diseno se fija en 1,1 veces la presion maxima de operacion.",
+    "Se ha verificado la compatibilidad con los requisitos de la especificacion de tuberias.",
+    "Los resultados se revisaran en la sesion HAZOP correspondiente.",
+    "El vendor debera confirmar los datos marcados como pendientes en la fase de procura.",
+    "Las tolerancias dimensionales se ajustan a la norma API 660 / TEMA clase R.",
+    "La documentacion se entregara en formato nativo y PDF segun el procedimiento de entregables.",
+    "Las cargas de viento y sismo se calculan conforme al Eurocodigo aplicable.",
+]
+FILLER_SERVICES = ["Gas de alimentacion", "Amina rica", "Amina pobre", "Glicol", "NGL", "Agua de refrigeracion",
+                   "Gas combustible", "Condensado"]
+FILLER_MATERIALS = ["CS", "CS + 3 mm CA", "SS316L", "Duplex 2205", "LTCS"]
+
+
+def parse_eur(text):
+    """Inverse of fmt(): '3.200.000,00 EUR' -> 3200000.0."""
+    return float(text.replace(" EUR", "").replace(".", "").replace(",", "."))
+
+
+def supplier_truth(supplier_key):
+    s = SUPPLIERS[supplier_key]
+    return {"proveedor": {
+        "clave": supplier_key,
+        "plantilla": s.get("plantilla", supplier_key),
+        "nombre": s["nombre"],
+        "cif": s["cif"],
+        "sede": s["sede"],
+        "empleados": s["empleados"],
+        "experiencia_anos": s["experiencia_anos"],
+        "cert": list(s["cert"]),
+        "compliance_level": s["compliance_level"],
+    }}
+
+
+def ground_truth(pdf, name):
+    """Machine-readable record of what ``pdf`` contains, written next to each PDF."""
+    return {
+        "documento": name,
+        "proyecto": {"ref": PROJECT_REF, "nombre": PROJECT_NAME, "cliente": CLIENT_NAME},
+        "paginas": pdf.total_pages(),
+        **pdf.truth,
+        "tablas": pdf.tables,
+    }
+
+
+GeneratedDocument = namedtuple("GeneratedDocument", ["name", "data", "truth"])
+
+
+def finish_pdf(pdf, name, out_dir, pages=None):
+    """Pad and emit a generated document.
+
+    ``out_dir`` selects the output: a directory writes ``out_dir/name`` plus
+    its ground truth as ``<name>.json`` and returns the path; ``None`` returns
+    a GeneratedDocument without touching disk; a binary file object receives
+    the bytes and a GeneratedDocument with ``data=None`` is returned.
+    """
+    pad_to_pages(pdf, pages, f"{PROJECT_REF}/{name}")
+    truth = ground_truth(pdf, name)
+    if SPLIT_PAGES:
+        if out_dir is None:
+            buf = io.BytesIO()
+            merge_parts(pdf, buf)
+            return GeneratedDocument(name, buf.getvalue(), truth)
+        if hasattr(out_dir, "write"):
+            merge_parts(pdf, out_dir)
+            return GeneratedDocument(name, None, truth)
+    if out_dir is None:
+        return GeneratedDocument(name, bytes(pdf.output()), truth)
+    if hasattr(out_dir, "write"):
+        out_dir.write(pdf.output())
+        return GeneratedDocument(name, None, truth)
+    path = os.path.join(out_dir, name)
+    if SPLIT_PAGES:
+        with open(path, 'wb') as f:
+            merge_parts(pdf, f)
+    else:
+        pdf.output(path)
+    with open(os.path.splitext(path)[0] + ".json", 'w', encoding='utf-8') as f:
+        json.dump(truth, f, ensure_ascii=False, indent=1)
+    return path
+
+
+def merge_parts(pdf, out):
+    """Write the last part of a split ``pdf`` and stream all parts into ``out``.
+
+    pypdf's PdfWriter keeps every page of the result in memory until write(),
+    which would undo the point of splitting. Instead each part is read lazily
+    and its pages, with the objects they reference, are renumbered and written
+    out immediately; only the xref offsets and the page ids are kept. The
+    total-pages alias in the footers is filled in on the way through. Offsets
+    are counted from the bytes written, so ``out`` need not be seekable.
+    """
+    pypdf = _import_or_install("pypdf", "pypdf")
+    from pypdf.generic import (ArrayObject, DictionaryObject, IndirectObject, NameObject, NullObject,
+                               NumberObject, StreamObject)
+
+    pdf._write_part()
+    alias, nb = PART_NB_ALIAS.encode("ascii"), str(pdf.page_offset).encode("ascii")
+    offsets = [0, 0, 0]  # 1 = catalog and 2 = page tree, written last
+    kids = []
+    written = 0
+
+    def write(data):
+        nonlocal written
+        out.write(data)
+        written += len(data)
+
+    def emit(obj, num=None):
+        if num is None:
+            num = len(offsets)
+            offsets.append(0)
+        offsets[num] = written
+        buf = io.BytesIO()
+        obj.write_to_stream(buf)
+        write(f"{num} 0 obj\n".encode("ascii") + buf.getvalue() + b"\nendobj\n")
+        return num
+
+    try:
+        info = None
+        write(b"%PDF-1.3\n%\xe2\xe3\xcf\xd3\n")
+        for path in pdf.part_paths:
+            reader = pypdf.PdfReader(path)
+            if info is None and "/Info" in reader.trailer:
+                info = reader.trailer["/Info"].get_object()
+            renumbered = {}
+            pending = []
+
+            def remap(obj):
+                if isinstance(obj, IndirectObject):
+                    if obj.idnum not in renumbered:
+                        renumbered[obj.idnum] = len(offsets)
+                        offsets.append(0)
+                        pending.append(obj)
+                    return IndirectObject(renumbered[obj.idnum], 0, None)
+                if isinstance(obj, DictionaryObject):
+                    for key, value in list(obj.items()):
+                        obj[key] = remap(value)
+                elif isinstance(obj, ArrayObject):
+                    obj[:] = [remap(v) for v in obj]
+                return obj
+
+            for page in reader.pages:
+                contents = page.raw_get("/Contents")
+                page = remap(DictionaryObject((k, v) for k, v in page.items() if k != "/Parent"))
+                page[NameObject("/Parent")] = IndirectObject(2, 0, None)
+                kids.append(emit(page))
+                while pending:
+                    ref = pending.pop()
+                    obj = ref.get_object()
+                    if isinstance(obj, StreamObject) and ref.idnum == getattr(contents, "idnum", None):
+                        obj.set_data(obj.get_data().replace(alias, nb))
+                    emit(remap(obj), renumbered[ref.idnum])
+            # pypdf readers are reference cycles; free each part before opening the next.
+            del reader, remap
+            gc.collect()
+        emit(DictionaryObject({
+            NameObject("/Type"): NameObject("/Pages"),
+            NameObject("/Kids"): ArrayObject(IndirectObject(k, 0, None) for k in kids),
+            NameObject("/Count"): NumberObject(len(kids)),
+        }), 2)
+        emit(DictionaryObject({
+            NameObject("/Type"): NameObject("/Catalog"),
+            NameObject("/Pages"): IndirectObject(2, 0, None),
+            NameObject("/PageLayout"): NameObject("/OneColumn"),
+            NameObject("/OpenAction"): ArrayObject([IndirectObject(kids[0], 0, None), NameObject("/FitH"),
+                                                    NullObject()]),
+        }), 1)
+        trailer = DictionaryObject({NameObject("/Root"): IndirectObject(1, 0, None)})
+        if info is not None:
+            trailer[NameObject("/Info")] = IndirectObject(emit(DictionaryObject(info)), 0, None)
+        # Every object, /Info included, is numbered by now: /Size is the highest number + 1.
+        trailer[NameObject("/Size")] = NumberObject(len(offsets))
+        xref = written
+        write(f"xref\n0 {len(offsets)}\n0000000000 65535 f \n".encode("ascii"))
+        write("".join(f"{o:010d} 00000 n \n" for o in offsets[1:]).encode("ascii"))
+        buf = io.BytesIO()
+        trailer.write_to_stream(buf)
+        write(b"trailer\n" + buf.getvalue() + f"\nstartxref\n{xref}\n%%EOF\n".encode("ascii"))
+    finally:
+        shutil.rmtree(pdf.part_dir, ignore_errors=True)
+
+
+def pad_to_pages(pdf, pages, seed_text):
+    """Append seeded technical appendix pages until the document reaches ``pages``."""
+    if not pages or pdf.total_pages() >= pages:
+        return
+    rng = random.Random(f"{CORPUS_SEED}:{seed_text}")
+    pdf.truth["paginas_contenido"] = pdf.total_pages()
+    pdf.record_tables = False
+    pdf.add_page()
+    pdf.section_title("A", "Apendices Tecnicos")
+    n = 1
+    while pdf.total_pages() < pages:
+        pdf.flush_part()
+        pdf.sub_title(f"A.{n} {rng.choice(FILLER_SUBJECTS)}")
+        pdf.body_text(" ".join(rng.sample(FILLER_SENTENCES, rng.randint(3, 6))))
+        rows = []
+        for _ in range(rng.randint(6, 14)):
+            rows.append([
+                f"{rng.choice('VPEKT')}-{rng.randint(100, 999)}",
+                rng.choice(FILLER_SERVICES),
+                f"{rng.uniform(2, 95):.1f}",
+                f"{rng.randint(-46, 260)}",
+                rng.choice(FILLER_MATERIALS),
+            ])
+        pdf.add_table(["Tag", "Servicio", "P diseno (barg)", "T diseno (C)", "Material"], rows,
+                      col_widths=[25, 55, 35, 35, 40])
+        n += 1
+
+
+BOQ_ITEMS_BY_PARTIDA = {
+    "ingenieria": [("Horas de ingenieria de procesos", "h"), ("Horas de ingenieria mecanica", "h"),
+                   ("Horas de ingenieria de instrumentacion", "h"), ("Documento de ingenieria", "ud")],
+    "procura": [("Tuberia acero al carbono", "m"), ("Valvula de bola", "ud"), ("Transmisor de presion", "ud"),
+                ("Cable de instrumentacion", "m"), ("Intercambiador de calor", "ud")],
+    "construccion": [("Hormigon estructural HA-30", "m3"), ("Acero estructural S275", "kg"),
+                     ("Montaje de tuberia", "m"), ("Excavacion en zanja", "m3")],
+    "commissioning": [("Prueba hidrostatica de linea", "ud"), ("Lazo de control verificado", "ud"),
+                      ("Horas de puesta en marcha", "h")],
+}
+
+
+def iter_boq_rows(capex, n_items, seed_text):
+    """Yield about ``n_items`` bill-of-quantities rows whose amounts add up exactly to each CAPEX partida.
+
+    Rows are generated lazily in two passes over the same seeded RNG (weights,
+    then amounts) so very large BoQs never sit in memory. Amounts are whole
+    cents; the last line of each partida absorbs the rounding.
+    """
+    total = sum(capex.values())
+    remaining = n_items
+    for pi, (partida, amount) in enumerate(capex.items()):
+        n = remaining if pi == len(capex) - 1 else round(n_items * amount / total)
+        n = max(1, n)
+        remaining -= n
+        seed = f"{CORPUS_SEED}:boq:{seed_text}:{partida}"
+        rng = random.Random(seed)
+        weight_sum = sum(rng.uniform(0.2, 5.0) for _ in range(n))
+        rng = random.Random(seed)
+        qty_rng = random.Random(f"{seed}:cantidad")
+        cents_left = amount * 100
+        catalogue = BOQ_ITEMS_BY_PARTIDA.get(partida, [(partida.capitalize(), "ud")])
+        for i in range(n):
+            w = rng.uniform(0.2, 5.0)
+            cents = cents_left if i == n - 1 else int(amount * 100 * w / weight_sum)
+            cents_left -= cents
+            desc, unit = catalogue[i % len(catalogue)]
+            qty = qty_rng.randint(1, 400)
+            yield [f"{partida[:3].upper()}-{i + 1:05d}", desc, unit, qty, cents / qty / 100, cents / 100]
+
+
+def add_boq_annex(pdf, capex, n_items, seed_text):
+    """BoQ annex rendered through the large-table path; returns its per-partida totals."""
+    totals = {k: 0 for k in capex}
+    prefixes = {k[:3].upper(): k for k in capex}
+
+    def rows():
+        for row in iter_boq_rows(capex, n_items, seed_text):
+            totals[prefixes[row[0].split("-")[0]]] += round(row[5] * 100)
+            yield row
+
+    pdf.add_page()
+    pdf.section_title("B", "Presupuesto Detallado (BoQ)")
+    count = pdf.add_large_table(
+        ["Codigo", "Descripcion", "Ud", "Cantidad", "Precio unit.", "Importe"], rows(),
+        col_widths=[22, 58, 10, 20, 38, 42], aligns=["L", "L", "C", "R", "R", "R"],
+        formats=[None, None, None, None, fmt, fmt],
+    )
+    return {"lineas": count, "totales": {k: v / 100 for k, v in totals.items()}}
+
+
 # ─── RFP GENERATORS ──────────────────────────────────────────────────────────
 
-def generate_rfp_tecnica():
+def generate_rfp_tecnica(out_dir=BASE_DIR, pages=None):
     pdf = BasePDF()
     pdf.alias_nb_pages()
     pdf.add_cover(
@@ -455,12 +959,10 @@ def generate_rfp_tecnica():
         col_widths=[60, 25, 105],
     )
 
-    path = os.path.join(BASE_DIR, "RFP", "01_RFP_Tecnica.pdf")
-    pdf.output(path)
-    return path
+    return finish_pdf(pdf, os.path.join("RFP", "01_RFP_Tecnica.pdf"), out_dir, pages)
 
 
-def generate_rfp_economica():
+def generate_rfp_economica(out_dir=BASE_DIR, pages=None):
     pdf = BasePDF()
     pdf.alias_nb_pages()
     pdf.add_cover(
@@ -679,12 +1181,10 @@ def generate_rfp_economica():
         col_widths=[55, 25, 110],
     )
 
-    path = os.path.join(BASE_DIR, "RFP", "02_RFP_Economica.pdf")
-    pdf.output(path)
-    return path
+    return finish_pdf(pdf, os.path.join("RFP", "02_RFP_Economica.pdf"), out_dir, pages)
 
 
-def generate_rfp_compliance():
+def generate_rfp_compliance(out_dir=BASE_DIR, pages=None):
     pdf = BasePDF()
     pdf.alias_nb_pages()
     pdf.add_cover(
@@ -867,17 +1367,17 @@ def generate_rfp_compliance():
         col_widths=[60, 25, 105],
     )
 
-    path = os.path.join(BASE_DIR, "RFP", "03_RFP_Compliance.pdf")
-    pdf.output(path)
-    return path
+    return finish_pdf(pdf, os.path.join("RFP", "03_RFP_Compliance.pdf"), out_dir, pages)
 
 
 # ─── SUPPLIER OFFER GENERATORS ───────────────────────────────────────────────
 
-def generate_oferta_tecnica(supplier_key):
+def generate_oferta_tecnica(supplier_key, out_dir=BASE_DIR, pages=None):
     s = SUPPLIERS[supplier_key]
+    tpl = s.get("plantilla", supplier_key)
     pdf = BasePDF()
     pdf.company_name = s["nombre"]
+    pdf.truth.update(supplier_truth(supplier_key))
     pdf.alias_nb_pages()
     pdf.add_cover(
         "Oferta Tecnica",
@@ -928,7 +1428,7 @@ def generate_oferta_tecnica(supplier_key):
     }
     pdf.add_table(
         ["Proyecto", "Cliente", "Ano", "Capacidad", "Estado"],
-        refs_by_supplier[supplier_key],
+        refs_by_supplier[tpl],
         col_widths=[55, 35, 20, 40, 40],
     )
 
@@ -970,7 +1470,7 @@ def generate_oferta_tecnica(supplier_key):
             "para autoconsumo en las instalaciones auxiliares de la planta."
         ),
     }
-    pdf.body_text(methodology_by_supplier[supplier_key])
+    pdf.body_text(methodology_by_supplier[tpl])
 
     pdf.sub_title("2.1 Cronograma Propuesto")
     schedules = {
@@ -1003,7 +1503,7 @@ def generate_oferta_tecnica(supplier_key):
     }
     pdf.add_table(
         ["Fase", "Periodo", "Entregables Clave"],
-        schedules[supplier_key],
+        schedules[tpl],
         col_widths=[65, 35, 90],
     )
 
@@ -1075,7 +1575,7 @@ def generate_oferta_tecnica(supplier_key):
     }
     pdf.add_table(
         ["Nombre", "Rol", "Exp.", "Titulacion", "Ded."],
-        team_data[supplier_key],
+        team_data[tpl],
         col_widths=[40, 45, 22, 55, 28],
     )
 
@@ -1177,7 +1677,7 @@ def generate_oferta_tecnica(supplier_key):
     }
     pdf.add_table(
         ["ID", "Riesgo", "Prob.", "Impacto", "Mitigacion"],
-        risk_data[supplier_key],
+        risk_data[tpl],
         col_widths=[15, 55, 20, 20, 80],
     )
 
@@ -1345,15 +1845,14 @@ def generate_oferta_tecnica(supplier_key):
             "- Optimizacion energetica avanzada mediante pinch analysis extendido"
         ),
     }
-    pdf.body_text(exceptions_by_supplier[supplier_key])
+    pdf.body_text(exceptions_by_supplier[tpl])
 
-    path = os.path.join(BASE_DIR, supplier_key, "Oferta_Tecnica.pdf")
-    pdf.output(path)
-    return path
+    return finish_pdf(pdf, os.path.join(supplier_key, "Oferta_Tecnica.pdf"), out_dir, pages)
 
 
-def generate_oferta_economica(supplier_key):
+def generate_oferta_economica(supplier_key, out_dir=BASE_DIR, pages=None):
     s = SUPPLIERS[supplier_key]
+    tpl = s.get("plantilla", supplier_key)
     capex = s["capex"]
     opex = s["opex"]
     total_capex = sum(capex.values())
@@ -1366,6 +1865,7 @@ def generate_oferta_economica(supplier_key):
 
     pdf = BasePDF()
     pdf.company_name = s["nombre"]
+    pdf.truth.update(supplier_truth(supplier_key))
     pdf.alias_nb_pages()
     pdf.add_cover(
         "Oferta Economica",
@@ -1559,7 +2059,7 @@ def generate_oferta_economica(supplier_key):
     }
     pdf.add_table(
         ["Perfil", "Experiencia", "EUR/h", "Dedicacion"],
-        rate_cards[supplier_key],
+        rate_cards[tpl],
         col_widths=[55, 45, 30, 60],
     )
 
@@ -1606,6 +2106,24 @@ def generate_oferta_economica(supplier_key):
         ],
         col_widths=[100, 90],
     )
+    pdf.truth["economico"] = {
+        "moneda": "EUR",
+        "iva": 0.21,
+        "capex": dict(capex),
+        "opex": dict(opex),
+        "total_capex": total_capex,
+        "iva_capex": iva_capex,
+        "grand_capex": grand_capex,
+        "total_opex": total_opex,
+        "iva_opex": iva_opex,
+        "grand_opex": grand_opex,
+        "lcc": lcc,
+        "capex_detalle": {
+            partida: {row[0]: parse_eur(row[1]) for row in detail[:-1]}
+            for partida, detail in (("ingenieria", ing_detail), ("procura", proc_detail),
+                                    ("construccion", con_detail), ("commissioning", com_detail))
+        },
+    }
 
     pdf.section_title("5", "Condiciones Comerciales")
     pdf.sub_title("5.1 Validez de la Oferta")
@@ -1615,7 +2133,7 @@ def generate_oferta_economica(supplier_key):
         "Supplier_03": "La presente oferta tiene una validez de 60 dias naturales desde la fecha de presentacion. Pasado este plazo, los precios podran ser revisados.",
         "Supplier_04": "La presente oferta tiene una validez de 90 dias naturales desde la fecha de presentacion.",
     }
-    pdf.body_text(validity_by_supplier[supplier_key])
+    pdf.body_text(validity_by_supplier[tpl])
 
     pdf.sub_title("5.2 Condiciones de Pago")
     payment_by_supplier = {
@@ -1643,7 +2161,7 @@ def generate_oferta_economica(supplier_key):
             "durante los primeros 6 meses tras la entrega del FEED."
         ),
     }
-    pdf.body_text(payment_by_supplier[supplier_key])
+    pdf.body_text(payment_by_supplier[tpl])
 
     pdf.sub_title("5.3 Calendario de Hitos de Pago")
     milestones_by_supplier = {
@@ -1683,7 +2201,7 @@ def generate_oferta_economica(supplier_key):
     }
     pdf.add_table(
         ["Hito", "% Pago", "Momento"],
-        milestones_by_supplier[supplier_key],
+        milestones_by_supplier[tpl],
         col_widths=[80, 30, 80],
     )
 
@@ -1718,7 +2236,7 @@ def generate_oferta_economica(supplier_key):
             "Estos servicios representan un valor anadido de aproximadamente 150.000 EUR."
         ),
     }
-    pdf.body_text(discounts_by_supplier[supplier_key])
+    pdf.body_text(discounts_by_supplier[tpl])
 
     pdf.sub_title("5.5 Exclusiones")
     exclusions_by_supplier = {
@@ -1755,7 +2273,7 @@ def generate_oferta_economica(supplier_key):
             "IVA (presentado por separado)",
         ],
     }
-    pdf.bullet_list(exclusions_by_supplier[supplier_key])
+    pdf.bullet_list(exclusions_by_supplier[tpl])
 
     pdf.sub_title("5.6 Garantias Financieras")
     guarantees_by_supplier = {
@@ -1787,17 +2305,20 @@ def generate_oferta_economica(supplier_key):
             "- Garantia de rendimiento: compromiso de performance del diseno"
         ),
     }
-    pdf.body_text(guarantees_by_supplier[supplier_key])
+    pdf.body_text(guarantees_by_supplier[tpl])
 
-    path = os.path.join(BASE_DIR, supplier_key, "Oferta_Economica.pdf")
-    pdf.output(path)
-    return path
+    if BOQ_ITEMS:
+        pdf.truth["economico"]["boq"] = add_boq_annex(pdf, capex, BOQ_ITEMS, supplier_key)
 
+    return finish_pdf(pdf, os.path.join(supplier_key, "Oferta_Economica.pdf"), out_dir, pages)
 
-def generate_oferta_compliance(supplier_key):
+
+def generate_oferta_compliance(supplier_key, out_dir=BASE_DIR, pages=None):
     s = SUPPLIERS[supplier_key]
+    tpl = s.get("plantilla", supplier_key)
     pdf = BasePDF()
     pdf.company_name = s["nombre"]
+    pdf.truth.update(supplier_truth(supplier_key))
     pdf.alias_nb_pages()
     pdf.add_cover(
         "Oferta de Compliance, HSE y Medioambiente",
@@ -1835,7 +2356,7 @@ def generate_oferta_compliance(supplier_key):
             "cero accidentes, cero enfermedades profesionales, cero danos al medioambiente."
         ),
     }
-    pdf.body_text(commitment[supplier_key])
+    pdf.body_text(commitment[tpl])
 
     pdf.section_title("2", "Indicadores de Seguridad")
     indicators = {
@@ -1870,7 +2391,7 @@ def generate_oferta_compliance(supplier_key):
     }
     pdf.add_table(
         ["Indicador", "2022", "2023", "2024"],
-        indicators[supplier_key],
+        indicators[tpl],
         col_widths=[70, 40, 40, 40],
     )
 
@@ -1889,9 +2410,14 @@ def generate_oferta_compliance(supplier_key):
             "B Corp Certification (en proceso)",
         ],
     }
-    if extra_certs[supplier_key]:
+    pdf.truth["compliance"] = {
+        "nivel": s["compliance_level"],
+        "cert": list(s["cert"]),
+        "cert_adicionales": list(extra_certs[tpl]),
+    }
+    if extra_certs[tpl]:
         pdf.sub_title("Certificaciones Adicionales")
-        pdf.bullet_list(extra_certs[supplier_key])
+        pdf.bullet_list(extra_certs[tpl])
 
     pdf.section_title("4", "Plan HSE del Proyecto")
     pdf.body_text(
@@ -1935,7 +2461,7 @@ def generate_oferta_compliance(supplier_key):
             "para las oficinas de obra como medida de autoconsumo."
         ),
     }
-    pdf.body_text(env_approach[supplier_key])
+    pdf.body_text(env_approach[tpl])
 
     pdf.section_title("6", "Programa de Formacion HSE")
     pdf.body_text(
@@ -1986,7 +2512,7 @@ def generate_oferta_compliance(supplier_key):
     }
     pdf.add_table(
         ["Modulo", "Destinatarios", "Duracion", "Periodicidad"],
-        training_by_supplier[supplier_key],
+        training_by_supplier[tpl],
         col_widths=[55, 45, 25, 65],
     )
 
@@ -2035,17 +2561,17 @@ def generate_oferta_compliance(supplier_key):
             "Politica de derechos humanos alineada con UN Guiding Principles",
         ],
     }
-    pdf.bullet_list(compliance_items_base + compliance_extra[supplier_key])
+    pdf.bullet_list(compliance_items_base + compliance_extra[tpl])
 
-    path = os.path.join(BASE_DIR, supplier_key, "Oferta_Compliance.pdf")
-    pdf.output(path)
-    return path
+    return finish_pdf(pdf, os.path.join(supplier_key, "Oferta_Compliance.pdf"), out_dir, pages)
 
 
-def generate_anexos(supplier_key):
+def generate_anexos(supplier_key, out_dir=BASE_DIR, pages=None):
     s = SUPPLIERS[supplier_key]
+    tpl = s.get("plantilla", supplier_key)
     pdf = BasePDF()
     pdf.company_name = s["nombre"]
+    pdf.truth.update(supplier_truth(supplier_key))
     pdf.alias_nb_pages()
     pdf.add_cover(
         "Anexos a la Oferta",
@@ -2064,10 +2590,10 @@ def generate_anexos(supplier_key):
     for cert in s["cert"]:
         pdf.sub_title(cert)
         pdf.body_text(
-            f"Organismo certificador: Bureau Veritas / SGS / TUV Rheinland\n"
-            f"Fecha de emision: Enero 2023\n"
-            f"Fecha de validez: Enero 2026\n"
-            f"Alcance: Ingenieria, procura y gestion de construccion de plantas industriales."
+            "Organismo certificador: Bureau Veritas / SGS / TUV Rheinland\n"
+            "Fecha de emision: Enero 2023\n"
+            "Fecha de validez: Enero 2026\n"
+            "Alcance: Ingenieria, procura y gestion de construccion de plantas industriales."
         )
 
     # Anexo 2: CVs
@@ -2114,7 +2640,7 @@ def generate_anexos(supplier_key):
              "3 publicaciones tecnicas. Idiomas: espanol (nativo), ingles (C1)."),
         ],
     }
-    for name_role, cv_text in cv_data[supplier_key]:
+    for name_role, cv_text in cv_data[tpl]:
         pdf.sub_title(name_role)
         pdf.body_text(cv_text)
 
@@ -2185,7 +2711,7 @@ def generate_anexos(supplier_key):
     }
     pdf.add_table(
         ["Poliza", "Cobertura", "Aseguradora", "Validez"],
-        insurance_by_supplier[supplier_key],
+        insurance_by_supplier[tpl],
         col_widths=[55, 45, 45, 45],
     )
 
@@ -2209,53 +2735,416 @@ def generate_anexos(supplier_key):
     pdf.ln(20)
     pdf.body_text("_________________________________")
     pdf.body_text(f"En representacion de {s['nombre']}")
-    pdf.body_text(f"Fecha: Febrero 2025")
+    pdf.body_text("Fecha: Febrero 2025")
+
+    return finish_pdf(pdf, os.path.join(supplier_key, "Anexos.pdf"), out_dir, pages)
+
+
+# ─── CORPUS MODE ─────────────────────────────────────────────────────────────
+
+ARCHETYPES = dict(SUPPLIERS)
+COMPLIANCE_LEVELS = ["bajo", "medio", "medio-alto", "alto", "excelente"]
+CERT_POOL = ["ISO 14001:2015", "ISO 45001:2018", "ASME U-Stamp", "API Q1", "ISO 50001:2018",
+             "ISO 27001:2022", "ISO 37001:2016", "OHSAS 18001"]
+NAME_PARTS = (
+    ["Techno", "Iberia", "Global", "Mediterranean", "Atlantic", "Norte", "Delta", "Vertex", "Cantabrica",
+     "Levante", "Meridian", "Aurora"],
+    ["Engineering", "Industrial Projects", "Process Engineering", "EPC", "Energy Solutions", "Plant Services"],
+    [("S.L.", "B"), ("S.A.", "A"), ("Ltd", "N"), ("GmbH", "W"), ("Group S.L.", "B")],
+)
+CITIES = ["Madrid", "Barcelona", "Bilbao", "Valencia", "Sevilla", "Tarragona", "A Coruna", "Oviedo", "Cartagena"]
+FACILITIES = [
+    "Planta de Procesamiento de Gas Natural", "Terminal de Regasificacion de GNL",
+    "Unidad de Recuperacion de NGL", "Planta de Tratamiento de Gas Acido",
+    "Planta de Compresion y Deshidratacion de Gas", "Planta de Fraccionamiento de LPG",
+]
+CLIENTS = ["Energias del Levante S.A.", "Gas Natural del Cantabrico S.A.", "Hidrocarburos del Sur S.A.",
+           "Iberica de Regasificacion S.A.", "Petroquimica del Ebro S.A."]
+
+
+def make_supplier(rng, scale):
+    """Procedural supplier modelled on one of the four demo archetypes."""
+    tpl = rng.choice(list(ARCHETYPES))
+    base = ARCHETYPES[tpl]
+    prefix, core, (legal, cif_letter) = (rng.choice(part) for part in NAME_PARTS)
+    level = COMPLIANCE_LEVELS.index(base["compliance_level"])
+    level = min(len(COMPLIANCE_LEVELS) - 1, max(0, level + rng.choice([-1, 0, 0, 1])))
+    cert_prob = 0.2 + 0.18 * level
+    # Price positioning follows the archetype; each line item jitters independently.
+    price = scale * rng.gauss(1.0, 0.08)
+    return {
+        "plantilla": tpl,
+        "nombre": f"{prefix} {core} {legal}",
+        "cif": f"{cif_letter}-{rng.randint(10_000_000, 99_999_999)}",
+        "perfil": base["perfil"],
+        "sede": rng.choice(CITIES),
+        "empleados": int(base["empleados"] * rng.uniform(0.5, 1.8)),
+        "experiencia_anos": max(5, base["experiencia_anos"] + rng.randint(-6, 8)),
+        "fortaleza": base["fortaleza"],
+        "debilidad": base["debilidad"],
+        "capex": {k: int(round(v * price * rng.uniform(0.9, 1.1), -3)) for k, v in base["capex"].items()},
+        "opex": {k: int(round(v * price * rng.uniform(0.9, 1.1), -3)) for k, v in base["opex"].items()},
+        "cert": ["ISO 9001:2015"] + [c for c in CERT_POOL if rng.random() < cert_prob],
+        "compliance_level": COMPLIANCE_LEVELS[level],
+    }
 
-    path = os.path.join(BASE_DIR, supplier_key, "Anexos.pdf")
-    pdf.output(path)
-    return path
 
+def make_project(index, n_suppliers, seed, boq_items=0):
+    rng = random.Random(f"{seed}:{index}")
+    scale = rng.lognormvariate(0, 0.45)
+    return {
+        "ref": f"RFP-{2024 + index % 3}-FEED-{index + 1:04d}",
+        "name": f"Proyecto de Ingenieria y Construccion de {rng.choice(FACILITIES)} - Fase FEED",
+        "client": rng.choice(CLIENTS),
+        "seed": seed,
+        "boq_items": boq_items,
+        "suppliers": {f"Supplier_{j + 1:02d}": make_supplier(rng, scale) for j in range(n_suppliers)},
+    }
 
-# ─── MAIN ─────────────────────────────────────────────────────────────────────
 
-def main():
-    # Create directories
-    os.makedirs(os.path.join(BASE_DIR, "RFP"), exist_ok=True)
-    for sk in SUPPLIERS:
-        os.makedirs(os.path.join(BASE_DIR, sk), exist_ok=True)
+DEMO_PROJECT = {
+    "ref": PROJECT_REF,
+    "name": PROJECT_NAME,
+    "client": CLIENT_NAME,
+    "seed": CORPUS_SEED,
+    "suppliers": dict(SUPPLIERS),
+}
 
-    generated = []
-    print("=" * 60)
-    print("GENERADOR DE PDFs DEMO - BidEval v2")
-    print("=" * 60)
-    print()
 
-    # RFPs
-    print("[1/19] Generando RFP Tecnica...")
-    generated.append(generate_rfp_tecnica())
-    print("[2/19] Generando RFP Economica...")
-    generated.append(generate_rfp_economica())
-    print("[3/19] Generando RFP Compliance...")
-    generated.append(generate_rfp_compliance())
-
-    # Suppliers
-    idx = 4
-    for sk in SUPPLIERS:
-        name = SUPPLIERS[sk]["nombre"]
-        print(f"[{idx}/19] Generando Oferta Tecnica - {name}...")
-        generated.append(generate_oferta_tecnica(sk))
-        idx += 1
-        print(f"[{idx}/19] Generando Oferta Economica - {name}...")
-        generated.append(generate_oferta_economica(sk))
-        idx += 1
-        print(f"[{idx}/19] Generando Oferta Compliance - {name}...")
-        generated.append(generate_oferta_compliance(sk))
-        idx += 1
-        print(f"[{idx}/19] Generando Anexos - {name}...")
-        generated.append(generate_anexos(sk))
-        idx += 1
-
-    # Summary
+def use_project(project):
+    """Point the module-level project globals (used by BasePDF and the generators) at ``project``."""
+    global PROJECT_REF, PROJECT_NAME, CLIENT_NAME, CORPUS_SEED, BOQ_ITEMS, SPLIT_PAGES
+    PROJECT_REF = project["ref"]
+    PROJECT_NAME = project["name"]
+    CLIENT_NAME = project["client"]
+    CORPUS_SEED = project["seed"]
+    BOQ_ITEMS = project.get("boq_items", 0)
+    SPLIT_PAGES = project.get("split_pages", 0)
+    SUPPLIERS.clear()
+    SUPPLIERS.update(project["suppliers"])
+
+
+RFP_GENERATORS = ["generate_rfp_tecnica", "generate_rfp_economica", "generate_rfp_compliance"]
+SUPPLIER_GENERATORS = ["generate_oferta_tecnica", "generate_oferta_economica", "generate_oferta_compliance",
+                       "generate_anexos"]
+
+
+def project_jobs(project, out_dir, pages=None):
+    """One job per document: (project, out_dir, generator name, supplier key or None, pages)."""
+    jobs = [(project, out_dir, gen, None, pages) for gen in RFP_GENERATORS]
+    for sk in project["suppliers"]:
+        jobs += [(project, out_dir, gen, sk, pages) for gen in SUPPLIER_GENERATORS]
+    return jobs
+
+
+def run_job(job):
+    """Generate one document. Top-level so a process pool can pickle it."""
+    project, out_dir, gen_name, supplier_key, pages = job
+    use_project(project)
+    gen = globals()[gen_name]
+    os.makedirs(os.path.join(out_dir, supplier_key or "RFP"), exist_ok=True)
+    if supplier_key is None:
+        return gen(out_dir, pages)
+    return gen(supplier_key, out_dir, pages)
+
+
+# ─── IN-MEMORY API ───────────────────────────────────────────────────────────
+
+def render_document(gen_name, supplier_key=None, project=None, pages=None):
+    """Return a GeneratedDocument (name, PDF bytes, ground truth) without writing to disk."""
+    use_project(project or DEMO_PROJECT)
+    gen = globals()[gen_name]
+    if supplier_key is None:
+        return gen(None, pages)
+    return gen(supplier_key, None, pages)
+
+
+def iter_documents(n_projects=1, n_suppliers=4, pages=None, seed=0, kinds=None, demo=False):
+    """Lazily yield generated documents one at a time, as dicts with the PDF bytes.
+
+    Only the current project and document are held in memory, so a load
+    tool can consume thousands of offers with flat memory. ``n_projects=None``
+    yields forever; ``kinds`` restricts the generator names (e.g.
+    ``SUPPLIER_GENERATORS`` for offers only); ``demo`` uses the demo project.
+    """
+    kinds = kinds or RFP_GENERATORS + SUPPLIER_GENERATORS
+    if demo:
+        projects = iter([DEMO_PROJECT])
+    else:
+        indexes = itertools.count() if n_projects is None else range(n_projects)
+        projects = (make_project(i, n_suppliers, seed) for i in indexes)
+    for project in projects:
+        targets = [(gen, None) for gen in kinds if gen in RFP_GENERATORS]
+        targets += [(gen, sk) for sk in project["suppliers"] for gen in kinds if gen in SUPPLIER_GENERATORS]
+        for gen_name, supplier_key in targets:
+            doc = render_document(gen_name, supplier_key, project, pages)
+            yield {
+                "project_ref": project["ref"],
+                "project_name": project["name"],
+                "supplier_key": supplier_key,
+                "supplier_name": project["suppliers"][supplier_key]["nombre"] if supplier_key else None,
+                "generator": gen_name,
+                "name": doc.name,
+                "data": doc.data,
+                "truth": doc.truth,
+            }
+
+
+# ─── SCANNED VARIANTS ────────────────────────────────────────────────────────
+
+def _import_or_install(module, pip_name):
+    try:
+        return __import__(module, fromlist=["_"])
+    except ImportError:
+        subprocess.check_call([sys.executable, "-m", "pip", "install", pip_name])
+        return __import__(module, fromlist=["_"])
+
+
+def _scan_page(pdfium_page, dpi, noise, skew, rng):
+    """Render one page as a grey, optionally skewed and noisy, JPEG-compressed image."""
+    Image = _import_or_install("PIL.Image", "pillow")
+    ImageChops = _import_or_install("PIL.ImageChops", "pillow")
+    img = pdfium_page.render(scale=dpi / 72).to_pil().convert("L")
+    if skew:
+        img = img.rotate(rng.uniform(-skew, skew), resample=Image.BICUBIC, fillcolor=255)
+    if noise:
+        # Seeded uniform noise rescaled to standard deviation ``noise * 255``
+        # (a uniform byte has sd ~73.6) and centred on 128, so the -128 offset
+        # makes it zero-mean when added.
+        amp = noise * 255 / 73.6
+        grain = Image.frombytes("L", img.size, rng.randbytes(img.size[0] * img.size[1]))
+        grain = grain.point(lambda v: max(0, min(255, round(128 + (v - 128) * amp))))
+        img = ImageChops.add(img, grain, 1.0, -128)
+    buf = io.BytesIO()
+    img.save(buf, format="JPEG", quality=75)
+    buf.seek(0)
+    return buf
+
+
+def scan_variant(data, dpi=150, noise=0.0, skew=0.0, scan_ratio=1.0, seed_text=""):
+    """Return ``(pdf bytes, scanned page numbers)`` with pages replaced by page images.
+
+    ``scan_ratio`` 1.0 gives an image-only PDF; lower values give a mixed
+    document where only that fraction of pages (chosen with a seeded RNG)
+    loses its text layer, as when scanned annexes are appended to an offer.
+    """
+    pdfium = _import_or_install("pypdfium2", "pypdfium2")
+    pypdf = _import_or_install("pypdf", "pypdf")
+    rng = random.Random(f"{CORPUS_SEED}:scan:{seed_text}")
+    source = pdfium.PdfDocument(data)
+    n_pages = len(source)
+    if scan_ratio >= 1:
+        scanned = list(range(n_pages))
+    else:
+        scanned = sorted(rng.sample(range(n_pages), max(1, round(n_pages * scan_ratio))))
+
+    images = FPDF(unit="pt")
+    images.set_creation_date(DOC_DATE)
+    for i in scanned:
+        page = source[i]
+        width, height = page.get_size()
+        images.add_page(format=(width, height))
+        images.image(_scan_page(page, dpi, noise, skew, rng), x=0, y=0, w=width, h=height)
+    image_pages = pypdf.PdfReader(io.BytesIO(bytes(images.output()))).pages
+    text_pages = pypdf.PdfReader(io.BytesIO(data)).pages
+
+    writer = pypdf.PdfWriter()
+    by_index = dict(zip(scanned, image_pages))
+    for i in range(n_pages):
+        writer.add_page(by_index.get(i, text_pages[i]))
+    out = io.BytesIO()
+    writer.write(out)
+    return out.getvalue(), [i + 1 for i in scanned]
+
+
+def expected_needs_ocr(data):
+    """Replicate the 'Validar Contenido PDF' heuristic: OCR when text averages < 100 chars/page."""
+    pypdf = _import_or_install("pypdf", "pypdf")
+    reader = pypdf.PdfReader(io.BytesIO(data))
+    chars = sum(len(page.extract_text() or "") for page in reader.pages)
+    avg = chars / max(1, len(reader.pages))
+    return avg < 100, round(avg)
+
+
+def make_scan_variant(job):
+    """Write ``<stem>_scan.pdf`` or ``<stem>_mixed.pdf`` (plus ground truth) for one generated PDF."""
+    path, kind, dpi, noise, skew, mixed_ratio = job
+    with open(path, 'rb') as f:
+        data = f.read()
+    ratio = 1.0 if kind == "scan" else mixed_ratio
+    variant, scanned = scan_variant(data, dpi, noise, skew, ratio, seed_text=path)
+    needs_ocr, avg_chars = expected_needs_ocr(variant)
+    stem = os.path.splitext(path)[0]
+    out_path = f"{stem}_{kind}.pdf"
+    with open(out_path, 'wb') as f:
+        f.write(variant)
+    truth = {}
+    if os.path.exists(stem + ".json"):
+        with open(stem + ".json", 'r', encoding='utf-8') as f:
+            truth = json.load(f)
+    truth["escaneo"] = {
+        "variante": kind, "origen": os.path.basename(path), "dpi": dpi, "ruido": noise, "inclinacion": skew,
+        "paginas_escaneadas": scanned, "chars_por_pagina": avg_chars, "needs_ocr_esperado": needs_ocr,
+    }
+    with open(f"{stem}_{kind}.json", 'w', encoding='utf-8') as f:
+        json.dump(truth, f, ensure_ascii=False, indent=1)
+    return out_path
+
+
+def scan_job_hash(job):
+    """Hash of a scan variant's inputs: source PDF and truth, scan parameters and rasterising code."""
+    path, kind, dpi, noise, skew, mixed_ratio = job
+    h = hashlib.sha256()
+    for fn in (_scan_page, scan_variant, expected_needs_ocr, make_scan_variant):
+        h.update(inspect.getsource(fn).encode("utf-8"))
+    params = [kind, dpi, noise, skew, mixed_ratio if kind == "mixed" else None]
+    h.update(json.dumps(params).encode("utf-8"))
+    for source in (path, os.path.splitext(path)[0] + ".json"):
+        if os.path.exists(source):
+            with open(source, 'rb') as f:
+                h.update(hashlib.sha256(f.read()).digest())
+    return h.hexdigest()
+
+
+def make_scan_variants(generated, base_dir, scan_glob, mixed_glob, dpi, noise, skew, mixed_ratio, workers=1,
+                       incremental=True):
+    jobs = []
+    for path in generated:
+        rel = os.path.relpath(path, base_dir)
+        if scan_glob and fnmatch.fnmatch(rel, scan_glob):
+            jobs.append((path, "scan", dpi, noise, skew, mixed_ratio))
+        if mixed_glob and fnmatch.fnmatch(rel, mixed_glob):
+            jobs.append((path, "mixed", dpi, noise, skew, mixed_ratio))
+    if not jobs:
+        return []
+    print(f"\nVariantes escaneadas: {len(jobs)} ({dpi} dpi, ruido {noise}, inclinacion {skew} grados)")
+
+    manifest = load_manifest(base_dir) if incremental else {}
+    keys = [f"{os.path.relpath(job[0], base_dir)}:{job[1]}" for job in jobs]
+    hashes = [scan_job_hash(job) for job in jobs]
+    variants = [None] * len(jobs)
+    pending = []
+    for i, (key, digest) in enumerate(zip(keys, hashes)):
+        entry = manifest.get(key)
+        if entry and entry["hash"] == digest and os.path.exists(os.path.join(base_dir, entry["path"])):
+            variants[i] = os.path.join(base_dir, entry["path"])
+        else:
+            pending.append(i)
+    if len(pending) < len(jobs):
+        print(f"Sin cambios: {len(jobs) - len(pending)} variantes; a regenerar: {len(pending)}")
+
+    if workers == 1:
+        results = map(make_scan_variant, (jobs[i] for i in pending))
+    else:
+        pool = ProcessPoolExecutor(max_workers=workers or None)
+        results = pool.map(make_scan_variant, [jobs[i] for i in pending])
+    try:
+        for n, (i, out_path) in enumerate(zip(pending, results), 1):
+            variants[i] = out_path
+            manifest[keys[i]] = {"hash": hashes[i], "path": os.path.relpath(out_path, base_dir)}
+            print(f"[{n}/{len(pending)}] {os.path.relpath(out_path, base_dir)}")
+    finally:
+        if workers != 1:
+            pool.shutdown()
+        save_manifest(base_dir, manifest)
+    return variants
+
+
+def _shared_source():
+    parts = [inspect.getsource(BasePDF), inspect.getsource(fmt), inspect.getsource(finish_pdf), inspect.getsource(merge_parts),
+             inspect.getsource(ground_truth), inspect.getsource(supplier_truth),
+             inspect.getsource(pad_to_pages), inspect.getsource(iter_boq_rows), inspect.getsource(add_boq_annex),
+             repr(BOQ_ITEMS_BY_PARTIDA),
+             repr((FILLER_SUBJECTS, FILLER_SENTENCES, FILLER_SERVICES, FILLER_MATERIALS)),
+             repr(DOC_DATE), fpdf.__version__]
+    return "\n".join(parts)
+
+
+def job_key(job, base_dir):
+    _, out_dir, gen_name, supplier_key, _ = job
+    folder = os.path.normpath(os.path.join(os.path.relpath(out_dir, base_dir), supplier_key or "RFP"))
+    return f"{folder}/{gen_name}"
+
+
+def job_hash(job, shared):
+    """Hash of everything a document depends on: inputs, generator source and shared rendering code."""
+    project, _, gen_name, supplier_key, pages = job
+    h = hashlib.sha256()
+    h.update(shared.encode("utf-8"))
+    h.update(inspect.getsource(globals()[gen_name]).encode("utf-8"))
+    constants = {k: project[k] for k in ("ref", "name", "client", "seed")}
+    for option in ("boq_items", "split_pages"):
+        if project.get(option):
+            constants[option] = project[option]
+    h.update(json.dumps([constants, pages], sort_keys=True).encode("utf-8"))
+    if supplier_key is not None:
+        h.update(json.dumps(project["suppliers"][supplier_key], sort_keys=True).encode("utf-8"))
+    return h.hexdigest()
+
+
+def load_manifest(base_dir):
+    path = os.path.join(base_dir, MANIFEST_NAME)
+    if not os.path.exists(path):
+        return {}
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def save_manifest(base_dir, manifest):
+    os.makedirs(base_dir, exist_ok=True)
+    with open(os.path.join(base_dir, MANIFEST_NAME), 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=1, sort_keys=True)
+
+
+def run_jobs(jobs, workers=1, base_dir=BASE_DIR, incremental=True):
+    """Run document jobs in order, optionally across a process pool; returns the output paths.
+
+    With ``incremental`` only documents whose hash differs from the manifest
+    in ``base_dir`` (or whose file is missing) are regenerated.
+    """
+    manifest = load_manifest(base_dir) if incremental else {}
+    shared = _shared_source()
+    hashes = [job_hash(job, shared) for job in jobs]
+    generated = [None] * len(jobs)
+    pending = []
+    for i, (job, digest) in enumerate(zip(jobs, hashes)):
+        entry = manifest.get(job_key(job, base_dir))
+        if entry and entry["hash"] == digest and os.path.exists(os.path.join(base_dir, entry["path"])):
+            generated[i] = os.path.join(base_dir, entry["path"])
+        else:
+            pending.append(i)
+    if len(pending) < len(jobs):
+        print(f"Sin cambios: {len(jobs) - len(pending)} PDFs; a regenerar: {len(pending)}")
+
+    if workers == 1:
+        results = map(run_job, (jobs[i] for i in pending))
+    else:
+        pool = ProcessPoolExecutor(max_workers=workers or None)
+        # Large chunks amortise pickling the project dict; small enough to keep cores busy at the tail.
+        chunksize = max(1, len(pending) // ((workers or os.cpu_count()) * 8))
+        results = pool.map(run_job, [jobs[i] for i in pending], chunksize=chunksize)
+    try:
+        for n, (i, path) in enumerate(zip(pending, results), 1):
+            generated[i] = path
+            manifest[job_key(jobs[i], base_dir)] = {"hash": hashes[i], "path": os.path.relpath(path, base_dir)}
+            print(f"[{n}/{len(pending)}] {os.path.relpath(path, base_dir)}")
+    finally:
+        if workers != 1:
+            pool.shutdown()
+        save_manifest(base_dir, manifest)
+    return generated
+
+
+def generate_corpus(out_dir, n_projects, n_suppliers, pages=None, seed=0, workers=1, incremental=True,
+                    boq_items=0, split_pages=0):
+    jobs = []
+    for i in range(n_projects):
+        project = dict(make_project(i, n_suppliers, seed, boq_items), split_pages=split_pages)
+        jobs.extend(project_jobs(project, os.path.join(out_dir, project["ref"]), pages))
+    return run_jobs(jobs, workers, out_dir, incremental)
+
+
+def print_summary(generated, base_dir):
     print()
     print("=" * 60)
     print("RESUMEN DE GENERACION")
@@ -2264,12 +3153,128 @@ def main():
     for path in generated:
         size = os.path.getsize(path)
         total_size += size
-        rel = os.path.relpath(path, BASE_DIR)
+        rel = os.path.relpath(path, base_dir)
         print(f"  OK  {rel:50s} {size/1024:6.1f} KB")
 
     print(f"\nTotal: {len(generated)} PDFs generados ({total_size/1024:.1f} KB)")
     print("=" * 60)
 
 
+# ─── MAIN ─────────────────────────────────────────────────────────────────────
+
+def bench_tables(n_rows):
+    """Rows/s of the cell-per-value add_table path versus add_large_table."""
+    import time
+    headers = ["Codigo", "Descripcion", "Ud", "Cantidad", "Precio unit.", "Importe"]
+    widths = [22, 58, 10, 20, 38, 42]
+    rows = list(iter_boq_rows(SUPPLIERS["Supplier_01"]["capex"], n_rows, "bench"))
+
+    def cell_path(pdf):
+        # add_table hands anything above LARGE_TABLE_ROWS to the fast path, so feed it in chunks
+        for i in range(0, len(rows), LARGE_TABLE_ROWS):
+            chunk = [[r[0], r[1], r[2], str(r[3]), fmt(r[4]), fmt(r[5])] for r in rows[i:i + LARGE_TABLE_ROWS]]
+            pdf.add_table(headers, chunk, col_widths=widths)
+
+    def fast_path(pdf):
+        pdf.add_large_table(headers, rows, col_widths=widths, formats=[None, None, None, None, fmt, fmt])
+
+    for label, draw in (("add_table", cell_path), ("add_large_table", fast_path)):
+        pdf = BasePDF()
+        pdf.alias_nb_pages()
+        pdf.add_page()
+        started = time.perf_counter()
+        draw(pdf)
+        data = pdf.output()
+        elapsed = time.perf_counter() - started
+        print(f"{label:<16} {len(rows) / elapsed:>10,.0f} filas/s  {elapsed:6.2f} s  "
+              f"{pdf.page_no()} pags  {len(data) / 1024:,.0f} KB")
+
+
+def _rss_probe(job):
+    """Run one job in a fresh process; return (pages, peak RSS in MB, seconds, bytes)."""
+    import resource
+    import time
+    started = time.perf_counter()
+    path = run_job(job)
+    elapsed = time.perf_counter() - started
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / (1024 * 1024 if sys.platform == "darwin" else 1024)
+    with open(os.path.splitext(path)[0] + ".json", 'r', encoding='utf-8') as f:
+        pages = json.load(f)["paginas"]
+    return pages, rss, elapsed, os.path.getsize(path)
+
+
+def bench_memory(page_counts, split_pages):
+    """Peak RSS of a large economic offer (BoQ annex + appendices), whole vs split into parts."""
+    import multiprocessing
+    ctx = multiprocessing.get_context("spawn")
+    print(f"{'paginas':>8} {'modo':<12} {'RSS pico':>9} {'tiempo':>8} {'tamano':>10}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for pages in page_counts:
+            for split in (0, split_pages):
+                project = dict(DEMO_PROJECT, boq_items=pages * 15, split_pages=split)
+                job = (project, tmp, "generate_oferta_economica", "Supplier_01", pages)
+                # A fresh interpreter per measurement so ru_maxrss is not inherited.
+                with ProcessPoolExecutor(1, mp_context=ctx) as pool:
+                    n, rss, elapsed, size = pool.submit(_rss_probe, job).result()
+                mode = f"partes de {split}" if split else "completo"
+                print(f"{n:>8} {mode:<12} {rss:>6.0f} MB {elapsed:>6.1f} s {size / 1024:>7,.0f} KB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generador de PDFs demo BidEval")
+    parser.add_argument("--corpus", action="store_true", help="Generar corpus procedural N proyectos x M proveedores")
+    parser.add_argument("--projects", type=int, default=5)
+    parser.add_argument("--suppliers", type=int, default=6)
+    parser.add_argument("--pages", type=int, default=None, help="Paginas minimas por documento (relleno tecnico)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", default=os.path.join(BASE_DIR, "corpus"))
+    parser.add_argument("--force", action="store_true", help="Regenerar todo aunque no haya cambios")
+    parser.add_argument("--scan", metavar="GLOB", help="Variantes solo-imagen (_scan.pdf), p.ej. '*Oferta_Tecnica*'")
+    parser.add_argument("--mixed", metavar="GLOB", help="Variantes mixtas texto/escaneo (_mixed.pdf)")
+    parser.add_argument("--mixed-ratio", type=float, default=0.5, help="Fraccion de paginas escaneadas en _mixed")
+    parser.add_argument("--dpi", type=int, default=150)
+    parser.add_argument("--noise", type=float, default=0.0,
+                        help="Desviacion tipica del ruido uniforme, en fraccion de 255 (0-1)")
+    parser.add_argument("--skew", type=float, default=0.0, help="Inclinacion maxima en grados")
+    parser.add_argument("--boq-items", type=int, default=0,
+                        help="Lineas del anexo BoQ en cada oferta economica (tabla grande)")
+    parser.add_argument("--bench-table", type=int, metavar="ROWS",
+                        help="Medir filas/s de add_table frente a add_large_table y salir")
+    parser.add_argument("--split-pages", type=int, default=0, metavar="N",
+                        help="Renderizar por partes de ~N paginas y fusionarlas (memoria acotada)")
+    parser.add_argument("--bench-memory", type=int, nargs="+", metavar="PAGES",
+                        help="Medir RSS pico completo vs por partes para esos tamanos y salir")
+    parser.add_argument("-j", "--workers", type=int, default=1, help="Procesos en paralelo (0 = todos los nucleos)")
+    args = parser.parse_args()
+
+    if args.bench_table:
+        bench_tables(args.bench_table)
+        return
+    if args.bench_memory:
+        bench_memory(args.bench_memory, args.split_pages or 50)
+        return
+
+    if args.corpus:
+        print("=" * 60)
+        print(f"CORPUS SINTETICO - {args.projects} proyectos x {args.suppliers} proveedores (seed {args.seed})")
+        print("=" * 60)
+        generated = generate_corpus(args.out, args.projects, args.suppliers, args.pages, args.seed, args.workers,
+                                    not args.force, args.boq_items, args.split_pages)
+        generated += make_scan_variants(generated, args.out, args.scan, args.mixed, args.dpi, args.noise,
+                                        args.skew, args.mixed_ratio, args.workers, not args.force)
+        print_summary(generated, args.out)
+        return
+
+    print("=" * 60)
+    print("GENERADOR DE PDFs DEMO - BidEval v2")
+    print("=" * 60)
+    print()
+    project = dict(DEMO_PROJECT, boq_items=args.boq_items, split_pages=args.split_pages)
+    generated = run_jobs(project_jobs(project, BASE_DIR, args.pages), args.workers, BASE_DIR, not args.force)
+    generated += make_scan_variants(generated, BASE_DIR, args.scan, args.mixed, args.dpi, args.noise,
+                                    args.skew, args.mixed_ratio, args.workers, not args.force)
+    print_summary(generated, BASE_DIR)
+
+
 if __name__ == "__main__":
     main()
@@ -0,0 +1,64 @@
+-- ============================================================
+-- Indexes for the access patterns of the n8n workflow
+-- Schema: desarrollo
+-- Generated by scripts/perf/index_advisor.py from the supabase node
+-- filters and the Postgres node queries; review before applying.
+-- ============================================================
+
+SET search_path TO desarrollo;
+
+-- rfq_items_master: Get many rows1
+CREATE INDEX IF NOT EXISTS idx_rfq_items_master_project_id_evaluation_type ON rfq_items_master (project_id, evaluation_type);
+
+ANALYZE rfq_items_master;
+
+-- Redundant indexes (review write load and usage in pg_stat_user_indexes first):
+-- idx_economic_offers_project (project_id) is a prefix of unique_economic_offer (project_id, provider_name)
+-- DROP INDEX IF EXISTS idx_economic_offers_project;
+-- idx_org_invites_token (token) is a duplicate of organization_invites_token_key (token)
+-- DROP INDEX IF EXISTS idx_org_invites_token;
+-- idx_org_members_org (organization_id) is a prefix of organization_members_organization_id_user_id_key (organization_id, user_id)
+-- DROP INDEX IF EXISTS idx_org_members_org;
+-- idx_organizations_slug (slug) is a duplicate of organizations_slug_key (slug)
+-- DROP INDEX IF EXISTS idx_organizations_slug;
+-- idx_project_awards_project (project_id) is a duplicate of project_awards_project_id_key (project_id)
+-- DROP INDEX IF EXISTS idx_project_awards_project;
+-- idx_project_comms_project (project_id) is a prefix of idx_project_comms_provider (project_id, provider_name)
+-- DROP INDEX IF EXISTS idx_project_comms_project;
+-- idx_project_milestones_project (project_id) is a prefix of idx_project_milestones_order (project_id, sort_order)
+-- DROP INDEX IF EXISTS idx_project_milestones_project;
+-- idx_project_providers_project (project_id) is a prefix of unique_project_provider (project_id, provider_name)
+-- DROP INDEX IF EXISTS idx_project_providers_project;
+-- idx_projects_name (name) is a duplicate of projects_name_key (name)
+-- DROP INDEX IF EXISTS idx_projects_name;
+-- idx_provider_criterion_scores_ranking (provider_ranking_id) is a prefix of unique_provider_criterion (provider_ranking_id, criterion_id)
+-- DROP INDEX IF EXISTS idx_provider_criterion_scores_ranking;
+-- idx_provider_responses_requirement (requirement_id) is a prefix of unique_requirement_provider_file (requirement_id, provider_name, file_id)
+-- DROP INDEX IF EXISTS idx_provider_responses_requirement;
+-- idx_qa_audit_project_id (project_id) is a prefix of idx_qa_audit_project_status (project_id, status)
+-- DROP INDEX IF EXISTS idx_qa_audit_project_id;
+-- idx_qa_response_tokens_token (token) is a duplicate of qa_response_tokens_token_key (token)
+-- DROP INDEX IF EXISTS idx_qa_response_tokens_token;
+-- idx_ranking_provider_name (provider_name) is a prefix of unique_provider_project (provider_name, project_id)
+-- DROP INDEX IF EXISTS idx_ranking_provider_name;
+-- idx_ranking_project_id (project_id) is a prefix of idx_ranking_project_score (project_id, overall_score)
+-- DROP INDEX IF EXISTS idx_ranking_project_id;
+-- idx_rfq_items_master_project_id (project_id) is a prefix of idx_rfq_items_project_created (project_id, created_at)
+-- DROP INDEX IF EXISTS idx_rfq_items_master_project_id;
+-- idx_scoring_categories_project_id (project_id) is a prefix of unique_category_name_project (project_id, name)
+-- DROP INDEX IF EXISTS idx_scoring_categories_project_id;
+-- idx_scoring_change_log_project (project_id) is a prefix of idx_scoring_change_log_provider (project_id, provider_name)
+-- DROP INDEX IF EXISTS idx_scoring_change_log_project;
+-- idx_scoring_criteria_category_id (category_id) is a prefix of unique_criterion_name_category (category_id, name)
+-- DROP INDEX IF EXISTS idx_scoring_criteria_category_id;
+-- idx_scoring_weight_configs_project (project_id) is a prefix of unique_active_config_project (project_id, is_active)
+-- DROP INDEX IF EXISTS idx_scoring_weight_configs_project;
+-- idx_supplier_directory_name (name) is a duplicate of supplier_directory_name_key (name)
+-- DROP INDEX IF EXISTS idx_supplier_directory_name;
+-- idx_supplier_upload_tokens_token (token) is a duplicate of supplier_upload_tokens_token_key (token)
+-- DROP INDEX IF EXISTS idx_supplier_upload_tokens_token;
+-- idx_technical_reports_project (project_id) is a prefix of unique_project_report_version (project_id, report_type, version)
+-- DROP INDEX IF EXISTS idx_technical_reports_project;
+-- idx_technical_reports_type (project_id, report_type) is a prefix of unique_project_report_version (project_id, report_type, version)
+-- DROP INDEX IF EXISTS idx_technical_reports_type;
+
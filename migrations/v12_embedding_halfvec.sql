@@ -0,0 +1,35 @@
+-- ============================================================
+-- V12: halfvec(2048) storage for proposals / rfq embeddings
+-- Schema: desarrollo
+-- Phase 1 of scripts/perf/embedding_precision.py: adds embedding_half
+-- and keeps it in sync; the n8n vector store nodes keep writing
+-- embedding unchanged. Then run `backfill` and `switch`.
+-- ============================================================
+
+SET search_path TO desarrollo;
+
+CREATE OR REPLACE FUNCTION sync_embedding_half()
+RETURNS TRIGGER
+LANGUAGE plpgsql
+AS $$
+BEGIN
+  IF NEW.embedding IS NOT NULL THEN
+    NEW.embedding_half := subvector(NEW.embedding, 1, 2048)::halfvec(2048);
+  END IF;
+  RETURN NEW;
+END;
+$$;
+
+ALTER TABLE proposals ADD COLUMN IF NOT EXISTS embedding_half halfvec(2048);
+DROP TRIGGER IF EXISTS trigger_proposals_embedding_half ON proposals;
+CREATE TRIGGER trigger_proposals_embedding_half
+    BEFORE INSERT OR UPDATE OF embedding ON proposals
+    FOR EACH ROW
+    EXECUTE FUNCTION sync_embedding_half();
+
+ALTER TABLE rfq ADD COLUMN IF NOT EXISTS embedding_half halfvec(2048);
+DROP TRIGGER IF EXISTS trigger_rfq_embedding_half ON rfq;
+CREATE TRIGGER trigger_rfq_embedding_half
+    BEFORE INSERT OR UPDATE OF embedding ON rfq
+    FOR EACH ROW
+    EXECUTE FUNCTION sync_embedding_half();
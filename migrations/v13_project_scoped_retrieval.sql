@@ -0,0 +1,136 @@
+-- ============================================================
+-- V13: Project-scoped retrieval for proposals / rfq
+-- Schema: desarrollo
+-- Generated by scripts/perf/project_scope.py. Pair with
+-- `workflow_patch.py scope-retrieval`, which makes the vector store
+-- nodes send the session's project_id as the match_* filter.
+-- ============================================================
+
+SET search_path TO desarrollo;
+
+-- Chunks inserted before the RFQ loader wrote project_id
+UPDATE proposals t
+SET metadata = t.metadata || jsonb_build_object('project_id', dm.project_id::text)
+FROM document_metadata dm
+WHERE dm.id = t.metadata->>'file_id'
+  AND dm.project_id IS NOT NULL
+  AND coalesce(t.metadata->>'project_id', '') = '';
+
+UPDATE rfq t
+SET metadata = t.metadata || jsonb_build_object('project_id', dm.project_id::text)
+FROM document_metadata dm
+WHERE dm.id = t.metadata->>'file_id'
+  AND dm.project_id IS NOT NULL
+  AND coalesce(t.metadata->>'project_id', '') = '';
+
+CREATE INDEX IF NOT EXISTS idx_proposals_metadata_project_id ON proposals ((metadata->>'project_id'));
+CREATE INDEX IF NOT EXISTS idx_rfq_metadata_project_id ON rfq ((metadata->>'project_id'));
+
+CREATE OR REPLACE FUNCTION match_proposals(
+  query_embedding vector(4096),
+  match_count int DEFAULT 10,
+  filter jsonb DEFAULT '{}'::jsonb
+)
+RETURNS TABLE (
+  id bigint,
+  content text,
+  metadata jsonb,
+  similarity float
+)
+LANGUAGE plpgsql
+SET search_path = desarrollo
+AS $$
+DECLARE
+  v_project text := NULLIF(filter->>'project_id', '');
+  v_organization uuid := NULLIF(filter->>'organization_id', '')::uuid;
+  v_projects text[];
+BEGIN
+  IF v_organization IS NOT NULL THEN
+    SELECT coalesce(array_agg(pr.id::text), '{}') INTO v_projects
+    FROM projects pr
+    WHERE pr.organization_id = v_organization
+      AND (v_project IS NULL OR pr.id::text = v_project);
+  ELSIF v_project IS NOT NULL THEN
+    v_projects := ARRAY[v_project];
+  END IF;
+
+  IF v_projects IS NULL THEN
+    RETURN QUERY
+    SELECT p.id, p.content, p.metadata, 1 - (p.embedding <=> query_embedding) AS similarity
+    FROM proposals p
+    ORDER BY p.embedding <=> query_embedding
+    LIMIT match_count;
+    RETURN;
+  END IF;
+
+  -- The project's chunks come from the btree index and are ranked exactly.
+  -- MATERIALIZED keeps the planner from walking a global ANN index and
+  -- filtering its top-k afterwards, which loses results for small projects.
+  RETURN QUERY
+  WITH scoped AS MATERIALIZED (
+    SELECT p.id, p.content, p.metadata, p.embedding AS embedding
+    FROM proposals p
+    WHERE p.metadata->>'project_id' = ANY (v_projects)
+  )
+  SELECT s.id, s.content, s.metadata, 1 - (s.embedding <=> query_embedding) AS similarity
+  FROM scoped s
+  ORDER BY s.embedding <=> query_embedding
+  LIMIT match_count;
+END;
+$$;
+
+CREATE OR REPLACE FUNCTION match_rfq(
+  query_embedding vector(4096),
+  match_count int DEFAULT 10,
+  filter jsonb DEFAULT '{}'::jsonb
+)
+RETURNS TABLE (
+  id bigint,
+  content text,
+  metadata jsonb,
+  similarity float
+)
+LANGUAGE plpgsql
+SET search_path = desarrollo
+AS $$
+DECLARE
+  v_project text := NULLIF(filter->>'project_id', '');
+  v_organization uuid := NULLIF(filter->>'organization_id', '')::uuid;
+  v_projects text[];
+BEGIN
+  IF v_organization IS NOT NULL THEN
+    SELECT coalesce(array_agg(pr.id::text), '{}') INTO v_projects
+    FROM projects pr
+    WHERE pr.organization_id = v_organization
+      AND (v_project IS NULL OR pr.id::text = v_project);
+  ELSIF v_project IS NOT NULL THEN
+    v_projects := ARRAY[v_project];
+  END IF;
+
+  IF v_projects IS NULL THEN
+    RETURN QUERY
+    SELECT r.id, r.content, r.metadata, 1 - (r.embedding <=> query_embedding) AS similarity
+    FROM rfq r
+    ORDER BY r.embedding <=> query_embedding
+    LIMIT match_count;
+    RETURN;
+  END IF;
+
+  -- The project's chunks come from the btree index and are ranked exactly.
+  -- MATERIALIZED keeps the planner from walking a global ANN index and
+  -- filtering its top-k afterwards, which loses results for small projects.
+  RETURN QUERY
+  WITH scoped AS MATERIALIZED (
+    SELECT r.id, r.content, r.metadata, r.embedding AS embedding
+    FROM rfq r
+    WHERE r.metadata->>'project_id' = ANY (v_projects)
+  )
+  SELECT s.id, s.content, s.metadata, 1 - (s.embedding <=> query_embedding) AS similarity
+  FROM scoped s
+  ORDER BY s.embedding <=> query_embedding
+  LIMIT match_count;
+END;
+$$;
+
+ANALYZE proposals;
+ANALYZE rfq;
@@ -0,0 +1,173 @@
+-- ============================================================
+-- V14: Hash-partitioned provider_responses / proposals
+-- Schema: desarrollo
+-- Generated by scripts/perf/partition_migrate.py. Creates the
+-- partitioned copies and starts mirroring writes into them; the
+-- existing rows are moved by `copy`, checked by `verify` and the
+-- tables are exchanged by `swap`.
+-- ============================================================
+
+SET search_path TO desarrollo;
+
+-- Filtered by 4 workflow nodes but missing from the declared schema
+ALTER TABLE provider_responses ADD COLUMN IF NOT EXISTS project_id UUID REFERENCES projects(id) ON DELETE CASCADE;
+-- Get Offers / Fetch All Provider Responses on the live table until the swap
+CREATE INDEX IF NOT EXISTS idx_provider_responses_provider_name_project_id ON provider_responses (provider_name, project_id);
+
+CREATE TABLE IF NOT EXISTS partition_migration_progress (
+    table_name TEXT PRIMARY KEY,
+    last_id TEXT,
+    copied BIGINT NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
+
+-- provider_responses: HASH project_id, 16 partitions
+CREATE TABLE IF NOT EXISTS provider_responses_part
+    (LIKE provider_responses INCLUDING DEFAULTS INCLUDING GENERATED INCLUDING STORAGE INCLUDING COMMENTS)
+    PARTITION BY HASH (project_id);
+
+ALTER TABLE provider_responses_part ALTER COLUMN project_id SET NOT NULL;
+
+CREATE TABLE IF NOT EXISTS provider_responses_part_p00 PARTITION OF provider_responses_part FOR VALUES WITH (MODULUS 16, REMAINDER 0);
+CREATE TABLE IF NOT EXISTS provider_responses_part_p01 PARTITION OF provider_responses_part FOR VALUES WITH (MODULUS 16, REMAINDER 1);
+CREATE TABLE IF NOT EXISTS provider_responses_part_p02 PARTITION OF provider_responses_part FOR VALUES WITH (MODULUS 16, REMAINDER 2);
+CREATE TABLE IF NOT EXISTS provider_responses_part_p03 PARTITION OF provider_responses_part FOR VALUES WITH (MODULUS 16, REMAINDER 3);
+CREATE TABLE IF NOT EXISTS provider_responses_part_p04 PARTITION OF provider_responses_part FOR VALUES WITH (MODULUS 16, REMAINDER 4);
+CREATE TABLE IF NOT EXISTS provider_responses_part_p05 PARTITION OF provider_responses_part FOR VALUES WITH (MODULUS 16, REMAINDER 5);
+CREATE TABLE IF NOT EXISTS provider_responses_part_p06 PARTITION OF provider_responses_part FOR VALUES WITH (MODULUS 16, REMAINDER 6);
+CREATE TABLE IF NOT EXISTS provider_responses_part_p07 PARTITION OF provider_responses_part FOR VALUES WITH (MODULUS 16, REMAINDER 7);
+CREATE TABLE IF NOT EXISTS provider_responses_part_p08 PARTITION OF provider_responses_part FOR VALUES WITH (MODULUS 16, REMAINDER 8);
+CREATE TABLE IF NOT EXISTS provider_responses_part_p09 PARTITION OF provider_responses_part FOR VALUES WITH (MODULUS 16, REMAINDER 9);
+CREATE TABLE IF NOT EXISTS provider_responses_part_p10 PARTITION OF provider_responses_part FOR VALUES WITH (MODULUS 16, REMAINDER 10);
+CREATE TABLE IF NOT EXISTS provider_responses_part_p11 PARTITION OF provider_responses_part FOR VALUES WITH (MODULUS 16, REMAINDER 11);
+CREATE TABLE IF NOT EXISTS provider_responses_part_p12 PARTITION OF provider_responses_part FOR VALUES WITH (MODULUS 16, REMAINDER 12);
+CREATE TABLE IF NOT EXISTS provider_responses_part_p13 PARTITION OF provider_responses_part FOR VALUES WITH (MODULUS 16, REMAINDER 13);
+CREATE TABLE IF NOT EXISTS provider_responses_part_p14 PARTITION OF provider_responses_part FOR VALUES WITH (MODULUS 16, REMAINDER 14);
+CREATE TABLE IF NOT EXISTS provider_responses_part_p15 PARTITION OF provider_responses_part FOR VALUES WITH (MODULUS 16, REMAINDER 15);
+
+DO $$
+BEGIN
+  IF NOT EXISTS (SELECT 1 FROM pg_constraint WHERE conrelid = 'provider_responses_part'::regclass AND contype = 'p') THEN
+    ALTER TABLE provider_responses_part ADD PRIMARY KEY (id, project_id);
+  END IF;
+END $$;
+DO $$
+BEGIN
+  IF NOT EXISTS (SELECT 1 FROM pg_constraint WHERE conname = 'provider_responses_part_fk_0') THEN
+    ALTER TABLE provider_responses_part ADD CONSTRAINT provider_responses_part_fk_0 FOREIGN KEY (requirement_id) REFERENCES rfq_items_master(id) ON DELETE CASCADE;
+  END IF;
+END $$;
+DO $$
+BEGIN
+  IF NOT EXISTS (SELECT 1 FROM pg_constraint WHERE conname = 'provider_responses_part_fk_1') THEN
+    ALTER TABLE provider_responses_part ADD CONSTRAINT provider_responses_part_fk_1 FOREIGN KEY (file_id) REFERENCES document_metadata(id) ON DELETE CASCADE;
+  END IF;
+END $$;
+DO $$
+BEGIN
+  IF NOT EXISTS (SELECT 1 FROM pg_constraint WHERE conname = 'provider_responses_part_fk_2') THEN
+    ALTER TABLE provider_responses_part ADD CONSTRAINT provider_responses_part_fk_2 FOREIGN KEY (project_id) REFERENCES projects(id) ON DELETE CASCADE;
+  END IF;
+END $$;
+CREATE UNIQUE INDEX IF NOT EXISTS provider_responses_part_unique_0 ON provider_responses_part (requirement_id, provider_name, project_id);
+CREATE INDEX IF NOT EXISTS provider_responses_part_idx_0 ON provider_responses_part (project_id, provider_name);
+CREATE INDEX IF NOT EXISTS provider_responses_part_idx_1 ON provider_responses_part (project_id, updated_at DESC);
+ALTER TABLE provider_responses_part ENABLE ROW LEVEL SECURITY;
+
+CREATE OR REPLACE FUNCTION sync_provider_responses_part()
+RETURNS TRIGGER
+LANGUAGE plpgsql
+SET search_path = desarrollo
+AS $$
+BEGIN
+  IF TG_OP IN ('UPDATE', 'DELETE') THEN
+    DELETE FROM provider_responses_part WHERE id = OLD.id;
+  END IF;
+  IF TG_OP IN ('INSERT', 'UPDATE') THEN
+    NEW.project_id := coalesce(NEW.project_id, (SELECT rim.project_id FROM rfq_items_master rim WHERE rim.id = NEW.requirement_id));
+    -- A row without a project cannot be routed; verify reports it
+    IF NEW.project_id IS NULL THEN
+      RETURN NULL;
+    END IF;
+    -- Never fail the application's write: a conflicting row shows up in verify
+    INSERT INTO provider_responses_part SELECT (NEW).* ON CONFLICT DO NOTHING;
+    IF NOT FOUND THEN
+      -- A copy batch committed this id first, possibly with the version before this write
+      -- (the INSERT above waited for it): the trigger's row is newer and replaces it.
+      DELETE FROM provider_responses_part WHERE id = NEW.id;
+      INSERT INTO provider_responses_part SELECT (NEW).* ON CONFLICT DO NOTHING;
+    END IF;
+  END IF;
+  RETURN NULL;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS trigger_provider_responses_sync_part ON provider_responses;
+CREATE TRIGGER trigger_provider_responses_sync_part
+    AFTER INSERT OR UPDATE OR DELETE ON provider_responses
+    FOR EACH ROW
+    EXECUTE FUNCTION sync_provider_responses_part();
+
+-- proposals: HASH (metadata->>'project_id'), 16 partitions
+CREATE TABLE IF NOT EXISTS proposals_part
+    (LIKE proposals INCLUDING DEFAULTS INCLUDING GENERATED INCLUDING STORAGE INCLUDING COMMENTS)
+    PARTITION BY HASH ((metadata->>'project_id'));
+
+CREATE TABLE IF NOT EXISTS proposals_part_p00 PARTITION OF proposals_part FOR VALUES WITH (MODULUS 16, REMAINDER 0);
+CREATE TABLE IF NOT EXISTS proposals_part_p01 PARTITION OF proposals_part FOR VALUES WITH (MODULUS 16, REMAINDER 1);
+CREATE TABLE IF NOT EXISTS proposals_part_p02 PARTITION OF proposals_part FOR VALUES WITH (MODULUS 16, REMAINDER 2);
+CREATE TABLE IF NOT EXISTS proposals_part_p03 PARTITION OF proposals_part FOR VALUES WITH (MODULUS 16, REMAINDER 3);
+CREATE TABLE IF NOT EXISTS proposals_part_p04 PARTITION OF proposals_part FOR VALUES WITH (MODULUS 16, REMAINDER 4);
+CREATE TABLE IF NOT EXISTS proposals_part_p05 PARTITION OF proposals_part FOR VALUES WITH (MODULUS 16, REMAINDER 5);
+CREATE TABLE IF NOT EXISTS proposals_part_p06 PARTITION OF proposals_part FOR VALUES WITH (MODULUS 16, REMAINDER 6);
+CREATE TABLE IF NOT EXISTS proposals_part_p07 PARTITION OF proposals_part FOR VALUES WITH (MODULUS 16, REMAINDER 7);
+CREATE TABLE IF NOT EXISTS proposals_part_p08 PARTITION OF proposals_part FOR VALUES WITH (MODULUS 16, REMAINDER 8);
+CREATE TABLE IF NOT EXISTS proposals_part_p09 PARTITION OF proposals_part FOR VALUES WITH (MODULUS 16, REMAINDER 9);
+CREATE TABLE IF NOT EXISTS proposals_part_p10 PARTITION OF proposals_part FOR VALUES WITH (MODULUS 16, REMAINDER 10);
+CREATE TABLE IF NOT EXISTS proposals_part_p11 PARTITION OF proposals_part FOR VALUES WITH (MODULUS 16, REMAINDER 11);
+CREATE TABLE IF NOT EXISTS proposals_part_p12 PARTITION OF proposals_part FOR VALUES WITH (MODULUS 16, REMAINDER 12);
+CREATE TABLE IF NOT EXISTS proposals_part_p13 PARTITION OF proposals_part FOR VALUES WITH (MODULUS 16, REMAINDER 13);
+CREATE TABLE IF NOT EXISTS proposals_part_p14 PARTITION OF proposals_part FOR VALUES WITH (MODULUS 16, REMAINDER 14);
+CREATE TABLE IF NOT EXISTS proposals_part_p15 PARTITION OF proposals_part FOR VALUES WITH (MODULUS 16, REMAINDER 15);
+
+DO $$
+DECLARE part RECORD;
+BEGIN
+  FOR part IN SELECT inhrelid::regclass AS rel FROM pg_inherits WHERE inhparent = 'proposals_part'::regclass LOOP
+    IF NOT EXISTS (SELECT 1 FROM pg_constraint WHERE conrelid = part.rel AND contype = 'p') THEN
+      EXECUTE format('ALTER TABLE %s ADD PRIMARY KEY (id)', part.rel);
+    END IF;
+  END LOOP;
+END $$;
+CREATE INDEX IF NOT EXISTS proposals_part_idx_0 ON proposals_part (id);
+CREATE INDEX IF NOT EXISTS proposals_part_idx_1 ON proposals_part ((metadata->>'project_id'));
+ALTER TABLE proposals_part ENABLE ROW LEVEL SECURITY;
+
+CREATE OR REPLACE FUNCTION sync_proposals_part()
+RETURNS TRIGGER
+LANGUAGE plpgsql
+SET search_path = desarrollo
+AS $$
+BEGIN
+  IF TG_OP IN ('UPDATE', 'DELETE') THEN
+    DELETE FROM proposals_part WHERE id = OLD.id;
+  END IF;
+  IF TG_OP IN ('INSERT', 'UPDATE') THEN
+    -- Never fail the application's write: a conflicting row shows up in verify
+    INSERT INTO proposals_part SELECT (NEW).* ON CONFLICT DO NOTHING;
+    IF NOT FOUND THEN
+      -- A copy batch committed this id first, possibly with the version before this write
+      -- (the INSERT above waited for it): the trigger's row is newer and replaces it.
+      DELETE FROM proposals_part WHERE id = NEW.id;
+      INSERT INTO proposals_part SELECT (NEW).* ON CONFLICT DO NOTHING;
+    END IF;
+  END IF;
+  RETURN NULL;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS trigger_proposals_sync_part ON proposals;
+CREATE TRIGGER trigger_proposals_sync_part
+    AFTER INSERT OR UPDATE OR DELETE ON proposals
+    FOR EACH ROW
+    EXECUTE FUNCTION sync_proposals_part();
@@ -0,0 +1,32 @@
+-- ============================================================
+-- V15: node_metrics for instrumented workflow builds
+-- Schema: desarrollo
+-- Written by the "perf insert node_metrics" node that
+-- `workflow_patch.py instrument` adds: one multi-row INSERT per
+-- execution with the wall time and item counts of every Code node
+-- and chainLlm node. Production builds (`--revert`) never write here.
+-- ============================================================
+
+SET search_path TO desarrollo;
+
+CREATE TABLE IF NOT EXISTS node_metrics (
+    id BIGSERIAL PRIMARY KEY,
+    execution_id TEXT NOT NULL,
+    workflow_id TEXT,
+    flow TEXT,
+    node_name TEXT NOT NULL,
+    kind TEXT NOT NULL CHECK (kind IN ('code', 'llm')),
+    run_index INT NOT NULL DEFAULT 0,
+    started_at TIMESTAMPTZ,
+    duration_ms DOUBLE PRECISION NOT NULL,
+    items_in INT,
+    items_out INT,
+    calls INT NOT NULL DEFAULT 1,
+    created_at TIMESTAMPTZ NOT NULL DEFAULT now()
+);
+
+-- Per-node percentiles over a time window, and one execution's breakdown
+CREATE INDEX IF NOT EXISTS idx_node_metrics_node_created
+    ON node_metrics(node_name, created_at DESC);
+CREATE INDEX IF NOT EXISTS idx_node_metrics_execution
+    ON node_metrics(execution_id);
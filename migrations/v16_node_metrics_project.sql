@@ -0,0 +1,18 @@
+-- ============================================================
+-- V16: project_id on node_metrics
+-- Schema: desarrollo
+-- The instrumented build's flush node tags every row with the
+-- project_id of the webhook request. llm_accounting.py report joins
+-- the accounting proxy's calls to the kind = 'llm' rows to attribute
+-- tokens and cost to flows and projects.
+-- ============================================================
+
+SET search_path TO desarrollo;
+
+ALTER TABLE node_metrics ADD COLUMN IF NOT EXISTS project_id TEXT;
+
+-- Call attribution looks up the LLM windows of a node by start time
+CREATE INDEX IF NOT EXISTS idx_node_metrics_llm_node_started
+    ON node_metrics(node_name, started_at) WHERE kind = 'llm';
+CREATE INDEX IF NOT EXISTS idx_node_metrics_project_created
+    ON node_metrics(project_id, created_at DESC);
@@ -0,0 +1,320 @@
+#!/usr/bin/env python3
+"""
+Benchmark de parametros de chunking para los tres divisores del workflow.
+
+Reproduce los tres chunkers de produccion:
+  - "Recursive Character Text Splitter"  (ofertas, 1200/200, embeddings)
+  - "Recursive Character Text Splitter1" (RFQ, 800/150, embeddings)
+  - "Dividir en Trozos1"                 (RFQ, 6000/400, extraccion LLM)
+
+Los tamanos se leen del propio workflow, asi que el benchmark sigue al JSON.
+Se ejecuta sobre el texto de demo-pdfs/ y sobre corpus sinteticos escalados
+(parrafos reales remuestreados con semilla fija) e informa numero de chunks,
+caracteres embebidos, redundancia por solape y tiempo estimado de
+embedding/LLM. Opcionalmente barre tamanos alternativos.
+
+Uso:
+    python scripts/perf/chunking_bench.py
+    python scripts/perf/chunking_bench.py --scales 1,10,100 --sweep 800:100,1000:200,1500:300
+    python scripts/perf/chunking_bench.py --json chunking.json
+"""
+
+import argparse
+import glob
+import os
+import random
+import re
+import sys
+
+from common import DEMO_PDFS_DIR, find_nodes, get_node, import_or_install, load_workflow, write_json
+
+OFFER_SPLITTER = "Recursive Character Text Splitter"
+RFQ_SPLITTER = "Recursive Character Text Splitter1"
+LLM_CHUNKER = "Dividir en Trozos1"
+
+# Estimaciones por defecto; se sobreescriben por CLI con valores medidos.
+DEFAULT_EMBED_CHARS_PER_SEC = 4000.0   # qwen3-embedding:8b en una GPU
+DEFAULT_LLM_SEC_PER_KCHAR = 2.0        # ~6000 chars -> 10-15 s (comentario del nodo)
+
+
+# ─── Splitters ────────────────────────────────────────────────────────────────
+
+class RecursiveCharacterTextSplitter:
+    """Port of the langchainjs splitter used by n8n's textSplitter node.
+
+    Defaults match the n8n node: separators ["\\n\\n", "\\n", " ", ""] and
+    keepSeparator=true, with the JS mergeSplits/joinDocs semantics.
+    """
+
+    def __init__(self, chunk_size=1000, chunk_overlap=200, separators=None, keep_separator=True):
+        if chunk_overlap >= chunk_size:
+            raise ValueError("chunk_overlap debe ser menor que chunk_size")
+        self.chunk_size = chunk_size
+        self.chunk_overlap = chunk_overlap
+        self.separators = separators or ["\n\n", "\n", " ", ""]
+        self.keep_separator = keep_separator
+
+    def split_text(self, text):
+        return self._split_text(text, self.separators)
+
+    def _split_on_separator(self, text, separator):
+        if separator:
+            if self.keep_separator:
+                splits = re.split(f"(?={re.escape(separator)})", text)
+            else:
+                splits = text.split(separator)
+        else:
+            splits = list(text)
+        return [s for s in splits if s != ""]
+
+    def _split_text(self, text, separators):
+        final_chunks = []
+        separator = separators[-1]
+        new_separators = None
+        for i, s in enumerate(separators):
+            if s == "":
+                separator = s
+                break
+            if s in text:
+                separator = s
+                new_separators = separators[i + 1:]
+                break
+
+        splits = self._split_on_separator(text, separator)
+        good_splits = []
+        merge_separator = "" if self.keep_separator else separator
+        for s in splits:
+            if len(s) < self.chunk_size:
+                good_splits.append(s)
+            else:
+                if good_splits:
+                    final_chunks.extend(self._merge_splits(good_splits, merge_separator))
+                    good_splits = []
+                if not new_separators:
+                    final_chunks.append(s)
+                else:
+                    final_chunks.extend(self._split_text(s, new_separators))
+        if good_splits:
+            final_chunks.extend(self._merge_splits(good_splits, merge_separator))
+        return final_chunks
+
+    def _merge_splits(self, splits, separator):
+        docs = []
+        current = []
+        total = 0
+        for d in splits:
+            length = len(d)
+            if total + length + len(current) * len(separator) > self.chunk_size:
+                if current:
+                    doc = self._join_docs(current, separator)
+                    if doc is not None:
+                        docs.append(doc)
+                    while total > self.chunk_overlap or (
+                        total + length + len(current) * len(separator) > self.chunk_size and total > 0
+                    ):
+                        total -= len(current[0])
+                        current.pop(0)
+            current.append(d)
+            total += length
+        doc = self._join_docs(current, separator)
+        if doc is not None:
+            docs.append(doc)
+        return docs
+
+    @staticmethod
+    def _join_docs(docs, separator):
+        # joinDocs: docs.join(separator).trim(), so kept separators do not lead a chunk
+        text = separator.join(docs).strip()
+        return text or None
+
+
+def fixed_window_chunks(text, chunk_size=6000, overlap=400):
+    """Python port of the "Dividir en Trozos1" Code node."""
+    if len(text) <= chunk_size:
+        return [text]
+    chunks = []
+    start = 0
+    while start < len(text):
+        chunks.append(text[start:start + chunk_size])
+        start += chunk_size - overlap
+        if start >= len(text):
+            break
+    return chunks
+
+
+def _parse_dividir_params(js_code):
+    size = re.search(r"const chunkSize = (\d+);", js_code)
+    overlap = re.search(r"const overlap = (\d+);", js_code)
+    if not size or not overlap:
+        raise ValueError(f"No se pudieron leer chunkSize/overlap de '{LLM_CHUNKER}'")
+    return int(size.group(1)), int(overlap.group(1))
+
+
+def load_chunkers(workflow):
+    """Build the three production chunkers from the workflow parameters."""
+    chunkers = []
+    for name, role in ((OFFER_SPLITTER, "ofertas -> proposals"), (RFQ_SPLITTER, "rfq -> rfq")):
+        params = get_node(workflow, name)['parameters']
+        splitter = RecursiveCharacterTextSplitter(params['chunkSize'], params['chunkOverlap'])
+        chunkers.append({
+            "name": name,
+            "role": role,
+            "kind": "embedding",
+            "chunk_size": splitter.chunk_size,
+            "chunk_overlap": splitter.chunk_overlap,
+            "split": splitter.split_text,
+        })
+    size, overlap = _parse_dividir_params(get_node(workflow, LLM_CHUNKER)['parameters']['jsCode'])
+    chunkers.append({
+        "name": LLM_CHUNKER,
+        "role": "rfq -> extraccion LLM",
+        "kind": "llm",
+        "chunk_size": size,
+        "chunk_overlap": overlap,
+        "split": lambda text, s=size, o=overlap: fixed_window_chunks(text, s, o),
+    })
+    return chunkers
+
+
+# ─── Corpus ───────────────────────────────────────────────────────────────────
+
+def extract_pdf_text(path):
+    """Extract text page by page, joined like n8n's extractFromFile node."""
+    reader = import_or_install("pypdf").PdfReader(path)
+    return "\n\n".join((page.extract_text() or "") for page in reader.pages)
+
+
+def load_demo_corpus(root=DEMO_PDFS_DIR):
+    docs = []
+    for path in sorted(glob.glob(os.path.join(root, "**", "*.pdf"), recursive=True)):
+        docs.append((os.path.relpath(path, root), extract_pdf_text(path)))
+    return docs
+
+
+def synthetic_corpus(docs, scale, seed=42):
+    """Resample real paragraphs into ``scale`` times as many documents.
+
+    Each synthetic document keeps the paragraph-length distribution of the
+    source it was drawn from, so separator statistics stay realistic.
+    """
+    rng = random.Random(seed)
+    paragraphs = [p for _, text in docs for p in text.split("\n\n") if p.strip()]
+    sizes = [len(text) for _, text in docs]
+    out = []
+    for i in range(int(len(docs) * scale)):
+        target = sizes[i % len(sizes)]
+        parts = []
+        total = 0
+        while total < target:
+            p = rng.choice(paragraphs)
+            parts.append(p)
+            total += len(p) + 2
+        out.append((f"synthetic/{i:05d}", "\n\n".join(parts)))
+    return out
+
+
+# ─── Metrics ──────────────────────────────────────────────────────────────────
+
+def measure(chunker, docs, embed_chars_per_sec, llm_sec_per_kchar):
+    source_chars = 0
+    chunk_count = 0
+    chunk_chars = 0
+    for _, text in docs:
+        chunks = chunker["split"](text)
+        source_chars += len(text)
+        chunk_count += len(chunks)
+        chunk_chars += sum(len(c) for c in chunks)
+    redundancy = (chunk_chars / source_chars - 1.0) if source_chars else 0.0
+    if chunker["kind"] == "embedding":
+        est_seconds = chunk_chars / embed_chars_per_sec
+    else:
+        est_seconds = chunk_chars / 1000.0 * llm_sec_per_kchar
+    return {
+        "chunker": chunker["name"],
+        "kind": chunker["kind"],
+        "chunk_size": chunker["chunk_size"],
+        "chunk_overlap": chunker["chunk_overlap"],
+        "documents": len(docs),
+        "source_chars": source_chars,
+        "chunks": chunk_count,
+        "embedded_chars": chunk_chars,
+        "avg_chunk_chars": chunk_chars / chunk_count if chunk_count else 0.0,
+        "overlap_redundancy": redundancy,
+        "est_tokens": chunk_chars // 4,
+        "est_seconds": est_seconds,
+    }
+
+
+def sweep_chunkers(spec):
+    """Parse '800:100,1000:200' into extra recursive splitters."""
+    chunkers = []
+    for item in filter(None, spec.split(",")):
+        size, overlap = (int(x) for x in item.split(":"))
+        splitter = RecursiveCharacterTextSplitter(size, overlap)
+        chunkers.append({
+            "name": f"sweep {size}/{overlap}",
+            "role": "alternativa",
+            "kind": "embedding",
+            "chunk_size": size,
+            "chunk_overlap": overlap,
+            "split": splitter.split_text,
+        })
+    return chunkers
+
+
+def print_table(corpus_name, results):
+    print(f"\n--- Corpus: {corpus_name} ---")
+    print(f"  {'Chunker':38s} {'Size/Ovl':>10s} {'Chunks':>8s} {'Chars emb.':>12s} "
+          f"{'Redund.':>8s} {'Est. s':>9s}")
+    for r in results:
+        print(f"  {r['chunker']:38s} {r['chunk_size']:>5d}/{r['chunk_overlap']:<4d} {r['chunks']:>8d} "
+              f"{r['embedded_chars']:>12d} {r['overlap_redundancy']*100:>7.1f}% {r['est_seconds']:>9.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de los chunkers del workflow")
+    parser.add_argument("--corpus", default=DEMO_PDFS_DIR, help="Directorio con PDFs (por defecto demo-pdfs/)")
+    parser.add_argument("--scales", default="1,10", help="Factores de escala del corpus sintetico")
+    parser.add_argument("--sweep", default="", help="Tamanos alternativos size:overlap separados por comas")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--embed-chars-per-sec", type=float, default=DEFAULT_EMBED_CHARS_PER_SEC)
+    parser.add_argument("--llm-sec-per-kchar", type=float, default=DEFAULT_LLM_SEC_PER_KCHAR)
+    parser.add_argument("--json", help="Guardar resultados en JSON")
+    args = parser.parse_args()
+
+    workflow = load_workflow()
+    chunkers = load_chunkers(workflow) + sweep_chunkers(args.sweep)
+
+    print("=" * 60)
+    print("BENCHMARK DE CHUNKING - BidEval")
+    print("=" * 60)
+    for c in chunkers[:3]:
+        print(f"  {c['name']:38s} {c['chunk_size']}/{c['chunk_overlap']}  ({c['role']})")
+    n_splitters = len(find_nodes(workflow, "textSplitterRecursiveCharacterTextSplitter"))
+    if n_splitters != 2:
+        print(f"  AVISO: el workflow tiene {n_splitters} text splitters (esperados 2)")
+
+    docs = load_demo_corpus(args.corpus)
+    if not docs:
+        print(f"No se encontraron PDFs en {args.corpus}")
+        sys.exit(1)
+
+    corpora = [("demo-pdfs", docs)]
+    for scale in (float(s) for s in args.scales.split(",") if s):
+        if scale == 1:
+            continue
+        corpora.append((f"sintetico x{scale:g}", synthetic_corpus(docs, scale, args.seed)))
+
+    report = {"corpora": {}}
+    for corpus_name, corpus_docs in corpora:
+        results = [measure(c, corpus_docs, args.embed_chars_per_sec, args.llm_sec_per_kchar) for c in chunkers]
+        print_table(corpus_name, results)
+        report["corpora"][corpus_name] = results
+
+    if args.json:
+        write_json(args.json, report)
+        print(f"\nResultados guardados en {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""
+Utilidades compartidas por las herramientas de rendimiento de BidEval.
+
+Carga del workflow n8n de produccion, busqueda de nodos, estadisticas
+basicas (percentiles) para los informes de benchmark y distribuciones de
+latencia para los servicios simulados.
+"""
+
+import importlib
+import json
+import math
+import os
+import random
+import subprocess
+import sys
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+WORKFLOW_PATH = os.path.join(REPO_ROOT, "workflow n8n", "Workflow-produccion.json")
+DEMO_PDFS_DIR = os.path.join(REPO_ROOT, "demo-pdfs")
+
+
+def import_or_install(module, pip_name=None):
+    """Import ``module``, installing ``pip_name`` on the fly if missing."""
+    try:
+        return importlib.import_module(module)
+    except ImportError:
+        subprocess.check_call([sys.executable, "-m", "pip", "install", pip_name or module])
+        return importlib.import_module(module)
+
+
+def load_workflow(path=WORKFLOW_PATH):
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def find_nodes(workflow, node_type=None):
+    """Return nodes whose type ends with ``node_type`` (e.g. 'supabase')."""
+    if node_type is None:
+        return list(workflow['nodes'])
+    return [n for n in workflow['nodes'] if n['type'].split('.')[-1] == node_type]
+
+
+def get_node(workflow, name):
+    for node in workflow['nodes']:
+        if node['name'] == name:
+            return node
+    raise KeyError(f"Nodo '{name}' no encontrado en el workflow")
+
+
+def percentile(values, q):
+    """Linear-interpolated percentile, ``q`` in [0, 100]."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    if len(ordered) == 1:
+        return float(ordered[0])
+    pos = (len(ordered) - 1) * q / 100.0
+    lo = math.floor(pos)
+    hi = math.ceil(pos)
+    if lo == hi:
+        return float(ordered[lo])
+    return ordered[lo] + (ordered[hi] - ordered[lo]) * (pos - lo)
+
+
+def summarize(values):
+    """Count/mean/p50/p95/p99/max summary used by every report."""
+    if not values:
+        return {"count": 0, "mean": 0.0, "p50": 0.0, "p95": 0.0, "p99": 0.0, "max": 0.0}
+    return {
+        "count": len(values),
+        "mean": sum(values) / len(values),
+        "p50": percentile(values, 50),
+        "p95": percentile(values, 95),
+        "p99": percentile(values, 99),
+        "max": float(max(values)),
+    }
+
+
+def write_json(path, data):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=2, ensure_ascii=False)
+        f.write('\n')
+
+
+def estimate_tokens(text):
+    """Rough token count (~4 chars/token), same rule as the workflow comments."""
+    return max(1, len(text) // 4) if text else 0
+
+
+def parse_latency(spec):
+    """Parse a latency spec into a sampler returning seconds.
+
+    Formats (milliseconds): ``fixed:200``, ``uniform:100:400``,
+    ``normal:300:50`` (mean, sd) and ``lognormal:300:0.5`` (median, sigma).
+    """
+    kind, *params = spec.split(":")
+    values = [float(p) for p in params]
+    if kind == "fixed" and len(values) == 1:
+        return lambda rng=random: values[0] / 1000.0
+    if kind == "uniform" and len(values) == 2:
+        return lambda rng=random: rng.uniform(values[0], values[1]) / 1000.0
+    if kind == "normal" and len(values) == 2:
+        return lambda rng=random: max(0.0, rng.gauss(values[0], values[1])) / 1000.0
+    if kind == "lognormal" and len(values) == 2:
+        mu = math.log(values[0]) if values[0] > 0 else 0.0
+        return lambda rng=random: rng.lognormvariate(mu, values[1]) / 1000.0
+    raise ValueError(f"Especificacion de latencia no valida: '{spec}'")
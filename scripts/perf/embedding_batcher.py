@@ -0,0 +1,330 @@
+#!/usr/bin/env python3
+"""
+Proxy asyncio que agrupa peticiones de embeddings de Ollama en micro-lotes.
+
+Los cuatro nodos embeddingsOllama del workflow ("Embeddings Ollama",
+"Embeddings Ollama1", "Embeddings Ollama3", "Embeddings Ollama5") envian
+lotes pequenos por documento. Este proxy acepta peticiones concurrentes de
+todos ellos, las agrupa por modelo y opciones (truncate, dimensions, options,
+keep_alive) en micro-lotes (tamano maximo + ventana de latencia maxima), envia
+un unico /api/embed a Ollama por lote con esas opciones y reparte los
+vectores a cada peticion original. /metrics expone rendimiento y latencias.
+
+Puede encadenarse con embedding_cache.py (n8n -> batcher -> cache -> Ollama).
+
+Uso:
+    python scripts/perf/embedding_batcher.py --upstream http://localhost:11434 --max-batch 64 --max-wait-ms 20
+    python scripts/perf/embedding_batcher.py --bench --requests 2000 --concurrency 64
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import time
+from collections import deque
+
+from common import import_or_install, summarize
+
+aiohttp = import_or_install("aiohttp")
+web = import_or_install("aiohttp.web", "aiohttp")
+
+LATENCY_WINDOW = 10_000
+# Request fields that are not forwarded as batch options
+NOT_OPTIONS = {"model", "input", "prompt", "stream"}
+
+
+class UpstreamError(Exception):
+    """Upstream failed in a way that is not an aiohttp.ClientError; answered with 502."""
+
+
+class IncompleteBatch(UpstreamError):
+    """Upstream answered with fewer vectors than texts in the batch."""
+
+
+def upstream_error(e):
+    """Timeouts and malformed upstream bodies become UpstreamError; anything else is kept."""
+    if isinstance(e, asyncio.TimeoutError):
+        return UpstreamError("Ollama no respondio a tiempo")
+    if isinstance(e, (KeyError, TypeError, ValueError)):
+        return UpstreamError(f"respuesta de Ollama no valida: {e!r}")
+    return e
+
+
+def request_options(payload):
+    return {k: v for k, v in payload.items() if k not in NOT_OPTIONS}
+
+
+class BatcherMetrics:
+    def __init__(self):
+        self.started = time.monotonic()
+        self.requests = 0
+        self.texts = 0
+        self.batches = 0
+        self.errors = 0
+        self.batch_sizes = deque(maxlen=LATENCY_WINDOW)
+        self.queue_wait_ms = deque(maxlen=LATENCY_WINDOW)
+        self.upstream_ms = deque(maxlen=LATENCY_WINDOW)
+        self.request_ms = deque(maxlen=LATENCY_WINDOW)
+
+    def snapshot(self):
+        elapsed = time.monotonic() - self.started
+        return {
+            "uptime_s": elapsed,
+            "requests": self.requests,
+            "texts": self.texts,
+            "batches": self.batches,
+            "errors": self.errors,
+            "texts_per_sec": self.texts / elapsed if elapsed else 0.0,
+            "avg_batch_size": sum(self.batch_sizes) / len(self.batch_sizes) if self.batch_sizes else 0.0,
+            "batch_size": summarize(list(self.batch_sizes)),
+            "queue_wait_ms": summarize(list(self.queue_wait_ms)),
+            "upstream_ms": summarize(list(self.upstream_ms)),
+            "request_ms": summarize(list(self.request_ms)),
+        }
+
+
+class EmbeddingBatcher:
+    """Coalesces individual texts into micro-batches per model and options.
+
+    ``upstream`` is an async callable ``(model, texts, options) -> vectors``;
+    the HTTP client below is the production one, tests pass a stub coroutine.
+    Only requests with identical options share a batch.
+    """
+
+    def __init__(self, upstream, max_batch=64, max_wait_ms=20, max_inflight=2, metrics=None):
+        self.upstream = upstream
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000.0
+        self.inflight = asyncio.Semaphore(max_inflight)
+        self.metrics = metrics or BatcherMetrics()
+        self._queues = {}
+        self._workers = {}
+        # The loop only keeps weak references to tasks; hold in-flight flushes here
+        self._flushes = set()
+
+    def _queue_for(self, model, options):
+        key = (model, json.dumps(options, sort_keys=True))
+        if key not in self._queues:
+            self._queues[key] = asyncio.Queue()
+            self._workers[key] = asyncio.create_task(self._worker(key, model, options))
+        return self._queues[key]
+
+    async def embed(self, model, texts, options=None):
+        loop = asyncio.get_running_loop()
+        queue = self._queue_for(model, options or {})
+        futures = []
+        for text in texts:
+            fut = loop.create_future()
+            queue.put_nowait((text, fut, time.monotonic()))
+            futures.append(fut)
+        return await asyncio.gather(*futures)
+
+    async def _worker(self, key, model, options):
+        queue = self._queues[key]
+        while True:
+            batch = [await queue.get()]
+            deadline = time.monotonic() + self.max_wait
+            while len(batch) < self.max_batch:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            await self.inflight.acquire()
+            task = asyncio.create_task(self._flush(model, options, batch))
+            self._flushes.add(task)
+            task.add_done_callback(self._flushes.discard)
+
+    async def _flush(self, model, options, batch):
+        try:
+            now = time.monotonic()
+            for _, _, enqueued in batch:
+                self.metrics.queue_wait_ms.append((now - enqueued) * 1000)
+            self.metrics.batches += 1
+            self.metrics.batch_sizes.append(len(batch))
+            try:
+                vectors = await self.upstream(model, [text for text, _, _ in batch], options)
+                if not isinstance(vectors, list):
+                    raise TypeError(f"embeddings es {type(vectors).__name__}")
+            except Exception as e:
+                self.metrics.errors += 1
+                error = upstream_error(e)
+                for _, fut, _ in batch:
+                    if not fut.done():
+                        fut.set_exception(error)
+                return
+            self.metrics.upstream_ms.append((time.monotonic() - now) * 1000)
+            if len(vectors) != len(batch):
+                self.metrics.errors += 1
+            missing = IncompleteBatch(f"Ollama devolvio {len(vectors)} vectores para {len(batch)} textos")
+            for i, (_, fut, _) in enumerate(batch):
+                if fut.done():
+                    continue
+                if i < len(vectors):
+                    fut.set_result(vectors[i])
+                else:
+                    fut.set_exception(missing)
+        finally:
+            self.inflight.release()
+
+    async def close(self):
+        for task in self._workers.values():
+            task.cancel()
+
+
+def http_upstream(session, base_url):
+    async def call(model, texts, options):
+        payload = {**options, "model": model, "input": texts}
+        async with session.post(f"{base_url}/api/embed", json=payload) as resp:
+            resp.raise_for_status()
+            return (await resp.json())["embeddings"]
+    return call
+
+
+def build_app(batcher, upstream_url=None):
+    async def embed_texts(request, field):
+        """((payload, vectors), None) on success, (None, error response) otherwise."""
+        try:
+            payload = await request.json()
+        except ValueError:
+            return None, web.json_response({"error": "JSON invalido"}, status=400)
+        if not isinstance(payload, dict) or not payload.get("model"):
+            return None, web.json_response({"error": "falta model"}, status=400)
+        inputs = payload.get(field, "")
+        texts = [inputs] if isinstance(inputs, str) else list(inputs)
+        try:
+            vectors = await batcher.embed(payload["model"], texts, request_options(payload))
+        except aiohttp.ClientResponseError as e:
+            return None, web.json_response({"error": e.message}, status=e.status)
+        except aiohttp.ClientError as e:
+            return None, web.json_response({"error": f"Ollama no disponible: {e}"}, status=502)
+        except UpstreamError as e:
+            return None, web.json_response({"error": str(e)}, status=502)
+        batcher.metrics.requests += 1
+        batcher.metrics.texts += len(texts)
+        return (payload, vectors), None
+
+    async def embed(request):
+        started = time.monotonic()
+        result, error = await embed_texts(request, "input")
+        if error is not None:
+            return error
+        payload, vectors = result
+        batcher.metrics.request_ms.append((time.monotonic() - started) * 1000)
+        return web.json_response({"model": payload["model"], "embeddings": vectors})
+
+    async def embeddings_legacy(request):
+        started = time.monotonic()
+        result, error = await embed_texts(request, "prompt")
+        if error is not None:
+            return error
+        _, vectors = result
+        batcher.metrics.request_ms.append((time.monotonic() - started) * 1000)
+        return web.json_response({"embedding": vectors[0]})
+
+    async def metrics(request):
+        return web.json_response(batcher.metrics.snapshot())
+
+    async def passthrough(request):
+        session = request.app["session"]
+        async with session.request(request.method, upstream_url + request.path_qs,
+                                   data=await request.read(), headers={"Content-Type": request.content_type}) as resp:
+            return web.Response(body=await resp.read(), status=resp.status, content_type=resp.content_type)
+
+    app = web.Application(client_max_size=64 * 1024 ** 2)
+    app.router.add_post("/api/embed", embed)
+    app.router.add_post("/api/embeddings", embeddings_legacy)
+    app.router.add_get("/metrics", metrics)
+    if upstream_url:
+        app.router.add_route("*", "/{tail:.*}", passthrough)
+    return app
+
+
+# ─── Bench (stub Ollama) ──────────────────────────────────────────────────────
+
+def stub_upstream(base_ms=30.0, per_text_ms=1.5, dim=8):
+    """Stub with the cost shape of a GPU embedding model: fixed + per-text."""
+    async def call(model, texts, options):
+        await asyncio.sleep((base_ms + per_text_ms * len(texts)) / 1000.0)
+        return [[float(len(t))] * dim for t in texts]
+    return call
+
+
+async def run_bench(args):
+    async def drive(batcher):
+        sem = asyncio.Semaphore(args.concurrency)
+
+        async def one(i):
+            async with sem:
+                texts = [f"chunk {i}-{j}" for j in range(random.randint(1, args.max_texts))]
+                vectors = await batcher.embed("qwen3-embedding:8b", texts)
+                assert len(vectors) == len(texts)
+                batcher.metrics.requests += 1
+                batcher.metrics.texts += len(texts)
+
+        started = time.monotonic()
+        await asyncio.gather(*(one(i) for i in range(args.requests)))
+        return time.monotonic() - started
+
+    random.seed(args.seed)
+    unbatched = EmbeddingBatcher(stub_upstream(), max_batch=1, max_wait_ms=0, max_inflight=args.max_inflight)
+    t_unbatched = await drive(unbatched)
+    await unbatched.close()
+
+    random.seed(args.seed)
+    batched = EmbeddingBatcher(stub_upstream(), args.max_batch, args.max_wait_ms, args.max_inflight)
+    t_batched = await drive(batched)
+    await batched.close()
+
+    snap = batched.metrics.snapshot()
+    print(f"Sin batching: {t_unbatched:7.2f} s  ({unbatched.metrics.batches} llamadas)")
+    print(f"Con batching: {t_batched:7.2f} s  ({batched.metrics.batches} llamadas, "
+          f"lote medio {snap['avg_batch_size']:.1f})")
+    print(f"Speedup: {t_unbatched / t_batched:.2f}x  |  espera en cola p95 {snap['queue_wait_ms']['p95']:.1f} ms")
+
+
+async def serve(args):
+    async with aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=600)) as session:
+        batcher = EmbeddingBatcher(http_upstream(session, args.upstream.rstrip("/")),
+                                   args.max_batch, args.max_wait_ms, args.max_inflight)
+        app = build_app(batcher, args.upstream.rstrip("/"))
+        app["session"] = session
+        runner = web.AppRunner(app)
+        await runner.setup()
+        await web.TCPSite(runner, args.host, args.port).start()
+        print(f"Batcher de embeddings en http://{args.host}:{args.port} -> {args.upstream}")
+        print(f"  max_batch={args.max_batch} max_wait_ms={args.max_wait_ms} max_inflight={args.max_inflight}")
+        try:
+            await asyncio.Event().wait()
+        finally:
+            await batcher.close()
+            await runner.cleanup()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Proxy de micro-batching para embeddings Ollama")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=11436)
+    parser.add_argument("--upstream", default=os.environ.get("OLLAMA_URL", "http://localhost:11434"))
+    parser.add_argument("--max-batch", type=int, default=64)
+    parser.add_argument("--max-wait-ms", type=float, default=20.0)
+    parser.add_argument("--max-inflight", type=int, default=2, help="Lotes simultaneos hacia Ollama")
+    parser.add_argument("--bench", action="store_true", help="Comparar con/sin batching contra un Ollama simulado")
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--max-texts", type=int, default=4, help="Textos maximos por peticion en --bench")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    try:
+        asyncio.run(run_bench(args) if args.bench else serve(args))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,344 @@
+#!/usr/bin/env python3
+"""
+Proxy de embeddings con cache por hash de contenido (API de Ollama).
+
+Los flujos de ingesta ("Delete Old Doc Rows" + "Embeddings Ollama3" para
+ofertas, "Delete Old Doc Rows1" + "Embeddings Ollama1" para RFQ) re-embeben
+todos los chunks en cada re-subida. Este proxy se coloca delante de Ollama:
+la clave es sha256(modelo + opciones + texto normalizado) y los vectores se guardan en
+un fichero mapeado en memoria con expulsion LRU, de modo que los chunks sin
+cambios no pasan por qwen3-embedding:8b.
+
+Solo hay que cambiar la Base URL de la credencial Ollama en n8n a
+http://<host>:11435. Se sirven /api/embed (cliente actual) y /api/embeddings
+(cliente antiguo); cualquier otra ruta se reenvia tal cual a Ollama.
+
+Uso:
+    python scripts/perf/embedding_cache.py --upstream http://localhost:11434 \\
+        --cache-file /var/cache/bideval/embeddings.bin --capacity 200000 --dim 4096
+"""
+
+import argparse
+import hashlib
+import json
+import mmap
+import os
+import struct
+import threading
+import unicodedata
+import urllib.error
+import urllib.request
+from array import array
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+MAGIC = b"BEVEC001"
+HEADER = struct.Struct("<8sII")  # magic, dim, capacity
+HEADER_SIZE = 64
+DIGEST_SIZE = 32
+TICK = struct.Struct("<Q")
+# Request fields that do not change the vector: never part of the cache key
+KEY_IGNORED = {"model", "input", "prompt", "keep_alive", "stream"}
+
+
+def normalize_text(text):
+    """NFC + collapsed whitespace, so re-extracted PDFs hash the same."""
+    return " ".join(unicodedata.normalize("NFC", text).split())
+
+
+def request_options(payload):
+    """Canonical JSON of the fields that affect the vector (truncate, dimensions, options...)."""
+    options = {k: v for k, v in payload.items() if k not in KEY_IGNORED}
+    return json.dumps(options, sort_keys=True, separators=(",", ":"))
+
+
+def cache_key(model, text, options="{}"):
+    h = hashlib.sha256()
+    h.update(model.encode("utf-8"))
+    h.update(b"\0")
+    h.update(options.encode("utf-8"))
+    h.update(b"\0")
+    h.update(normalize_text(text).encode("utf-8"))
+    return h.digest()
+
+
+class MmapVectorCache:
+    """Fixed-slot float32 vector store on a memory-mapped file.
+
+    Slot layout: 32-byte key digest, 8-byte access tick, ``dim`` float32.
+    The in-memory index (digest -> slot) is rebuilt from the file on open,
+    ordered by tick, so LRU order survives restarts.
+    """
+
+    def __init__(self, path, dim, capacity):
+        self.path = path
+        self.dim = dim
+        self.capacity = capacity
+        self.slot_size = DIGEST_SIZE + TICK.size + dim * 4
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.skipped = 0
+
+        size = HEADER_SIZE + self.slot_size * capacity
+        exists = os.path.exists(path) and os.path.getsize(path) > 0
+        self._file = open(path, "r+b" if exists else "w+b")
+        if exists:
+            magic, file_dim, file_capacity = HEADER.unpack_from(self._file.read(HEADER.size))
+            if magic != MAGIC or file_dim != dim or file_capacity != capacity:
+                self._file.close()
+                raise ValueError(
+                    f"{path}: cabecera incompatible (dim={file_dim}, capacity={file_capacity}); "
+                    "usa otro fichero o borra el existente"
+                )
+        else:
+            self._file.truncate(size)
+            self._file.write(HEADER.pack(MAGIC, dim, capacity))
+            self._file.flush()
+        self._mm = mmap.mmap(self._file.fileno(), size)
+
+        self._index = OrderedDict()
+        self._free = []
+        self._tick = 0
+        self._load_index()
+
+    def _offset(self, slot):
+        return HEADER_SIZE + slot * self.slot_size
+
+    def _load_index(self):
+        empty = bytes(DIGEST_SIZE)
+        used = []
+        for slot in range(self.capacity):
+            off = self._offset(slot)
+            digest = self._mm[off:off + DIGEST_SIZE]
+            if digest == empty:
+                self._free.append(slot)
+                continue
+            (tick,) = TICK.unpack_from(self._mm, off + DIGEST_SIZE)
+            used.append((tick, digest, slot))
+        used.sort()
+        for tick, digest, slot in used:
+            self._index[digest] = slot
+            self._tick = max(self._tick, tick)
+        self._free.reverse()
+
+    def _touch(self, slot):
+        self._tick += 1
+        TICK.pack_into(self._mm, self._offset(slot) + DIGEST_SIZE, self._tick)
+
+    def get(self, digest):
+        with self.lock:
+            slot = self._index.get(digest)
+            if slot is None:
+                self.misses += 1
+                return None
+            self._index.move_to_end(digest)
+            self._touch(slot)
+            self.hits += 1
+            off = self._offset(slot) + DIGEST_SIZE + TICK.size
+            vec = array("f")
+            vec.frombytes(self._mm[off:off + self.dim * 4])
+            return vec.tolist()
+
+    def put(self, digest, vector):
+        """Store ``vector``; False (nothing stored) if its dimension is not the cache's."""
+        with self.lock:
+            if len(vector) != self.dim:
+                self.skipped += 1
+                return False
+            slot = self._index.get(digest)
+            if slot is None:
+                if self._free:
+                    slot = self._free.pop()
+                else:
+                    _, slot = self._index.popitem(last=False)
+                    self.evictions += 1
+                self._index[digest] = slot
+            else:
+                self._index.move_to_end(digest)
+            # Digest last: a crash mid-write leaves an empty slot, never a valid key on stale data
+            off = self._offset(slot)
+            self._mm[off:off + DIGEST_SIZE] = bytes(DIGEST_SIZE)
+            data_off = off + DIGEST_SIZE + TICK.size
+            self._mm[data_off:data_off + self.dim * 4] = array("f", vector).tobytes()
+            self._touch(slot)
+            self._mm[off:off + DIGEST_SIZE] = digest
+            return True
+
+    def stats(self):
+        with self.lock:
+            total = self.hits + self.misses
+            return {
+                "entries": len(self._index),
+                "capacity": self.capacity,
+                "dim": self.dim,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0,
+                "evictions": self.evictions,
+                "skipped": self.skipped,
+            }
+
+    def close(self):
+        self._mm.flush()
+        self._mm.close()
+        self._file.close()
+
+
+class UpstreamError(Exception):
+    """Ollama answered, but not with the vectors that were asked for."""
+
+
+class EmbeddingCacheProxy:
+    """Resolves embedding requests against the cache, batching misses upstream."""
+
+    def __init__(self, cache, upstream, timeout=300):
+        self.cache = cache
+        self.upstream = upstream.rstrip("/")
+        self.timeout = timeout
+
+    def _post_upstream(self, path, payload):
+        req = urllib.request.Request(
+            self.upstream + path,
+            data=json.dumps(payload).encode("utf-8"),
+            headers={"Content-Type": "application/json"},
+            method="POST",
+        )
+        with urllib.request.urlopen(req, timeout=self.timeout) as resp:
+            body = resp.read()
+        try:
+            return json.loads(body)
+        except ValueError as e:
+            raise UpstreamError(f"Respuesta de Ollama no valida: {e}") from None
+
+    def embed(self, payload):
+        """Handle /api/embed: ``input`` may be a string or a list of strings."""
+        model = payload["model"]
+        inputs = payload.get("input", "")
+        texts = [inputs] if isinstance(inputs, str) else list(inputs)
+        options = request_options(payload)
+        digests = [cache_key(model, t, options) for t in texts]
+        vectors = [self.cache.get(d) for d in digests]
+
+        missing = [i for i, v in enumerate(vectors) if v is None]
+        upstream_resp = {}
+        if missing:
+            upstream_payload = dict(payload, input=[texts[i] for i in missing])
+            upstream_resp = self._post_upstream("/api/embed", upstream_payload)
+            embeddings = upstream_resp.get("embeddings")
+            if not isinstance(embeddings, list) or len(embeddings) != len(missing):
+                raise UpstreamError(f"Ollama devolvio {len(embeddings or [])} vectores para {len(missing)} textos")
+            # A vector of another dimension (e.g. a "dimensions" option) is passed through uncached
+            for i, vec in zip(missing, embeddings):
+                vectors[i] = vec
+                self.cache.put(digests[i], vec)
+
+        return {
+            "model": model,
+            "embeddings": vectors,
+            "total_duration": upstream_resp.get("total_duration", 0),
+            "load_duration": upstream_resp.get("load_duration", 0),
+            "prompt_eval_count": upstream_resp.get("prompt_eval_count", 0),
+        }
+
+    def embeddings_legacy(self, payload):
+        """Handle the legacy /api/embeddings endpoint (single ``prompt``)."""
+        model = payload["model"]
+        digest = cache_key(model, payload.get("prompt", ""), request_options(payload))
+        vec = self.cache.get(digest)
+        if vec is None:
+            vec = self._post_upstream("/api/embeddings", payload).get("embedding")
+            if not isinstance(vec, list):
+                raise UpstreamError("Ollama no devolvio ningun vector")
+            self.cache.put(digest, vec)
+        return {"embedding": vec}
+
+
+def make_handler(proxy):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def _send_json(self, status, body):
+            data = json.dumps(body).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def _passthrough(self, body=None):
+            req = urllib.request.Request(
+                proxy.upstream + self.path,
+                data=body,
+                headers={"Content-Type": self.headers.get("Content-Type", "application/json")},
+                method=self.command,
+            )
+            try:
+                with urllib.request.urlopen(req, timeout=proxy.timeout) as resp:
+                    status, data, ctype = resp.status, resp.read(), resp.headers.get("Content-Type")
+            except urllib.error.HTTPError as e:
+                status, data, ctype = e.code, e.read(), e.headers.get("Content-Type")
+            self.send_response(status)
+            self.send_header("Content-Type", ctype or "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_GET(self):
+            if self.path == "/cache/stats":
+                self._send_json(200, proxy.cache.stats())
+            else:
+                self._passthrough()
+
+        def do_POST(self):
+            body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            handlers = {"/api/embed": proxy.embed, "/api/embeddings": proxy.embeddings_legacy}
+            handler = handlers.get(self.path)
+            if handler is None:
+                self._passthrough(body)
+                return
+            try:
+                self._send_json(200, handler(json.loads(body)))
+            except urllib.error.HTTPError as e:
+                self._send_json(e.code, {"error": e.read().decode("utf-8", "replace")})
+            except (urllib.error.URLError, OSError) as e:
+                self._send_json(502, {"error": f"Ollama no disponible: {e}"})
+            except UpstreamError as e:
+                self._send_json(502, {"error": str(e)})
+            except (KeyError, ValueError) as e:
+                self._send_json(400, {"error": str(e)})
+
+        def log_message(self, fmt, *args):
+            pass
+
+    return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Proxy de embeddings Ollama con cache por hash")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=11435)
+    parser.add_argument("--upstream", default=os.environ.get("OLLAMA_URL", "http://localhost:11434"))
+    parser.add_argument("--cache-file", default="embeddings-cache.bin")
+    parser.add_argument("--capacity", type=int, default=100_000, help="Numero maximo de vectores")
+    parser.add_argument("--dim", type=int, default=4096, help="Dimension (qwen3-embedding:8b = 4096)")
+    args = parser.parse_args()
+
+    cache = MmapVectorCache(args.cache_file, args.dim, args.capacity)
+    proxy = EmbeddingCacheProxy(cache, args.upstream)
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(proxy))
+    print(f"Cache de embeddings en http://{args.host}:{args.port} -> {args.upstream}")
+    print(f"  Fichero: {args.cache_file} ({cache.stats()['entries']}/{args.capacity} vectores)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        print(f"\nEstadisticas: {json.dumps(cache.stats())}")
+        cache.close()
+
+
+if __name__ == "__main__":
+    main()
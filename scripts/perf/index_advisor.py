@@ -0,0 +1,468 @@
+#!/usr/bin/env python3
+"""
+Asesor de indices a partir de los filtros reales del workflow.
+
+Recorre los nodos supabase del workflow (tableId, operacion,
+filters.conditions[].keyName/condition y filterString) y las consultas de los
+nodos Postgres/postgresTool (predicados alias.col = $n y ORDER BY), y agrupa
+los patrones de acceso por tabla. Los compara con el schema declarado en
+bbdd.sql y migrations/*.sql, aplicadas por numero de version (v2 antes que
+v10): columnas (CREATE TABLE / ADD COLUMN / LIKE), claves primarias, UNIQUE y
+CREATE INDEX (menos los DROP INDEX posteriores).
+
+Informa:
+  - patrones sin indice que cubra todas sus columnas de igualdad como prefijo;
+  - filtros (e indices) sobre columnas o tablas que el schema no declara;
+  - filtros que un btree no puede usar (LIKE con comodin inicial, casts);
+  - indices redundantes: prefijo de otro indice (o duplicado) con el mismo
+    metodo y predicado, sin UNIQUE.
+
+Con --output escribe una migracion con los indices compuestos que faltan
+(un indice por grupo de patrones, ordenado para que los patrones mas cortos
+sean prefijo) y los DROP de los redundantes comentados para revision.
+--check sale con codigo 1 si falta algun indice.
+
+Uso:
+    python scripts/perf/index_advisor.py
+    python scripts/perf/index_advisor.py --output migrations/v10_workflow_filter_indexes.sql
+    python scripts/perf/index_advisor.py --check --json indices.json
+"""
+
+import argparse
+import glob
+import os
+import re
+import sys
+from collections import defaultdict
+
+from common import REPO_ROOT, find_nodes, load_workflow, write_json
+from query_plans import CREATE_INDEX, extract_queries, index_columns, param_filters, table_aliases
+
+
+def migration_order(path):
+    """Sort key applying vN_*.sql by numeric version (v2 before v10); unversioned scripts go first."""
+    name = os.path.basename(path)
+    m = re.match(r"v(\d+)_", name)
+    return (int(m.group(1)) if m else 0, name)
+
+
+SCHEMA_FILES = [os.path.join(REPO_ROOT, "bbdd.sql")] + sorted(
+    glob.glob(os.path.join(REPO_ROOT, "migrations", "*.sql")), key=migration_order)
+
+CREATE_TABLE = re.compile(r"CREATE\s+TABLE\s+(?:IF\s+NOT\s+EXISTS\s+)?(?:[\w\"]+\.)?\"?(\w+)\"?\s*\(", re.IGNORECASE)
+CREATE_VIEW = re.compile(r"CREATE\s+(?:OR\s+REPLACE\s+)?(?:MATERIALIZED\s+)?VIEW\s+(?:IF\s+NOT\s+EXISTS\s+)?"
+                         r"(?:[\w\"]+\.)?\"?(\w+)\"?", re.IGNORECASE)
+ALTER_TABLE = re.compile(r"ALTER\s+TABLE\s+(?:IF\s+EXISTS\s+)?(?:ONLY\s+)?(?:[\w\"]+\.)?\"?(\w+)\"?([^;]*);",
+                         re.IGNORECASE)
+ADD_COLUMN = re.compile(r"ADD\s+COLUMN\s+(?:IF\s+NOT\s+EXISTS\s+)?\"?(\w+)\"?", re.IGNORECASE)
+ADD_CONSTRAINT = re.compile(r"ADD\s+CONSTRAINT\s+(\w+)\s+(UNIQUE|PRIMARY\s+KEY)\s*\(([^)]*)\)", re.IGNORECASE)
+DROP_INDEX = re.compile(r"DROP\s+INDEX\s+(?:CONCURRENTLY\s+)?(?:IF\s+EXISTS\s+)?(?:[\w\"]+\.)?\"?(\w+)\"?",
+                        re.IGNORECASE)
+LIKE_TABLE = re.compile(r"^LIKE\s+(?:[\w\"]+\.)?\"?(\w+)\"?", re.IGNORECASE)
+TABLE_CONSTRAINT = re.compile(r"^(?:CONSTRAINT\s+(\w+)\s+)?(PRIMARY\s+KEY|UNIQUE)\s*\(([^)]*)\)", re.IGNORECASE)
+ORDER_BY = re.compile(r"\bORDER\s+BY\s+(?:(\w+)\.)?(\w+)", re.IGNORECASE)
+STRING_FILTER = re.compile(r"^(\w+)(?:->>?(\w+))?=(not\.)?(\w+)\.(.*)$")
+
+EQUALITY = {"eq", "is", "in"}
+LOOKUP_OPERATIONS = {"get", "getAll", "update", "delete"}
+MAX_IDENTIFIER = 63
+IDENTIFIER = re.compile(r"^\w+$")
+
+
+# ─── schema ──────────────────────────────────────────────────────────────────
+
+def split_top_level(body):
+    parts, depth, current = [], 0, ""
+    for ch in body:
+        if ch == "," and depth == 0:
+            parts.append(current.strip())
+            current = ""
+            continue
+        depth += ch == "("
+        depth -= ch == ")"
+        current += ch
+    if current.strip():
+        parts.append(current.strip())
+    return parts
+
+
+def table_body(sql, start):
+    """Text between the parenthesis opened at ``start - 1`` and its match."""
+    depth = 1
+    for i in range(start, len(sql)):
+        depth += sql[i] == "("
+        depth -= sql[i] == ")"
+        if depth == 0:
+            return sql[start:i]
+    return sql[start:]
+
+
+def constraint_index(table, name, kind, columns, source):
+    unique_kind = "pkey" if kind.upper().startswith("PRIMARY") else "key"
+    cols = index_columns(columns)
+    return {"name": name or f"{table}_{'_'.join(cols)}_{unique_kind}", "columns": cols, "method": "btree",
+            "where": None, "unique": True, "source": source}
+
+
+def load_schema(paths):
+    """Return ``{"tables": {table: set(columns)}, "created": set, "views": set, "indexes": {table: [index]}}``.
+
+    Statements are applied file by file in ``paths`` order; indexes from
+    CREATE INDEX, PRIMARY KEY and UNIQUE, minus later DROP INDEX; ``LIKE src``
+    inside CREATE TABLE copies the columns ``src`` has at that point. Tables are
+    keyed without schema: bbdd.sql targets public and the migrations
+    desarrollo, and both must end up with the same indexes.
+    """
+    tables = defaultdict(set)
+    created = set()
+    views = set()
+    indexes = defaultdict(list)
+
+    def add_index(table, idx):
+        for existing in indexes[table]:
+            if existing["name"] == idx["name"] or (existing["columns"] == idx["columns"]
+                                                   and existing["where"] == idx["where"]
+                                                   and existing["method"] == idx["method"]
+                                                   and existing["unique"] == idx["unique"]):
+                return
+        indexes[table].append(idx)
+
+    for path in paths:
+        source = os.path.relpath(path, REPO_ROOT)
+        with open(path, 'r', encoding='utf-8') as f:
+            sql = re.sub(r"--[^\n]*", "", f.read())
+        events = []
+        for m in CREATE_TABLE.finditer(sql):
+            events.append((m.start(), "table", m))
+        for m in CREATE_VIEW.finditer(sql):
+            events.append((m.start(), "view", m))
+        for m in ALTER_TABLE.finditer(sql):
+            events.append((m.start(), "alter", m))
+        for m in CREATE_INDEX.finditer(sql):
+            events.append((m.start(), "index", m))
+        for m in DROP_INDEX.finditer(sql):
+            events.append((m.start(), "drop", m))
+        for _, kind, m in sorted(events, key=lambda e: e[0]):
+            if kind == "table":
+                table = m.group(1)
+                created.add(table)
+                for part in split_top_level(table_body(sql, m.end())):
+                    constraint = TABLE_CONSTRAINT.match(part)
+                    if constraint:
+                        add_index(table, constraint_index(table, constraint.group(1), constraint.group(2),
+                                                          constraint.group(3), source))
+                        continue
+                    like = LIKE_TABLE.match(part)
+                    if like:
+                        tables[table].update(tables.get(like.group(1), ()))
+                        continue
+                    if re.match(r"(CONSTRAINT|FOREIGN\s+KEY|CHECK|EXCLUDE)\b", part, re.IGNORECASE):
+                        continue
+                    column = part.split()[0].strip('"')
+                    tables[table].add(column)
+                    if re.search(r"\bPRIMARY\s+KEY\b", part, re.IGNORECASE):
+                        add_index(table, constraint_index(table, None, "PRIMARY KEY", column, source))
+                    elif re.search(r"\bUNIQUE\b", part, re.IGNORECASE):
+                        add_index(table, constraint_index(table, None, "UNIQUE", column, source))
+            elif kind == "view":
+                views.add(m.group(1))
+            elif kind == "alter":
+                table, actions = m.group(1), m.group(2)
+                tables[table].update(ADD_COLUMN.findall(actions))
+                for name, ckind, columns in ADD_CONSTRAINT.findall(actions):
+                    add_index(table, constraint_index(table, name, ckind, columns, source))
+            elif kind == "index":
+                name, table, method, columns, where = m.groups()
+                unique = bool(re.match(r"CREATE\s+UNIQUE", m.group(0), re.IGNORECASE))
+                add_index(table, {"name": name, "columns": index_columns(columns),
+                                  "method": (method or "btree").lower(),
+                                  "where": " ".join((where or "").split()) or None,
+                                  "unique": unique, "source": source})
+            elif kind == "drop":
+                for table in indexes:
+                    indexes[table] = [i for i in indexes[table] if i["name"] != m.group(1)]
+    return {"tables": dict(tables), "created": created, "views": views, "indexes": dict(indexes)}
+
+
+# ─── access patterns ─────────────────────────────────────────────────────────
+
+def parse_filter_string(text):
+    """PostgREST filter string -> [(column, operator, json key)]."""
+    out = []
+    for item in text.lstrip("=").split("&"):
+        m = STRING_FILTER.match(item.strip())
+        if m:
+            column, key, negated, op, value = m.groups()
+            out.append({"column": column, "key": key, "op": ("not." if negated else "") + op,
+                        "leading_wildcard": op in ("like", "ilike") and value.startswith("*")})
+    return out
+
+
+def supabase_patterns(workflow):
+    patterns = []
+    for node in find_nodes(workflow, "supabase"):
+        params = node["parameters"]
+        operation = params.get("operation", "create")
+        if operation not in LOOKUP_OPERATIONS or not params.get("tableId"):
+            continue
+        if params.get("filterType") == "string":
+            filters = parse_filter_string(params.get("filterString", ""))
+        else:
+            filters = [{"column": c["keyName"], "key": None, "op": c.get("condition", "eq"),
+                        "leading_wildcard": False}
+                       for c in params.get("filters", {}).get("conditions", []) if c.get("keyName")]
+        if filters:
+            patterns.append({"node": node["name"], "source": "supabase", "operation": operation,
+                             "table": params["tableId"], "filters": filters, "order": None})
+    return patterns
+
+
+def sql_patterns(workflow):
+    patterns = []
+    for query in extract_queries(workflow):
+        by_table = defaultdict(list)
+        for table, column, cast, op, _ in param_filters(query["sql"]):
+            by_table[table].append({"column": column, "key": None, "cast": cast,
+                                    "op": "eq" if op == "=" else op.lower(),
+                                    "leading_wildcard": op in ("LIKE", "ILIKE") and "'%'" in query["sql"]})
+        aliases = table_aliases(query["sql"])
+        order = ORDER_BY.search(query["sql"])
+        for table, filters in by_table.items():
+            order_col = None
+            if order and aliases.get(order.group(1) or table) == table:
+                order_col = order.group(2)
+            patterns.append({"node": query["node"], "source": query["type"], "operation": "select",
+                             "table": table, "filters": filters, "order": order_col})
+    return patterns
+
+
+def equality_columns(pattern):
+    return sorted({f["column"] for f in pattern["filters"]
+                   if f["op"] in EQUALITY and not f.get("key") and not f.get("cast")})
+
+
+# ─── analysis ────────────────────────────────────────────────────────────────
+
+def covering_index(columns, order, candidates):
+    """First btree index whose leading columns are exactly ``columns`` (any order), then ``order``."""
+    n = len(columns)
+    for idx in candidates:
+        if idx["method"] != "btree" or idx["where"]:
+            continue
+        if len(idx["columns"]) >= n and set(idx["columns"][:n]) == set(columns):
+            if order and order not in columns and (len(idx["columns"]) <= n or idx["columns"][n] != order):
+                continue
+            return idx
+    return None
+
+
+def plan_index(table, columns, order, existing, demand):
+    """Column order for a new index on ``columns``: reuse the longest existing prefix, then most-demanded first."""
+    best = []
+    for idx in existing:
+        prefix = []
+        for col in idx["columns"]:
+            if col not in columns or idx["method"] != "btree" or idx["where"]:
+                break
+            prefix.append(col)
+        if len(prefix) > len(best):
+            best = prefix
+    rest = sorted(set(columns) - set(best), key=lambda c: (-demand[c], c))
+    cols = best + rest
+    if order and order not in cols:
+        cols.append(order)
+    name = f"idx_{table}_{'_'.join(cols)}"[:MAX_IDENTIFIER]
+    return {"name": name, "columns": cols, "method": "btree", "where": None, "unique": False,
+            "source": "index_advisor"}
+
+
+def redundant_indexes(indexes):
+    out = []
+    for table, idxs in sorted(indexes.items()):
+        for a in idxs:
+            if a["unique"]:
+                continue
+            for b in idxs:
+                if a is b or a["method"] != b["method"] or a["where"] != b["where"]:
+                    continue
+                same = a["columns"] == b["columns"]
+                if same and idxs.index(a) < idxs.index(b) and not b["unique"]:
+                    continue  # report each duplicate pair once, keeping the later one
+                if b["columns"][:len(a["columns"])] == a["columns"]:
+                    out.append({"table": table, "index": a["name"], "columns": a["columns"], "source": a["source"],
+                                "covered_by": b["name"], "covered_columns": b["columns"],
+                                "reason": "duplicado" if same else "prefijo"})
+                    break
+    return out
+
+
+def analyze(patterns, schema):
+    tables, views, indexes = schema["tables"], schema["views"], schema["indexes"]
+    report = {"patterns": [], "missing": [], "problems": [], "new_indexes": [], "redundant": []}
+    needed = defaultdict(dict)
+
+    for p in patterns:
+        table = p["table"]
+        entry = {"node": p["node"], "source": p["source"], "operation": p["operation"], "table": table,
+                 "filters": [f"{f['column']}{'->>' + f['key'] if f.get('key') else ''}"
+                             f"{f.get('cast') or ''} {f['op']}" for f in p["filters"]],
+                 "order": p["order"], "index": None}
+        report["patterns"].append(entry)
+        if table in views:
+            report["problems"].append({"node": p["node"], "table": table,
+                                       "problem": "vista: los indices van en sus tablas base"})
+            continue
+        if table not in tables:
+            report["problems"].append({"node": p["node"], "table": table,
+                                       "problem": "tabla no declarada en el schema"})
+            continue
+        for f in p["filters"]:
+            if f["column"] not in tables[table]:
+                report["problems"].append({"node": p["node"], "table": table,
+                                           "problem": f"columna {f['column']} no declarada en el schema"})
+            elif f.get("cast"):
+                report["problems"].append({"node": p["node"], "table": table,
+                                           "problem": f"{f['column']}{f['cast']}: el cast sobre la columna "
+                                                      "impide usar un btree"})
+            elif f["leading_wildcard"]:
+                report["problems"].append({"node": p["node"], "table": table,
+                                           "problem": f"{f['column']}{'->>' + f['key'] if f.get('key') else ''} "
+                                                      f"{f['op']} con comodin inicial: solo pg_trgm (GIN) lo indexa"})
+        columns = [c for c in equality_columns(p) if c in tables[table]]
+        order = p["order"] if p["order"] in tables[table] else None
+        if not columns:
+            continue
+        idx = covering_index(columns, order, indexes.get(table, []))
+        if idx:
+            entry["index"] = idx["name"]
+            continue
+        key = (tuple(columns), order)
+        needed[table].setdefault(key, []).append(p["node"])
+
+    for table, wanted in sorted(needed.items()):
+        demand = defaultdict(int)
+        for (columns, _), nodes in wanted.items():
+            for c in columns:
+                demand[c] += len(nodes)
+        planned = []
+        # Widest patterns first so narrower ones can ride on their prefix
+        for (columns, order), nodes in sorted(wanted.items(), key=lambda kv: (-len(kv[0][0]), kv[0])):
+            existing = indexes.get(table, []) + planned
+            idx = covering_index(list(columns), order, planned)
+            if idx is None:
+                idx = plan_index(table, list(columns), order, existing, demand)
+                planned.append(idx)
+                idx["nodes"] = []
+            idx["nodes"] = sorted(set(idx["nodes"]) | set(nodes))
+            report["missing"].append({"table": table, "columns": list(columns), "order": order,
+                                      "nodes": nodes, "index": idx["name"]})
+            for entry in report["patterns"]:
+                if entry["table"] == table and entry["node"] in nodes and entry["index"] is None:
+                    entry["index"] = f"{idx['name']} (nuevo)"
+        report["new_indexes"] += [dict(i, table=table) for i in planned]
+
+    for table, idxs in sorted(indexes.items()):
+        for idx in idxs:
+            unknown = [c for c in idx["columns"] if IDENTIFIER.match(c) and c not in tables.get(table, ())]
+            if table in schema["created"] and unknown:
+                report["problems"].append({"node": idx["source"], "table": table,
+                                           "problem": f"el indice {idx['name']} usa columnas no declaradas "
+                                                      f"({', '.join(unknown)})"})
+
+    after = {t: list(idxs) for t, idxs in indexes.items()}
+    for idx in report["new_indexes"]:
+        after.setdefault(idx["table"], []).append(idx)
+    report["redundant"] = redundant_indexes(after)
+    return report
+
+
+# ─── output ──────────────────────────────────────────────────────────────────
+
+def migration_sql(report, schema_name, concurrently):
+    lines = [
+        "-- ============================================================",
+        "-- Indexes for the access patterns of the n8n workflow",
+        f"-- Schema: {schema_name}",
+        "-- Generated by scripts/perf/index_advisor.py from the supabase node",
+        "-- filters and the Postgres node queries; review before applying.",
+        "-- ============================================================",
+        "",
+        f"SET search_path TO {schema_name};",
+        "",
+    ]
+    keyword = "INDEX CONCURRENTLY" if concurrently else "INDEX"
+    for idx in report["new_indexes"]:
+        lines.append(f"-- {idx['table']}: {', '.join(idx['nodes'])}")
+        lines.append(f"CREATE {keyword} IF NOT EXISTS {idx['name']} ON {idx['table']} ({', '.join(idx['columns'])});")
+        lines.append("")
+    if report["new_indexes"]:
+        for table in sorted({i["table"] for i in report["new_indexes"]}):
+            lines.append(f"ANALYZE {table};")
+        lines.append("")
+    if report["redundant"]:
+        lines.append("-- Redundant indexes (review write load and usage in pg_stat_user_indexes first):")
+        for r in report["redundant"]:
+            lines.append(f"-- {r['index']} ({', '.join(r['columns'])}) is a {'duplicate' if r['reason'] == 'duplicado' else 'prefix'} "
+                         f"of {r['covered_by']} ({', '.join(r['covered_columns'])})")
+            lines.append(f"-- DROP INDEX IF EXISTS {r['index']};")
+        lines.append("")
+    if not report["new_indexes"] and not report["redundant"]:
+        lines.append("-- Nothing to do: every workflow filter has a covering index.")
+    return "\n".join(lines) + "\n"
+
+
+def print_report(report):
+    print(f"{'Nodo':34s} {'Tabla':22s} {'Filtros':42s} Indice")
+    print("-" * 124)
+    for p in report["patterns"]:
+        filters = ", ".join(p["filters"]) + (f" ORDER BY {p['order']}" if p["order"] else "")
+        print(f"{p['node'][:34]:34s} {p['table'][:22]:22s} {filters[:42]:42s} {p['index'] or '-'}")
+    if report["problems"]:
+        print("\nProblemas:")
+        for prob in report["problems"]:
+            print(f"  {prob['node']} ({prob['table']}): {prob['problem']}")
+    if report["new_indexes"]:
+        print("\nIndices que faltan:")
+        for idx in report["new_indexes"]:
+            print(f"  {idx['name']} ON {idx['table']} ({', '.join(idx['columns'])})  <- {', '.join(idx['nodes'])}")
+    if report["redundant"]:
+        print("\nIndices redundantes:")
+        for r in report["redundant"]:
+            print(f"  {r['table']}.{r['index']} ({', '.join(r['columns'])}) [{r['source']}] "
+                  f"{r['reason']} de {r['covered_by']} ({', '.join(r['covered_columns'])})")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Indices que faltan o sobran segun los filtros del workflow")
+    parser.add_argument("--sql", action="append", help="Ficheros de schema/migraciones (por defecto bbdd.sql y "
+                                                       "migrations/*.sql)")
+    parser.add_argument("--no-postgres", action="store_true", help="Solo nodos supabase")
+    parser.add_argument("--output", help="Escribir la migracion con los indices que faltan")
+    parser.add_argument("--schema", default="desarrollo", help="search_path de la migracion generada")
+    parser.add_argument("--concurrently", action="store_true", help="CREATE INDEX CONCURRENTLY")
+    parser.add_argument("--json", help="Guardar el informe")
+    parser.add_argument("--check", action="store_true", help="Salir con codigo 1 si falta algun indice")
+    args = parser.parse_args()
+
+    workflow = load_workflow()
+    schema = load_schema(args.sql or SCHEMA_FILES)
+    patterns = supabase_patterns(workflow)
+    if not args.no_postgres:
+        patterns += sql_patterns(workflow)
+    report = analyze(patterns, schema)
+    print_report(report)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(migration_sql(report, args.schema, args.concurrently))
+        print(f"\nMigracion escrita en {args.output}")
+    if args.json:
+        write_json(args.json, report)
+        print(f"Informe guardado en {args.json}")
+    if args.check and report["new_indexes"]:
+        print(f"\n{len(report['new_indexes'])} indice(s) por crear")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
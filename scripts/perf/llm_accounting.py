@@ -0,0 +1,444 @@
+#!/usr/bin/env python3
+"""
+Tokens, latencia y coste por nodo LLM, flujo y proyecto.
+
+Los 14 chainLlm y el agente del chat llaman a OpenRouter (lmChatOpenRouter) y
+a Ollama (lmOllama/lmChatOllama) sin dejar rastro de cuanto gasta cada uno:
+
+  proxy   Proxy local entre n8n y los proveedores. /api/v1/* va a OpenRouter
+          (credencial openRouterApi con url http://<proxy>:8788/api/v1) y el
+          resto de /api/* a Ollama (credencial ollamaApi con base URL
+          http://<proxy>:8788). Reenvia las peticiones tal cual, streaming
+          incluido, y escribe una linea JSONL por llamada: nodo (la plantilla
+          chainLlm/agent que casa con el prompt, ver structured_output.py),
+          modelo, tokens de prompt y completion, tokens servidos de la cache
+          del proveedor, coste, latencia y tiempo al primer token. A
+          OpenRouter le pide usage accounting (usage.include) para recibir el
+          coste y cached_tokens reales; Ollama no devuelve prompt_eval_count
+          cuando todo el prompt estaba en su cache KV.
+  report  Ranking de prompts (nodos) por coste, tokens o latencia y totales
+          por modelo, flujo y proyecto. El flujo y el proyecto salen de cruzar
+          cada llamada con las filas kind='llm' de node_metrics que escribe el
+          build `workflow_patch.py instrument` (--dsn): mismo nodo y hora
+          dentro del intervalo entre sus marcadores. Con --prices se calcula
+          el coste de las llamadas que no lo traen (Ollama, o OpenRouter sin
+          usage accounting).
+
+Uso:
+    python scripts/perf/llm_accounting.py proxy --port 8788 --log llm_calls.jsonl
+    python scripts/perf/llm_accounting.py proxy --openrouter-url http://localhost:8787/api/v1 \\
+        --ollama-url http://localhost:11434 --log llm_calls.jsonl
+    python scripts/perf/llm_accounting.py report llm_calls.jsonl --dsn "$BIDEVAL_PG_DSN" \\
+        --prices precios.json --sort cost --top 15 --json coste_llm.json
+"""
+
+import argparse
+import hashlib
+import json
+import sys
+import time
+from bisect import bisect_left, bisect_right
+from collections import defaultdict
+from datetime import datetime, timezone
+
+from common import estimate_tokens, import_or_install, load_workflow, summarize, write_json
+from structured_output import load_prompt_templates, match_template
+
+OPENROUTER_URL = "https://openrouter.ai/api/v1"
+OLLAMA_URL = "http://localhost:11434"
+# Endpoints that generate text; everything else (models, tags, embed...) is only forwarded
+ACCOUNTED = {"openrouter": {"chat/completions", "completions"}, "ollama": {"chat", "generate"}}
+HOP_HEADERS = {"host", "content-length", "transfer-encoding", "connection", "keep-alive",
+               "accept-encoding", "content-encoding"}
+UNMATCHED = "(sin plantilla)"
+NO_PROJECT = "(sin proyecto)"
+AMBIGUOUS = "(ambiguo)"
+SORT_KEYS = {"cost": "cost", "tokens": "total_tokens", "latency": "latency_total_ms"}
+SORT_LABELS = {"cost": "coste", "tokens": "tokens", "latency": "tiempo total"}
+
+
+# ─── proxy ───────────────────────────────────────────────────────────────────
+
+def prompt_text(payload):
+    """Prompt of an OpenAI-style or Ollama chat/generate request as one string."""
+    parts = [payload.get("system") or "", payload.get("prompt") or ""]
+    for message in payload.get("messages") or []:
+        content = message.get("content")
+        if isinstance(content, list):
+            content = "\n".join(p.get("text", "") for p in content if isinstance(p, dict))
+        parts.append(content or "")
+    return "\n".join(p for p in parts if p)
+
+
+def response_documents(body, content_type):
+    """JSON objects of a plain, SSE or NDJSON (Ollama streaming) response body."""
+    text = body.decode("utf-8", errors="replace")
+    if "text/event-stream" in content_type:
+        lines = [line[5:].strip() for line in text.splitlines() if line.startswith("data:")]
+    else:
+        try:
+            return [json.loads(text)]
+        except ValueError:
+            lines = text.splitlines()
+    documents = []
+    for line in lines:
+        if not line or line == "[DONE]":
+            continue
+        try:
+            documents.append(json.loads(line))
+        except ValueError:
+            continue
+    return documents
+
+
+def usage_from(upstream, documents, prompt):
+    """Token counts, provider cache status and cost from the response documents."""
+    usage = {"prompt_tokens": None, "completion_tokens": None, "cached_tokens": None,
+             "cache": "n/a", "cost": None, "model": None}
+    for doc in documents:
+        if not isinstance(doc, dict):
+            continue
+        usage["model"] = doc.get("model") or usage["model"]
+        if upstream == "openrouter" and doc.get("usage"):
+            u = doc["usage"]
+            cached = (u.get("prompt_tokens_details") or {}).get("cached_tokens")
+            usage.update(prompt_tokens=u.get("prompt_tokens"), completion_tokens=u.get("completion_tokens"),
+                         cached_tokens=cached, cost=u.get("cost"))
+            if cached is not None:
+                usage["cache"] = "hit" if cached else "miss"
+        elif upstream == "ollama" and doc.get("done"):
+            evaluated = doc.get("prompt_eval_count")
+            usage["completion_tokens"] = doc.get("eval_count")
+            if evaluated is None:
+                # Ollama omits prompt_eval_count when the whole prompt came from its KV cache
+                usage.update(prompt_tokens=estimate_tokens(prompt), cached_tokens=estimate_tokens(prompt),
+                             cache="hit")
+            else:
+                usage.update(prompt_tokens=evaluated, cache="miss")
+    return usage
+
+
+class AccountingProxy:
+    def __init__(self, web, templates, upstreams, log_path, include_usage, quiet):
+        self.web = web
+        self.templates = templates
+        self.upstreams = upstreams
+        self.log = open(log_path, 'a', encoding='utf-8')
+        self.include_usage = include_usage
+        self.quiet = quiet
+        self.session = None
+        self.client_errors = OSError
+        self.calls = 0
+
+    async def start(self, app):
+        aiohttp = import_or_install("aiohttp")
+        self.client_errors = (OSError, aiohttp.ClientError)
+        # LLM calls can legitimately run for minutes; n8n applies its own timeouts
+        self.session = aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=None),
+                                             auto_decompress=False)
+
+    async def stop(self, app):
+        await self.session.close()
+        self.log.close()
+        print(f"{self.calls} llamadas registradas")
+
+    async def openrouter(self, request):
+        return await self.forward(request, "openrouter")
+
+    async def ollama(self, request):
+        return await self.forward(request, "ollama")
+
+    async def forward(self, request, upstream):
+        tail = request.match_info["tail"]
+        body = await request.read()
+        accounted = request.method == "POST" and tail in ACCOUNTED[upstream]
+        payload = {}
+        if accounted:
+            try:
+                payload = json.loads(body)
+            except ValueError:
+                accounted = False
+        if accounted and upstream == "openrouter" and self.include_usage:
+            usage = payload.get("usage") if isinstance(payload.get("usage"), dict) else {}
+            payload["usage"] = {**usage, "include": True}
+            body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+
+        headers = {k: v for k, v in request.headers.items() if k.lower() not in HOP_HEADERS}
+        # Uncompressed responses, so the usage block can be read on the way through
+        headers["Accept-Encoding"] = "identity"
+        url = f"{self.upstreams[upstream]}/{tail}"
+        started_at = time.time()
+        started = time.monotonic()
+        first_byte = None
+        out = None
+        received = bytearray()
+        try:
+            async with self.session.request(request.method, url, params=request.query, headers=headers,
+                                            data=body) as resp:
+                out = self.web.StreamResponse(
+                    status=resp.status,
+                    headers={k: v for k, v in resp.headers.items() if k.lower() not in HOP_HEADERS
+                             or k.lower() == "content-encoding"})
+                await out.prepare(request)
+                async for chunk in resp.content.iter_any():
+                    if first_byte is None:
+                        first_byte = time.monotonic()
+                    if accounted:
+                        received += chunk
+                    await out.write(chunk)
+                await out.write_eof()
+                status, content_type = resp.status, resp.headers.get("Content-Type", "")
+        except self.client_errors as e:
+            if out is not None:
+                raise
+            out = self.web.json_response({"error": {"code": 502, "message": f"{upstream}: {e}"}}, status=502)
+            status, content_type = 502, ""
+        if accounted:
+            self.record(upstream, tail, payload, status, bytes(received), content_type,
+                        started_at, started, first_byte)
+        return out
+
+    def record(self, upstream, endpoint, payload, status, body, content_type, started_at, started, first_byte):
+        prompt = prompt_text(payload)
+        usage = usage_from(upstream, response_documents(body, content_type), prompt)
+        node = match_template(prompt, self.templates) or UNMATCHED
+        entry = {
+            "ts": datetime.fromtimestamp(started_at, timezone.utc).isoformat(),
+            "upstream": upstream,
+            "endpoint": endpoint,
+            "status": status,
+            "node": node,
+            "model": usage.pop("model") or payload.get("model"),
+            "stream": bool(payload.get("stream", upstream == "ollama")),
+            **usage,
+            "latency_ms": round((time.monotonic() - started) * 1000, 1),
+            "ttft_ms": round((first_byte - started) * 1000, 1) if first_byte else None,
+            "prompt_chars": len(prompt),
+            "prompt_hash": hashlib.sha1(prompt.encode("utf-8")).hexdigest()[:12],
+        }
+        self.log.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        self.log.flush()
+        self.calls += 1
+        if not self.quiet:
+            print(f"  {status} {upstream:10s} {node[:40]:40s} {entry['model'] or '-':28s} "
+                  f"{entry['prompt_tokens'] or 0:>6}+{entry['completion_tokens'] or 0:<5} "
+                  f"{entry['cache']:4s} {entry['latency_ms']:8.0f} ms")
+
+
+def serve(args):
+    web = import_or_install("aiohttp.web", "aiohttp")
+    templates = load_prompt_templates(load_workflow())
+    upstreams = {"openrouter": args.openrouter_url.rstrip("/"), "ollama": args.ollama_url.rstrip("/") + "/api"}
+    proxy = AccountingProxy(web, templates, upstreams, args.log, not args.no_usage_include, args.quiet)
+    app = web.Application(client_max_size=64 * 1024 ** 2)
+    # Registration order matters: /api/v1 must win over Ollama's /api
+    app.router.add_route("*", "/api/v1/{tail:.*}", proxy.openrouter)
+    app.router.add_route("*", "/v1/{tail:.*}", proxy.openrouter)
+    app.router.add_route("*", "/api/{tail:.*}", proxy.ollama)
+    app.on_startup.append(proxy.start)
+    app.on_cleanup.append(proxy.stop)
+    print(f"Proxy de contabilidad en http://{args.host}:{args.port}  ({len(templates)} plantillas)")
+    print(f"  /api/v1 -> {upstreams['openrouter']}")
+    print(f"  /api    -> {upstreams['ollama']}")
+    print(f"  registro: {args.log}")
+    web.run_app(app, host=args.host, port=args.port, print=None)
+
+
+# ─── attribution ─────────────────────────────────────────────────────────────
+
+def load_calls(paths):
+    calls = []
+    for path in paths:
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                if line.strip():
+                    call = json.loads(line)
+                    call["t"] = datetime.fromisoformat(call["ts"]).timestamp()
+                    calls.append(call)
+    return calls
+
+
+def load_windows(dsn, since, slack_ms):
+    """LLM node windows measured by the instrumented build's markers.
+
+    Filtered on where a window ends, with the same slack as attribute(): a
+    window that started before the first call can still contain it.
+    """
+    psycopg = import_or_install("psycopg", "psycopg[binary]")
+    sql = ("SELECT node_name, started_at, duration_ms, flow, project_id, execution_id FROM node_metrics "
+           "WHERE kind = 'llm' AND started_at IS NOT NULL "
+           "AND started_at + (coalesce(duration_ms, 0) + %(slack_ms)s) * interval '1 millisecond' "
+           ">= %(since)s::timestamptz")
+    with psycopg.connect(dsn) as conn:
+        rows = conn.execute(sql, {"since": since, "slack_ms": slack_ms}).fetchall()
+    return [{"node": node, "start": started_at.timestamp(), "end": started_at.timestamp() + (duration_ms or 0) / 1000,
+             "flow": flow, "project_id": project_id, "execution_id": execution_id}
+            for node, started_at, duration_ms, flow, project_id, execution_id in rows]
+
+
+def attribute(calls, windows, slack_ms):
+    """Tag each call with flow/project/execution of the node window it falls in."""
+    by_node = defaultdict(list)
+    for w in windows:
+        by_node[w["node"]].append(w)
+    for ws in by_node.values():
+        ws.sort(key=lambda w: w["start"])
+    starts = {node: [w["start"] for w in ws] for node, ws in by_node.items()}
+    longest = {node: max(w["end"] - w["start"] for w in ws) for node, ws in by_node.items()}
+    slack = slack_ms / 1000
+    for call in calls:
+        node = call["node"]
+        ws = by_node.get(node, [])
+        if ws:
+            lo = bisect_left(starts[node], call["t"] - slack - longest[node])
+            hi = bisect_right(starts[node], call["t"] + slack)
+            ws = [w for w in ws[lo:hi] if w["end"] + slack >= call["t"]]
+        # Concurrent executions of the same node for different projects cannot be told apart
+        projects = {w["project_id"] or NO_PROJECT for w in ws}
+        flows = {w["flow"] or "-" for w in ws}
+        executions = {w["execution_id"] for w in ws}
+        call["project_id"] = projects.pop() if len(projects) == 1 else (AMBIGUOUS if projects else NO_PROJECT)
+        call["flow"] = flows.pop() if len(flows) == 1 else (AMBIGUOUS if flows else "-")
+        call["execution_id"] = executions.pop() if len(executions) == 1 else None
+
+
+def call_cost(call, prices):
+    """Provider-reported cost, else --prices (USD per million tokens), else None."""
+    if call.get("cost") is not None:
+        return call["cost"]
+    price = prices.get(call.get("model") or "")
+    if price is None:
+        return None
+    return ((call.get("prompt_tokens") or 0) * price.get("prompt", 0)
+            + (call.get("completion_tokens") or 0) * price.get("completion", 0)) / 1e6
+
+
+# ─── report ──────────────────────────────────────────────────────────────────
+
+def aggregate(calls, key):
+    groups = defaultdict(list)
+    for call in calls:
+        groups[key(call)].append(call)
+    rows = {}
+    for name, group in groups.items():
+        ok = [c for c in group if c["status"] < 400]
+        costs = [c["cost_usd"] for c in group if c["cost_usd"] is not None]
+        cache_known = [c for c in ok if c.get("cache") in ("hit", "miss")]
+        prompt_tokens = sum(c.get("prompt_tokens") or 0 for c in group)
+        completion_tokens = sum(c.get("completion_tokens") or 0 for c in group)
+        rows[name] = {
+            "calls": len(group),
+            "errors": len(group) - len(ok),
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens,
+            "cached_tokens": sum(c.get("cached_tokens") or 0 for c in group),
+            "prompt_tokens_per_call": summarize([c["prompt_tokens"] for c in ok if c.get("prompt_tokens")]),
+            "cache_hit_rate": (sum(c["cache"] == "hit" for c in cache_known) / len(cache_known)
+                               if cache_known else None),
+            "cost": sum(costs) if costs else None,
+            "cost_unknown_calls": len(group) - len(costs),
+            "latency_ms": summarize([c["latency_ms"] for c in ok]),
+            "latency_total_ms": sum(c["latency_ms"] for c in ok),
+            "models": sorted({c.get("model") or "-" for c in group}),
+        }
+    return rows
+
+
+def build_report(calls, prices):
+    for call in calls:
+        call["cost_usd"] = call_cost(call, prices)
+    return {
+        "calls": len(calls),
+        "since": min(c["ts"] for c in calls),
+        "until": max(c["ts"] for c in calls),
+        "nodes": aggregate(calls, lambda c: c["node"]),
+        "models": aggregate(calls, lambda c: c.get("model") or "-"),
+        "flows": aggregate(calls, lambda c: c.get("flow", "-")),
+        "projects": aggregate(calls, lambda c: c.get("project_id", NO_PROJECT)),
+        "node_projects": aggregate(calls, lambda c: f"{c['node']} @ {c.get('project_id', NO_PROJECT)}"),
+    }
+
+
+def print_table(title, rows, sort, top):
+    key = SORT_KEYS[sort]
+    ranked = sorted(rows.items(), key=lambda kv: -(kv[1][key] or 0))
+    print(f"\n══ {title}")
+    print(f"   {'':44s} {'llamadas':>8} {'tok prompt':>11} {'tok compl':>10} {'prompt p50':>10} "
+          f"{'cache':>6} {'coste $':>10} {'$/llam':>8} {'lat p50':>8} {'lat p95':>8} {'err':>4}")
+    for name, r in ranked[:top]:
+        cost = f"{r['cost']:10.4f}" if r["cost"] is not None else f"{'-':>10}"
+        per_call = f"{r['cost'] / r['calls']:8.5f}" if r["cost"] is not None else f"{'-':>8}"
+        cache = f"{r['cache_hit_rate'] * 100:5.0f}%" if r["cache_hit_rate"] is not None else f"{'-':>6}"
+        print(f"   {name[:44]:44s} {r['calls']:8d} {r['prompt_tokens']:11d} {r['completion_tokens']:10d} "
+              f"{r['prompt_tokens_per_call']['p50']:10.0f} {cache} {cost} {per_call} "
+              f"{r['latency_ms']['p50']:8.0f} {r['latency_ms']['p95']:8.0f} {r['errors']:>4}")
+
+
+def print_report(report, sort, top, attributed):
+    print(f"{report['calls']} llamadas entre {report['since']} y {report['until']}")
+    print_table(f"Prompts por {SORT_LABELS[sort]}", report["nodes"], sort, top)
+    print_table("Modelos", report["models"], sort, top)
+    if attributed:
+        print_table("Flujos", report["flows"], sort, top)
+        print_table("Proyectos", report["projects"], sort, top)
+        print_table("Prompts por proyecto", report["node_projects"], sort, top)
+    unknown = sum(r["cost_unknown_calls"] for r in report["nodes"].values())
+    if unknown:
+        print(f"\n{unknown} llamadas sin coste (sin usage.cost ni precio en --prices)")
+    unmatched = report["nodes"].get(UNMATCHED)
+    if unmatched:
+        print(f"{unmatched['calls']} llamadas sin plantilla reconocida: prompts que ya no estan en el workflow")
+
+
+# ─── main ────────────────────────────────────────────────────────────────────
+
+def main():
+    parser = argparse.ArgumentParser(description="Contabilidad de tokens y coste de los nodos LLM")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+
+    p = sub.add_parser("proxy", help="Proxy de OpenRouter/Ollama que registra cada llamada")
+    p.add_argument("--host", default="0.0.0.0")
+    p.add_argument("--port", type=int, default=8788)
+    p.add_argument("--openrouter-url", default=OPENROUTER_URL)
+    p.add_argument("--ollama-url", default=OLLAMA_URL)
+    p.add_argument("--log", default="llm_calls.jsonl", help="JSONL con una linea por llamada (se anade)")
+    p.add_argument("--no-usage-include", action="store_true",
+                   help="No pedir usage accounting a OpenRouter (sin coste ni cached_tokens)")
+    p.add_argument("--quiet", action="store_true")
+
+    p = sub.add_parser("report", help="Ranking de prompts, modelos, flujos y proyectos")
+    p.add_argument("logs", nargs="+", help="Ficheros JSONL del proxy")
+    p.add_argument("--dsn", help="Cruzar con node_metrics para flujo y proyecto (build instrument)")
+    p.add_argument("--slack-ms", type=float, default=500, help="Holgura al casar llamada e intervalo del nodo")
+    p.add_argument("--prices", help='JSON {modelo: {"prompt": USD/Mtok, "completion": USD/Mtok}}')
+    p.add_argument("--sort", choices=sorted(SORT_KEYS), default="cost")
+    p.add_argument("--top", type=int, default=20)
+    p.add_argument("--json")
+
+    args = parser.parse_args()
+    if args.cmd == "proxy":
+        serve(args)
+        return
+
+    calls = load_calls(args.logs)
+    if not calls:
+        sys.exit("No hay llamadas en los registros")
+    if args.dsn:
+        windows = load_windows(args.dsn, min(c["ts"] for c in calls), args.slack_ms)
+        attribute(calls, windows, args.slack_ms)
+        matched = sum(c["project_id"] not in (NO_PROJECT, AMBIGUOUS) for c in calls)
+        print(f"{len(windows)} intervalos LLM en node_metrics; {matched}/{len(calls)} llamadas con proyecto")
+    prices = {}
+    if args.prices:
+        with open(args.prices, 'r', encoding='utf-8') as f:
+            prices = json.load(f)
+    report = build_report(calls, prices)
+    print_report(report, args.sort, args.top, bool(args.dsn))
+    if args.json:
+        write_json(args.json, report)
+        print(f"\nInforme guardado en {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,261 @@
+#!/usr/bin/env python3
+"""
+Sustituto local de Ollama para pruebas de carga sin GPU.
+
+Implementa /api/generate, /api/chat, /api/embed, /api/embeddings, /api/tags,
+/api/show y /api/version con las respuestas (normales y en streaming NDJSON)
+que esperan los nodos lmOllama, lmChatOllama y embeddingsOllama del workflow
+(qwen3:8b, mistral:7b, qwen3-embedding:8b):
+
+  - Las salidas de texto cumplen los esquemas outputParserStructured del
+    workflow (ver structured_output.py).
+  - Los embeddings son pseudo-embeddings deterministas por feature hashing:
+    textos con palabras en comun tienen coseno alto, asi que la recuperacion
+    sobre pgvector sigue teniendo sentido.
+  - La latencia es configurable por endpoint (fixed/uniform/normal/lognormal),
+    con velocidad de generacion en tokens/s y un limite de concurrencia
+    equivalente a OLLAMA_NUM_PARALLEL / OLLAMA_MAX_QUEUE.
+
+Uso:
+    python scripts/perf/ollama_mock.py --port 11434 \\
+        --latency generate=lognormal:400:0.4 --latency embed=fixed:30 \\
+        --tokens-per-sec 40 --num-parallel 4 --max-queue 128
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import math
+import random
+import re
+import time
+from datetime import datetime, timezone
+
+from common import estimate_tokens, import_or_install, load_workflow, parse_latency
+from structured_output import (
+    canned_completion, load_workflow_schemas, prompt_rng, schema_from_prompt, schema_instance,
+)
+
+aiohttp = import_or_install("aiohttp")
+web = import_or_install("aiohttp.web", "aiohttp")
+
+DEFAULT_MODELS = ["qwen3:8b", "mistral:7b", "qwen3-embedding:8b"]
+DEFAULT_LATENCY = {
+    "generate": "lognormal:300:0.4",
+    "chat": "lognormal:300:0.4",
+    "embed": "normal:40:10",
+}
+JSON_FALLBACK_SCHEMA = {"type": "object", "properties": {"response": {"type": "string"}}}
+TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def pseudo_embedding(text, dim):
+    """Feature-hashed bag of words, L2-normalised and deterministic."""
+    vec = [0.0] * dim
+    for token in TOKEN_RE.findall(text.lower()):
+        h = int.from_bytes(hashlib.blake2b(token.encode("utf-8"), digest_size=8).digest(), "big")
+        vec[h % dim] += 1.0 if (h >> 63) else -1.0
+    if not any(vec):
+        rng = prompt_rng(text)
+        vec = [rng.gauss(0, 1) for _ in range(dim)]
+    norm = math.sqrt(sum(v * v for v in vec))
+    return [v / norm for v in vec]
+
+
+def _now():
+    return datetime.now(timezone.utc).isoformat().replace("+00:00", "Z")
+
+
+class OllamaMock:
+    def __init__(self, schemas, latency, tokens_per_sec, num_parallel, max_queue, dim, seed):
+        self.schemas = schemas
+        self.latency = {k: parse_latency(v) for k, v in latency.items()}
+        self.tokens_per_sec = tokens_per_sec
+        self.slots = asyncio.Semaphore(num_parallel)
+        self.max_queue = max_queue
+        self.waiting = 0
+        self.dim = dim
+        self.rng = random.Random(seed)
+        self.stats = {"requests": 0, "rejected": 0, "prompt_tokens": 0, "eval_tokens": 0}
+
+    async def _acquire(self):
+        if self.max_queue and self.waiting >= self.max_queue:
+            self.stats["rejected"] += 1
+            raise web.HTTPServiceUnavailable(
+                text=json.dumps({"error": "server busy, please try again. maximum pending requests exceeded"}),
+                content_type="application/json",
+            )
+        self.waiting += 1
+        try:
+            await self.slots.acquire()
+        finally:
+            self.waiting -= 1
+
+    def _answer(self, payload, prompt):
+        model = payload.get("model", "")
+        fmt = payload.get("format")
+        if fmt == "json":
+            fmt = schema_from_prompt(prompt, self.schemas) or JSON_FALLBACK_SCHEMA
+        if isinstance(fmt, dict):
+            return json.dumps(schema_instance(fmt, prompt_rng(prompt, model)), ensure_ascii=False)
+        return canned_completion(prompt, self.schemas, seed_parts=(model,))
+
+    def _stats(self, started, prompt, text):
+        prompt_tokens = estimate_tokens(prompt)
+        eval_tokens = estimate_tokens(text)
+        self.stats["prompt_tokens"] += prompt_tokens
+        self.stats["eval_tokens"] += eval_tokens
+        total = int((time.monotonic() - started) * 1e9)
+        return {
+            "done": True,
+            "done_reason": "stop",
+            "total_duration": total,
+            "load_duration": 0,
+            "prompt_eval_count": prompt_tokens,
+            "prompt_eval_duration": total // 4,
+            "eval_count": eval_tokens,
+            "eval_duration": total - total // 4,
+        }
+
+    async def _complete(self, request, kind, payload, prompt, wrap):
+        """Shared generate/chat path; ``wrap`` builds the per-chunk body."""
+        started = time.monotonic()
+        self.stats["requests"] += 1
+        await self._acquire()
+        try:
+            await asyncio.sleep(self.latency[kind](self.rng))
+            text = self._answer(payload, prompt)
+            pieces = re.findall(r"\S+\s*|\s+", text) or [""]
+            per_piece = 1.0 / self.tokens_per_sec if self.tokens_per_sec else 0.0
+            model = payload.get("model", DEFAULT_MODELS[0])
+
+            if payload.get("stream", True) is False:
+                await asyncio.sleep(per_piece * len(pieces))
+                body = {"model": model, "created_at": _now(), **wrap(text)}
+                body.update(self._stats(started, prompt, text))
+                return web.json_response(body)
+
+            resp = web.StreamResponse(headers={"Content-Type": "application/x-ndjson"})
+            await resp.prepare(request)
+            for piece in pieces:
+                await asyncio.sleep(per_piece)
+                chunk = {"model": model, "created_at": _now(), **wrap(piece), "done": False}
+                await resp.write((json.dumps(chunk, ensure_ascii=False) + "\n").encode("utf-8"))
+            final = {"model": model, "created_at": _now(), **wrap("")}
+            final.update(self._stats(started, prompt, text))
+            await resp.write((json.dumps(final) + "\n").encode("utf-8"))
+            await resp.write_eof()
+            return resp
+        finally:
+            self.slots.release()
+
+    async def generate(self, request):
+        payload = await request.json()
+        prompt = (payload.get("system") or "") + "\n" + payload.get("prompt", "")
+        return await self._complete(request, "generate", payload, prompt, lambda t: {"response": t})
+
+    async def chat(self, request):
+        payload = await request.json()
+        prompt = "\n".join(str(m.get("content", "")) for m in payload.get("messages", []))
+        return await self._complete(request, "chat", payload, prompt,
+                                    lambda t: {"message": {"role": "assistant", "content": t}})
+
+    async def _embed_texts(self, texts):
+        self.stats["requests"] += 1
+        await self._acquire()
+        try:
+            await asyncio.sleep(self.latency["embed"](self.rng) * max(1, len(texts)) ** 0.5)
+            self.stats["prompt_tokens"] += sum(estimate_tokens(t) for t in texts)
+            return [pseudo_embedding(t, self.dim) for t in texts]
+        finally:
+            self.slots.release()
+
+    async def embed(self, request):
+        payload = await request.json()
+        inputs = payload.get("input", "")
+        texts = [inputs] if isinstance(inputs, str) else list(inputs)
+        started = time.monotonic()
+        vectors = await self._embed_texts(texts)
+        return web.json_response({
+            "model": payload.get("model"),
+            "embeddings": vectors,
+            "total_duration": int((time.monotonic() - started) * 1e9),
+            "load_duration": 0,
+            "prompt_eval_count": sum(estimate_tokens(t) for t in texts),
+        })
+
+    async def embeddings_legacy(self, request):
+        payload = await request.json()
+        vectors = await self._embed_texts([payload.get("prompt", "")])
+        return web.json_response({"embedding": vectors[0]})
+
+    async def tags(self, request):
+        return web.json_response({"models": [
+            {"name": m, "model": m, "modified_at": _now(), "size": 0, "digest": hashlib.sha256(m.encode()).hexdigest()}
+            for m in DEFAULT_MODELS
+        ]})
+
+    async def show(self, request):
+        payload = await request.json()
+        return web.json_response({"modelfile": "", "parameters": "", "template": "",
+                                  "details": {"family": payload.get("model", "").split(":")[0]}})
+
+    async def version(self, request):
+        return web.json_response({"version": "0.0.0-mock"})
+
+    async def mock_stats(self, request):
+        return web.json_response(dict(self.stats, waiting=self.waiting))
+
+
+def build_app(mock):
+    app = web.Application(client_max_size=64 * 1024 ** 2)
+    app.router.add_post("/api/generate", mock.generate)
+    app.router.add_post("/api/chat", mock.chat)
+    app.router.add_post("/api/embed", mock.embed)
+    app.router.add_post("/api/embeddings", mock.embeddings_legacy)
+    app.router.add_get("/api/tags", mock.tags)
+    app.router.add_post("/api/show", mock.show)
+    app.router.add_get("/api/version", mock.version)
+    app.router.add_get("/mock/stats", mock.mock_stats)
+    app.router.add_get("/", lambda r: web.Response(text="Ollama is running"))
+    return app
+
+
+def parse_latency_args(items):
+    latency = dict(DEFAULT_LATENCY)
+    for item in items or []:
+        endpoint, _, spec = item.partition("=")
+        if endpoint not in latency:
+            raise SystemExit(f"Endpoint desconocido '{endpoint}' (usa {', '.join(latency)})")
+        parse_latency(spec)
+        latency[endpoint] = spec
+    return latency
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Ollama simulado para benchmarks sin GPU")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=11434)
+    parser.add_argument("--latency", action="append", metavar="ENDPOINT=SPEC",
+                        help="generate|chat|embed = fixed:ms | uniform:a:b | normal:mean:sd | lognormal:median:sigma")
+    parser.add_argument("--tokens-per-sec", type=float, default=40.0, help="0 = sin coste de generacion")
+    parser.add_argument("--num-parallel", type=int, default=4, help="Peticiones atendidas a la vez")
+    parser.add_argument("--max-queue", type=int, default=512, help="Peticiones en espera antes de 503 (0 = sin limite)")
+    parser.add_argument("--dim", type=int, default=4096, help="Dimension de los embeddings")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    schemas = load_workflow_schemas(load_workflow())
+    latency = parse_latency_args(args.latency)
+
+    mock = OllamaMock(schemas, latency, args.tokens_per_sec, args.num_parallel,
+                      args.max_queue, args.dim, args.seed)
+    app = build_app(mock)
+    print(f"Ollama simulado en http://{args.host}:{args.port}  ({len(schemas)} esquemas del workflow)")
+    print(f"  latencias: {latency}  tokens/s={args.tokens_per_sec}  paralelo={args.num_parallel}")
+    web.run_app(app, host=args.host, port=args.port, print=None)
+
+
+if __name__ == "__main__":
+    main()
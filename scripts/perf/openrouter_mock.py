@@ -0,0 +1,295 @@
+#!/usr/bin/env python3
+"""
+Sustituto local compatible con OpenRouter/OpenAI para los nodos lmChatOpenRouter.
+
+Responde /api/v1/chat/completions (y /v1/chat/completions) con fixtures
+indexados por plantilla de prompt: cada peticion se asocia al nodo chainLlm
+o agent que la genero comparando sus fragmentos literales con el texto del
+prompt (ver structured_output.py). Sin fixture, la respuesta se genera a
+partir del esquema del outputParserStructured conectado al nodo.
+
+Soporta streaming SSE e inyeccion de fallos del proveedor:
+  - limite de peticiones por minuto (429 con Retry-After y X-RateLimit-*),
+  - fraccion de 429 aleatorios,
+  - fraccion de respuestas lentas con su propia distribucion de latencia.
+
+Registra peticiones, 429 y tokens de prompt/completion por plantilla en
+/mock/stats y, al parar, en el fichero indicado con --record.
+
+Uso:
+    python scripts/perf/openrouter_mock.py --port 8787 --rpm 60 --error-rate 0.05 \\
+        --slow-rate 0.1 --slow-latency lognormal:15000:0.3 --record openrouter-stats.json
+    python scripts/perf/openrouter_mock.py --dump-fixtures fixtures.json
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import re
+import time
+import uuid
+
+from common import estimate_tokens, import_or_install, load_workflow, parse_latency, summarize, write_json
+from structured_output import (
+    canned_completion, load_prompt_templates, load_workflow_schemas, match_template, prompt_rng,
+)
+
+aiohttp = import_or_install("aiohttp")
+web = import_or_install("aiohttp.web", "aiohttp")
+
+UNMATCHED = "(sin plantilla)"
+
+
+def parser_schemas_by_node(workflow):
+    """Map each chain node to the schema of the output parser wired into it."""
+    schemas = load_workflow_schemas(workflow)
+    by_node = {}
+    for src, outputs in workflow['connections'].items():
+        if src not in schemas:
+            continue
+        for targets in outputs.get('ai_outputParser', []):
+            for target in targets:
+                by_node[target['node']] = schemas[src]
+    return by_node
+
+
+def default_fixtures(workflow):
+    """One generated response per prompt template, as a starting fixture file."""
+    schemas = parser_schemas_by_node(workflow)
+    fixtures = {}
+    for name in load_prompt_templates(workflow):
+        schema = schemas.get(name)
+        if schema is not None:
+            schema = {"type": "object", "properties": {"output": schema}, "required": ["output"]}
+        fixtures[name] = [canned_completion(name, schema=schema)]
+    return fixtures
+
+
+class RateLimiter:
+    """Token bucket refilled at ``rpm`` requests per minute."""
+
+    def __init__(self, rpm, burst=None):
+        self.rate = rpm / 60.0
+        self.capacity = burst or max(1, rpm // 6)
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+
+    def try_acquire(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return True, 0.0
+        return False, (1 - self.tokens) / self.rate
+
+
+class TemplateStats:
+    def __init__(self):
+        self.requests = 0
+        self.completed = 0
+        self.rate_limited = 0
+        self.slow = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.latency_ms = []
+
+    def as_dict(self):
+        return {
+            "requests": self.requests,
+            "completed": self.completed,
+            "rate_limited": self.rate_limited,
+            "slow": self.slow,
+            "prompt_tokens": self.prompt_tokens,
+            "completion_tokens": self.completion_tokens,
+            "latency_ms": summarize(self.latency_ms),
+        }
+
+
+class OpenRouterMock:
+    def __init__(self, templates, fixtures, schemas, latency, slow_latency, slow_rate,
+                 error_rate, rpm, tokens_per_sec, seed):
+        self.templates = templates
+        self.fixtures = fixtures
+        self.schemas = schemas
+        self.latency = parse_latency(latency)
+        self.slow_latency = parse_latency(slow_latency)
+        self.slow_rate = slow_rate
+        self.error_rate = error_rate
+        self.limiter = RateLimiter(rpm) if rpm else None
+        self.tokens_per_sec = tokens_per_sec
+        self.rng = random.Random(seed)
+        self.stats = {}
+
+    def _stats_for(self, template):
+        return self.stats.setdefault(template or UNMATCHED, TemplateStats())
+
+    def _content(self, template, prompt, model):
+        options = self.fixtures.get(template) if template else None
+        if options:
+            if isinstance(options, str):
+                return options
+            return options[prompt_rng(prompt).randrange(len(options))]
+        schema = self.schemas.get(template)
+        if schema is not None:
+            schema = {"type": "object", "properties": {"output": schema}, "required": ["output"]}
+        return canned_completion(prompt, schema=schema, seed_parts=(model,))
+
+    def _rate_limited(self, stats, retry_after, reason):
+        stats.rate_limited += 1
+        reset_ms = int((time.time() + retry_after) * 1000)
+        return web.json_response(
+            {"error": {"code": 429, "message": f"Rate limit exceeded: {reason}", "metadata": {}}},
+            status=429,
+            headers={
+                "Retry-After": str(max(1, round(retry_after))),
+                "X-RateLimit-Limit": str(self.limiter.capacity if self.limiter else 0),
+                "X-RateLimit-Remaining": "0",
+                "X-RateLimit-Reset": str(reset_ms),
+            },
+        )
+
+    async def chat_completions(self, request):
+        started = time.monotonic()
+        payload = await request.json()
+        messages = payload.get("messages", [])
+        prompt = "\n".join(m["content"] if isinstance(m.get("content"), str) else json.dumps(m.get("content"))
+                           for m in messages)
+        model = payload.get("model", "openrouter/mock")
+        template = match_template(prompt, self.templates)
+        stats = self._stats_for(template)
+        stats.requests += 1
+
+        if self.limiter:
+            ok, retry_after = self.limiter.try_acquire()
+            if not ok:
+                return self._rate_limited(stats, retry_after, "requests per minute")
+        if self.rng.random() < self.error_rate:
+            return self._rate_limited(stats, self.rng.uniform(1, 5), "upstream provider throttled")
+
+        if self.rng.random() < self.slow_rate:
+            stats.slow += 1
+            await asyncio.sleep(self.slow_latency(self.rng))
+        else:
+            await asyncio.sleep(self.latency(self.rng))
+
+        content = self._content(template, prompt, model)
+        usage = {
+            "prompt_tokens": estimate_tokens(prompt),
+            "completion_tokens": estimate_tokens(content),
+        }
+        usage["total_tokens"] = usage["prompt_tokens"] + usage["completion_tokens"]
+        stats.prompt_tokens += usage["prompt_tokens"]
+        stats.completion_tokens += usage["completion_tokens"]
+
+        completion_id = f"gen-{uuid.uuid4().hex[:24]}"
+        created = int(time.time())
+        per_piece = 1.0 / self.tokens_per_sec if self.tokens_per_sec else 0.0
+
+        if not payload.get("stream"):
+            await asyncio.sleep(per_piece * usage["completion_tokens"])
+            stats.completed += 1
+            stats.latency_ms.append((time.monotonic() - started) * 1000)
+            return web.json_response({
+                "id": completion_id,
+                "object": "chat.completion",
+                "created": created,
+                "model": model,
+                "provider": "mock",
+                "choices": [{
+                    "index": 0,
+                    "message": {"role": "assistant", "content": content},
+                    "finish_reason": "stop",
+                }],
+                "usage": usage,
+            })
+
+        resp = web.StreamResponse(headers={"Content-Type": "text/event-stream", "Cache-Control": "no-cache"})
+        await resp.prepare(request)
+
+        def chunk(delta, finish_reason=None, **extra):
+            body = {
+                "id": completion_id,
+                "object": "chat.completion.chunk",
+                "created": created,
+                "model": model,
+                "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+                **extra,
+            }
+            return f"data: {json.dumps(body, ensure_ascii=False)}\n\n".encode("utf-8")
+
+        await resp.write(chunk({"role": "assistant", "content": ""}))
+        for piece in re.findall(r"\S+\s*|\s+", content):
+            await asyncio.sleep(per_piece)
+            await resp.write(chunk({"content": piece}))
+        await resp.write(chunk({}, "stop", usage=usage))
+        await resp.write(b"data: [DONE]\n\n")
+        await resp.write_eof()
+        stats.completed += 1
+        stats.latency_ms.append((time.monotonic() - started) * 1000)
+        return resp
+
+    async def models(self, request):
+        return web.json_response({"data": [{"id": "openrouter/mock", "name": "Mock", "context_length": 128000}]})
+
+    def snapshot(self):
+        return {name: s.as_dict() for name, s in sorted(self.stats.items())}
+
+    async def mock_stats(self, request):
+        return web.json_response(self.snapshot())
+
+
+def build_app(mock, record=None):
+    app = web.Application(client_max_size=64 * 1024 ** 2)
+    for prefix in ("/api/v1", "/v1", ""):
+        app.router.add_post(f"{prefix}/chat/completions", mock.chat_completions)
+        app.router.add_get(f"{prefix}/models", mock.models)
+    app.router.add_get("/mock/stats", mock.mock_stats)
+    if record:
+        async def save_stats(app):
+            write_json(record, mock.snapshot())
+            print(f"Estadisticas guardadas en {record}")
+        app.on_cleanup.append(save_stats)
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description="OpenRouter simulado para los nodos lmChatOpenRouter")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8787)
+    parser.add_argument("--fixtures", help="JSON {plantilla: respuesta | [respuestas]}")
+    parser.add_argument("--dump-fixtures", metavar="PATH", help="Escribir fixtures por defecto y salir")
+    parser.add_argument("--latency", default="lognormal:1200:0.4", help="Latencia hasta el primer token")
+    parser.add_argument("--slow-rate", type=float, default=0.0, help="Fraccion de respuestas lentas")
+    parser.add_argument("--slow-latency", default="lognormal:20000:0.3")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraccion de 429 aleatorios")
+    parser.add_argument("--rpm", type=int, default=0, help="Limite de peticiones/minuto (0 = sin limite)")
+    parser.add_argument("--tokens-per-sec", type=float, default=80.0)
+    parser.add_argument("--record", help="Guardar estadisticas por plantilla al parar")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    workflow = load_workflow()
+    if args.dump_fixtures:
+        write_json(args.dump_fixtures, default_fixtures(workflow))
+        print(f"Fixtures escritos en {args.dump_fixtures}")
+        return
+
+    fixtures = {}
+    if args.fixtures:
+        with open(args.fixtures, 'r', encoding='utf-8') as f:
+            fixtures = json.load(f)
+
+    templates = load_prompt_templates(workflow)
+    mock = OpenRouterMock(templates, fixtures, parser_schemas_by_node(workflow), args.latency,
+                          args.slow_latency, args.slow_rate, args.error_rate, args.rpm,
+                          args.tokens_per_sec, args.seed)
+    print(f"OpenRouter simulado en http://{args.host}:{args.port}/api/v1  "
+          f"({len(templates)} plantillas, {len(fixtures)} fixtures)")
+    print(f"  rpm={args.rpm or '-'} error_rate={args.error_rate} slow_rate={args.slow_rate}")
+    web.run_app(build_app(mock, args.record), host=args.host, port=args.port, print=None)
+
+
+if __name__ == "__main__":
+    main()
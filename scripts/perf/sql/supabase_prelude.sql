@@ -0,0 +1,51 @@
+-- ============================================================
+-- Preludio Supabase para Postgres local (benchmarks)
+-- ============================================================
+-- Reproduce lo minimo que bbdd.sql y migrations/ esperan de
+-- Supabase: extensiones, roles anon/authenticated/service_role
+-- y el schema auth con auth.users y auth.uid()/role()/jwt().
+-- Safe: usa IF NOT EXISTS / OR REPLACE en todo
+-- ============================================================
+
+CREATE EXTENSION IF NOT EXISTS pgcrypto;
+CREATE EXTENSION IF NOT EXISTS vector;
+
+DO $$
+BEGIN
+  IF NOT EXISTS (SELECT 1 FROM pg_roles WHERE rolname = 'anon') THEN
+    CREATE ROLE anon NOLOGIN;
+  END IF;
+  IF NOT EXISTS (SELECT 1 FROM pg_roles WHERE rolname = 'authenticated') THEN
+    CREATE ROLE authenticated NOLOGIN;
+  END IF;
+  IF NOT EXISTS (SELECT 1 FROM pg_roles WHERE rolname = 'service_role') THEN
+    CREATE ROLE service_role NOLOGIN BYPASSRLS;
+  END IF;
+END $$;
+
+CREATE SCHEMA IF NOT EXISTS auth;
+
+CREATE TABLE IF NOT EXISTS auth.users (
+  id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+  email TEXT UNIQUE,
+  raw_user_meta_data JSONB DEFAULT '{}'::jsonb,
+  created_at TIMESTAMPTZ DEFAULT now()
+);
+
+-- Mismo contrato que GoTrue/PostgREST: los claims llegan por GUC
+CREATE OR REPLACE FUNCTION auth.jwt() RETURNS JSONB
+LANGUAGE sql STABLE AS $$
+  SELECT COALESCE(NULLIF(current_setting('request.jwt.claims', true), ''), '{}')::jsonb
+$$;
+
+CREATE OR REPLACE FUNCTION auth.uid() RETURNS UUID
+LANGUAGE sql STABLE AS $$
+  SELECT NULLIF(auth.jwt() ->> 'sub', '')::uuid
+$$;
+
+CREATE OR REPLACE FUNCTION auth.role() RETURNS TEXT
+LANGUAGE sql STABLE AS $$
+  SELECT COALESCE(auth.jwt() ->> 'role', 'service_role')
+$$;
+
+GRANT USAGE ON SCHEMA auth TO anon, authenticated, service_role;
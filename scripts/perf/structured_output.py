@@ -0,0 +1,152 @@
+"""
+Salidas LLM simuladas y reconocimiento de las plantillas de prompt del workflow.
+
+Los parsers estructurados de n8n anaden al prompt sus "format instructions"
+con el JSON Schema dentro de un bloque ```json. Los servicios simulados lo
+extraen del prompt y generan una instancia valida; si el prompt no lo trae
+(p.ej. Ollama con ``format``), se busca entre los esquemas declarados en el
+workflow cuyas propiedades obligatorias aparezcan en el prompt.
+
+Las plantillas de los nodos chainLlm/agent se reducen a sus fragmentos
+literales (sin expresiones ``{{ }}``) para identificar que nodo envio un
+prompt: lo usan los fixtures del OpenRouter simulado y la contabilidad de
+tokens por nodo.
+"""
+
+import hashlib
+import json
+import random
+import re
+
+from common import find_nodes
+
+SCHEMA_BLOCK = re.compile(r"```(?:json)?\s*(\{.*?\})\s*```", re.DOTALL)
+EXPRESSION = re.compile(r"\{\{.*?\}\}", re.DOTALL)
+MIN_FRAGMENT = 24
+
+WORDS = (
+    "requisito cumple oferta tecnica proveedor alcance ingenieria entregable "
+    "plazo calidad riesgo documentacion seguridad precio hito garantia"
+).split()
+
+
+def load_workflow_schemas(workflow):
+    """Return ``{parser node name: JSON schema}`` for every structured parser."""
+    schemas = {}
+    for node in find_nodes(workflow, "outputParserStructured"):
+        raw = node['parameters'].get('inputSchema') or node['parameters'].get('jsonSchemaExample')
+        if not raw:
+            continue
+        try:
+            schemas[node['name']] = json.loads(raw)
+        except ValueError:
+            continue
+    return schemas
+
+
+def _literal_fragments(template):
+    if template.startswith("="):
+        template = template[1:]
+    fragments = []
+    for part in EXPRESSION.split(template):
+        for line in part.splitlines():
+            line = line.strip()
+            if len(line) >= MIN_FRAGMENT:
+                fragments.append(line)
+    return fragments
+
+
+def load_prompt_templates(workflow):
+    """Return ``{node name: [literal fragments]}`` for every LLM chain/agent."""
+    templates = {}
+    for node in find_nodes(workflow, "chainLlm") + find_nodes(workflow, "agent"):
+        params = node['parameters']
+        parts = [params.get('text', '')]
+        parts += [m.get('message', '') for m in params.get('messages', {}).get('messageValues', [])]
+        parts.append(params.get('options', {}).get('systemMessage', ''))
+        fragments = [f for part in parts if part for f in _literal_fragments(part)]
+        if fragments:
+            templates[node['name']] = fragments
+    return templates
+
+
+def match_template(prompt, templates, min_score=0.5):
+    """Name of the template whose fragments best cover ``prompt``, or None."""
+    best, best_score = None, 0.0
+    for name, fragments in templates.items():
+        score = sum(1 for f in fragments if f in prompt) / len(fragments)
+        if score > best_score:
+            best, best_score = name, score
+    return best if best_score >= min_score else None
+
+
+def _schema_keys(schema):
+    if schema.get("type") == "array":
+        schema = schema.get("items", {})
+    return schema.get("required") or list(schema.get("properties", {}))
+
+
+def schema_from_prompt(prompt, known_schemas=None):
+    """Find the JSON schema the caller expects, or None for free text."""
+    for block in reversed(SCHEMA_BLOCK.findall(prompt)):
+        try:
+            candidate = json.loads(block)
+        except ValueError:
+            continue
+        if isinstance(candidate, dict) and ("type" in candidate or "properties" in candidate):
+            return candidate
+    for schema in (known_schemas or {}).values():
+        keys = _schema_keys(schema)
+        if keys and all(k in prompt for k in keys):
+            # n8n >= 1.2 wraps the parser schema under "output".
+            return {"type": "object", "properties": {"output": schema}, "required": ["output"]}
+    return None
+
+
+def prompt_rng(*parts):
+    """Deterministic RNG seeded by the request content."""
+    digest = hashlib.sha256("\0".join(parts).encode("utf-8")).digest()
+    return random.Random(int.from_bytes(digest[:8], "big"))
+
+
+def _sentence(rng, n_words=8):
+    return " ".join(rng.choice(WORDS) for _ in range(n_words)).capitalize() + "."
+
+
+def schema_instance(schema, rng, depth=0):
+    """Generate a value that validates against ``schema``."""
+    if "enum" in schema:
+        return rng.choice(schema["enum"])
+    kind = schema.get("type", "object" if "properties" in schema else "string")
+    if isinstance(kind, list):
+        kind = next((k for k in kind if k != "null"), "string")
+    if kind == "object":
+        out = {}
+        for name, sub in schema.get("properties", {}).items():
+            out[name] = schema_instance(sub, rng, depth + 1)
+        extra = schema.get("additionalProperties")
+        if isinstance(extra, dict) and depth < 4:
+            for i in range(rng.randint(2, 4)):
+                out[f"{rng.choice(WORDS)}_{i}"] = schema_instance(extra, rng, depth + 1)
+        return out
+    if kind == "array":
+        lo = schema.get("minItems", 1)
+        hi = schema.get("maxItems", max(lo, 3))
+        items = schema.get("items", {"type": "string"})
+        return [schema_instance(items, rng, depth + 1) for _ in range(rng.randint(lo, hi))]
+    if kind == "number":
+        return round(rng.uniform(schema.get("minimum", 0), schema.get("maximum", 10)), 2)
+    if kind == "integer":
+        return rng.randint(int(schema.get("minimum", 0)), int(schema.get("maximum", 10)))
+    if kind == "boolean":
+        return rng.random() < 0.7
+    return _sentence(rng)
+
+
+def canned_completion(prompt, known_schemas=None, schema=None, seed_parts=()):
+    """Return the text a model would answer with for ``prompt``."""
+    rng = prompt_rng(prompt, *seed_parts)
+    schema = schema or schema_from_prompt(prompt, known_schemas)
+    if schema is None:
+        return " ".join(_sentence(rng, rng.randint(6, 14)) for _ in range(rng.randint(3, 6)))
+    return "```json\n" + json.dumps(schema_instance(schema, rng), ensure_ascii=False, indent=2) + "\n```"
@@ -0,0 +1,438 @@
+#!/usr/bin/env python3
+"""
+Generador de carga asyncio para los once webhooks del workflow.
+
+Cada flujo tiene un constructor de payload con la misma forma que envia el
+frontend (front-rfq/src/services): PDFs de demo-pdfs en base64 para
+``ofertas`` e ``ingesta-rfq``, IDs de proyecto y proveedores para scoring,
+Q&A y correo, preguntas variadas para el chat, etc. Con --synthetic-offers
+las ofertas se generan en memoria bajo demanda (generate_demo_pdfs), sin
+limite de documentos distintos ni paso por disco.
+
+Dos modelos de concurrencia:
+  closed  N usuarios virtuales que lanzan la siguiente peticion al recibir
+          la respuesta (mas un tiempo de reflexion opcional).
+  open    llegadas de Poisson a una tasa fija, independientes de las
+          respuestas; --max-inflight limita las peticiones en vuelo y las
+          llegadas por encima se cuentan como descartadas.
+
+La latencia de cada peticion va desde el envio hasta leer la respuesta
+completa (cualquier codigo HTTP). Los timeouts y errores de conexion no
+tienen respuesta: se cuentan aparte y no entran en los percentiles. El
+informe da p50/p95/p99, timeouts, errores por codigo y rendimiento por
+flujo, y se puede guardar en JSON y comparar con una ejecucion anterior
+(--baseline).
+
+Uso:
+    python scripts/perf/webhook_load.py --base-url http://localhost:5678/webhook \\
+        --mix ofertas=1,scoring-evaluation=1,chat-rfq=4 --mode closed --concurrency 8 --duration 120 \\
+        --project-id 3f0b... --json carga.json
+    python scripts/perf/webhook_load.py --mode open --rate 2 --flows chat-rfq --baseline carga.json
+"""
+
+import argparse
+import asyncio
+import base64
+import glob
+import json
+import os
+import random
+import re
+import sys
+import threading
+import time
+import uuid
+from collections import Counter, defaultdict
+
+from common import DEMO_PDFS_DIR, import_or_install, summarize, write_json
+
+aiohttp = import_or_install("aiohttp")
+
+FLOWS = [
+    "ofertas", "ingesta-rfq", "scoring-evaluation", "qa-audit-generator", "qa-send-to-supplier",
+    "qa-process-responses", "qa-process-email-response", "chat-rfq", "rfp-generate", "mail",
+    "qa-send-email",
+]
+DEFAULT_PROVIDERS = ["IDOM", "SACYR", "TECNICASREUNIDAS", "EA", "SENER", "TRESCA", "WORLEY"]
+EVALUATION_BY_PREFIX = {
+    "Oferta_Tecnica": "Technical Evaluation",
+    "Oferta_Economica": "Economical Evaluation",
+    "Oferta_Compliance": "Technical Evaluation",
+}
+CHAT_QUESTIONS = [
+    "Que proveedor tiene el precio total mas bajo?",
+    "Compara el plazo de ejecucion de todas las ofertas.",
+    "Resume los principales riesgos tecnicos de la oferta de {provider}.",
+    "Que certificaciones ISO presenta {provider}?",
+    "Cumple {provider} los requisitos de HSE del pliego?",
+    "Cual es el TCO a 10 anos de cada proveedor?",
+    "Lista los entregables FEED que faltan en la oferta de {provider}.",
+]
+EMAIL_ANSWERS = [
+    "Confirmamos que el alcance incluye la ingenieria de detalle de las unidades de proceso.",
+    "El plazo de entrega se mantiene en 14 meses desde la firma del contrato.",
+    "Adjuntamos el certificado ISO 45001 vigente y el plan HSE revisado.",
+    "Las condiciones de pago propuestas son 30/40/30 por hitos.",
+]
+
+
+class PayloadFactory:
+    """Builds request bodies for each webhook, mirroring the frontend."""
+
+    def __init__(self, project_ids, providers, language, currency, pdf_dir, seed, synthetic_pages=None):
+        self.project_ids = project_ids or [str(uuid.UUID(int=random.Random(seed).getrandbits(128)))]
+        self.providers = providers
+        self.language = language
+        self.currency = currency
+        self.rng = random.Random(seed)
+        self.rfq_pdfs = self._load_pdfs(os.path.join(pdf_dir, "RFP", "*.pdf"))
+        self.offer_pdfs = self._load_pdfs(os.path.join(pdf_dir, "Supplier_*", "*.pdf"))
+        self.synthetic = None
+        if synthetic_pages is not None:
+            self.synthetic = synthetic_offers(synthetic_pages, seed)
+            self.synthetic_lock = threading.Lock()
+
+    @staticmethod
+    def _load_pdfs(pattern):
+        # Encoded once: base64 of a multi-MB PDF is not free per request.
+        pdfs = []
+        for path in sorted(glob.glob(pattern)):
+            with open(path, 'rb') as f:
+                pdfs.append((path, base64.b64encode(f.read()).decode("ascii")))
+        return pdfs
+
+    def _common(self):
+        return {"project_id": self.rng.choice(self.project_ids), "language": self.language,
+                "currency": self.currency}
+
+    def _provider(self):
+        return self.rng.choice(self.providers)
+
+    def _file(self, pdfs, flow):
+        if not pdfs:
+            raise SystemExit(f"No hay PDFs para '{flow}' (ejecuta demo-pdfs/generate_demo_pdfs.py)")
+        path, encoded = self.rng.choice(pdfs)
+        file_id = f"rfq-{int(time.time() * 1000)}-{self.rng.randrange(10 ** 6)}"
+        return path, file_id, {"file_id": file_id, "file_title": os.path.basename(path),
+                               "file_url": "", "file_binary": encoded}
+
+    def _synthetic_file(self):
+        # Rendered on demand and dropped after sending: memory stays flat however long the run.
+        with self.synthetic_lock:
+            doc = next(self.synthetic)
+        file_id = f"rfq-{int(time.time() * 1000)}-{self.rng.randrange(10 ** 6)}"
+        return doc["name"], file_id, {"file_id": file_id, "file_title": os.path.basename(doc["name"]),
+                                      "file_url": "", "file_binary": base64.b64encode(doc["data"]).decode("ascii")}
+
+    def ofertas(self):
+        if self.synthetic is not None:
+            path, file_id, body = self._synthetic_file()
+        else:
+            path, file_id, body = self._file(self.offer_pdfs, "ofertas")
+        common = self._common()
+        folder = os.path.basename(os.path.dirname(path))
+        index = int(folder.rsplit("_", 1)[-1]) - 1 if folder[-1:].isdigit() else 0
+        provider = self.providers[index % len(self.providers)]
+        prefix = re.sub(r"_S\d+$", "", os.path.splitext(os.path.basename(path))[0])
+        evaluation = [EVALUATION_BY_PREFIX.get(prefix, "Others")]
+        body.update(common, project_type="RFP", metadata={
+            "uploadedAt": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            "fileName": body["file_title"],
+            "fileSize": len(body["file_binary"]) * 3 // 4,
+            "fileId": file_id,
+            "project_id": common["project_id"],
+            "proveedor": provider,
+            "tipoEvaluacion": evaluation,
+            # "Code in JavaScript1" reads metadata.evaluation to pick VALIDADOR mode.
+            "evaluation": evaluation,
+            "language": self.language,
+            "currency": self.currency,
+            "project_type": "RFP",
+        })
+        return body
+
+    def ingesta_rfq(self):
+        path, _, body = self._file(self.rfq_pdfs, "ingesta-rfq")
+        body.update(self._common(), project_name=os.path.splitext(body["file_title"])[0], project_type="RFP")
+        return body
+
+    def scoring_evaluation(self):
+        body = self._common()
+        if self.rng.random() < 0.5:
+            body["provider_name"] = self._provider()
+        else:
+            body["recalculate_all"] = True
+        return body
+
+    def qa_audit_generator(self):
+        return dict(self._common(), provider=self._provider(), project_type="RFP")
+
+    def _question_ids(self):
+        return [str(uuid.UUID(int=self.rng.getrandbits(128))) for _ in range(self.rng.randint(3, 12))]
+
+    def qa_send_to_supplier(self):
+        provider = self._provider()
+        return dict(self._common(), provider_name=provider, question_ids=self._question_ids(),
+                    email_to=f"ofertas@{provider.lower()}.example.com", expires_days=7)
+
+    def qa_process_responses(self):
+        return {
+            "token": uuid.UUID(int=self.rng.getrandbits(128)).hex,
+            "action": "save_responses",
+            "responses": [{"question_id": q, "response_text": self.rng.choice(EMAIL_ANSWERS)}
+                          for q in self._question_ids()],
+        }
+
+    def qa_process_email_response(self):
+        answers = self.rng.sample(EMAIL_ANSWERS, self.rng.randint(1, len(EMAIL_ANSWERS)))
+        content = "Estimados,\n\n" + "\n\n".join(f"{i}. {a}" for i, a in enumerate(answers, 1))
+        return dict(self._common(), provider_name=self._provider(), email_content=content + "\n\nSaludos.")
+
+    def chat_rfq(self):
+        common = self._common()
+        question = self.rng.choice(CHAT_QUESTIONS).format(provider=self._provider())
+        return dict(common, action="sendMessage", chatInput=question,
+                    sessionId=f"{common['project_id']}-{self.rng.randrange(50)}", user_email="")
+
+    def rfp_generate(self):
+        return dict(self._common(), action="generate_rfp", project_name="Planta de procesamiento de gas",
+                    project_type="RFP", description="Ingenieria FEED de una planta de tratamiento de gas natural.",
+                    requirements="Capacidad 5 MMSCMD; cumplimiento ASME/API; plan HSE; plazo 14 meses.",
+                    sections=["scope", "technical", "commercial", "hse"],
+                    criteria=["Technical Evaluation", "Economical Evaluation"],
+                    deadlines={"questions": "2025-06-15", "submission": "2025-07-01"},
+                    providers=self.rng.sample(self.providers, min(4, len(self.providers))))
+
+    def mail(self):
+        return dict(self._common(), project_name="Planta de procesamiento de gas", provider_key=self._provider(),
+                    tone=self.rng.choice(["formal", "neutral"]),
+                    qa_items=[{"question": q, "priority": "High"} for q in self._question_ids()[:3]])
+
+    def qa_send_email(self):
+        provider = self._provider()
+        return dict(self._common(), project_name="Planta de procesamiento de gas", provider_name=provider,
+                    question_ids=self._question_ids(), to=f"ofertas@{provider.lower()}.example.com",
+                    subject="Aclaraciones tecnicas", body="Por favor responda a las preguntas adjuntas.")
+
+    def build(self, flow):
+        return getattr(self, flow.replace("-", "_"))()
+
+
+def synthetic_offers(pages, seed):
+    """Endless lazy stream of generated offers from demo-pdfs/generate_demo_pdfs.py."""
+    sys.path.insert(0, DEMO_PDFS_DIR)
+    import generate_demo_pdfs
+    return generate_demo_pdfs.iter_documents(None, len(DEFAULT_PROVIDERS), pages or None, seed,
+                                             kinds=generate_demo_pdfs.SUPPLIER_GENERATORS)
+
+
+class FlowStats:
+    def __init__(self):
+        self.latency_ms = []
+        self.statuses = Counter()
+        self.errors = Counter()
+        self.bytes_sent = 0
+
+    def as_dict(self, elapsed):
+        ok = sum(n for s, n in self.statuses.items() if 200 <= s < 300)
+        total = sum(self.statuses.values()) + sum(self.errors.values())
+        return {
+            "requests": total,
+            "ok": ok,
+            "errors": total - ok,
+            "timeouts": self.errors["timeout"],
+            "error_rate": (total - ok) / total if total else 0.0,
+            "throughput_rps": ok / elapsed if elapsed else 0.0,
+            "latency_ms": summarize(self.latency_ms),
+            "status": {str(s): n for s, n in sorted(self.statuses.items())},
+            "exceptions": dict(self.errors),
+            "mb_sent": round(self.bytes_sent / 1024 ** 2, 2),
+        }
+
+
+class LoadRunner:
+    def __init__(self, base_url, suffix, factory, mix, timeout, seed):
+        self.base_url = base_url.rstrip("/")
+        self.suffix = suffix
+        self.factory = factory
+        self.flows, self.weights = zip(*mix.items())
+        self.timeout = aiohttp.ClientTimeout(total=timeout)
+        self.rng = random.Random(seed)
+        self.stats = defaultdict(FlowStats)
+        self.dropped = 0
+
+    def pick(self):
+        return self.rng.choices(self.flows, self.weights)[0]
+
+    async def fire(self, session, flow):
+        if flow == "ofertas" and self.factory.synthetic is not None:
+            # Rendering a PDF takes long enough to stall the event loop.
+            payload = await asyncio.to_thread(self.factory.build, flow)
+        else:
+            payload = self.factory.build(flow)
+        body = json.dumps(payload).encode("utf-8")
+        stats = self.stats[flow]
+        stats.bytes_sent += len(body)
+        started = time.monotonic()
+        try:
+            async with session.post(f"{self.base_url}/{flow}{self.suffix}", data=body,
+                                    headers={"Content-Type": "application/json"}) as resp:
+                await resp.read()
+                stats.statuses[resp.status] += 1
+        except asyncio.TimeoutError:
+            stats.errors["timeout"] += 1
+            return
+        except aiohttp.ClientError as e:
+            stats.errors[type(e).__name__] += 1
+            return
+        # Only answered requests: a timeout would just report --timeout as a latency
+        stats.latency_ms.append((time.monotonic() - started) * 1000)
+
+    async def closed_loop(self, session, concurrency, deadline, max_requests, think_ms):
+        issued = 0
+
+        async def user():
+            nonlocal issued
+            while time.monotonic() < deadline and (not max_requests or issued < max_requests):
+                issued += 1
+                await self.fire(session, self.pick())
+                if think_ms:
+                    await asyncio.sleep(self.rng.expovariate(1000.0 / think_ms))
+
+        await asyncio.gather(*(user() for _ in range(concurrency)))
+
+    async def open_loop(self, session, rate, deadline, max_requests, max_inflight):
+        inflight = set()
+        issued = 0
+        next_at = time.monotonic()
+        while time.monotonic() < deadline and (not max_requests or issued < max_requests):
+            next_at += self.rng.expovariate(rate)
+            await asyncio.sleep(max(0.0, next_at - time.monotonic()))
+            issued += 1
+            if max_inflight and len(inflight) >= max_inflight:
+                self.dropped += 1
+                continue
+            task = asyncio.ensure_future(self.fire(session, self.pick()))
+            inflight.add(task)
+            task.add_done_callback(inflight.discard)
+        if inflight:
+            await asyncio.gather(*inflight)
+
+    async def run(self, args):
+        connector = aiohttp.TCPConnector(limit=0)
+        deadline = time.monotonic() + args.duration
+        started = time.monotonic()
+        async with aiohttp.ClientSession(connector=connector, timeout=self.timeout) as session:
+            if args.mode == "closed":
+                await self.closed_loop(session, args.concurrency, deadline, args.requests, args.think_ms)
+            else:
+                await self.open_loop(session, args.rate, deadline, args.requests, args.max_inflight)
+        return time.monotonic() - started
+
+    def report(self, elapsed, args):
+        flows = {flow: self.stats[flow].as_dict(elapsed) for flow in self.flows if flow in self.stats}
+        all_latency = [v for s in self.stats.values() for v in s.latency_ms]
+        ok = sum(f["ok"] for f in flows.values())
+        total = sum(f["requests"] for f in flows.values())
+        timeouts = sum(f["timeouts"] for f in flows.values())
+        return {
+            "config": {
+                "base_url": self.base_url, "suffix": self.suffix, "mode": args.mode,
+                "concurrency": args.concurrency if args.mode == "closed" else None,
+                "rate": args.rate if args.mode == "open" else None,
+                "duration_s": args.duration, "mix": dict(zip(self.flows, self.weights)),
+            },
+            "elapsed_s": elapsed,
+            "total": {"requests": total, "ok": ok, "errors": total - ok, "timeouts": timeouts,
+                      "dropped": self.dropped,
+                      "throughput_rps": ok / elapsed if elapsed else 0.0,
+                      "latency_ms": summarize(all_latency)},
+            "flows": flows,
+        }
+
+
+def parse_mix(args):
+    if args.mix:
+        mix = {}
+        for item in args.mix.split(","):
+            flow, _, weight = item.partition("=")
+            mix[flow.strip()] = float(weight or 1)
+    else:
+        mix = {flow: 1.0 for flow in (args.flows.split(",") if args.flows else FLOWS)}
+    unknown = set(mix) - set(FLOWS)
+    if unknown:
+        raise SystemExit(f"Flujos desconocidos: {', '.join(sorted(unknown))} (validos: {', '.join(FLOWS)})")
+    return mix
+
+
+def print_report(report, baseline=None):
+    print(f"\n{'Flujo':28s} {'Peticiones':>10s} {'Errores':>8s} {'Timeouts':>8s} {'req/s':>7s} "
+          f"{'p50 ms':>9s} {'p95 ms':>9s} {'p99 ms':>9s}")
+    print("-" * 95)
+    rows = list(report["flows"].items()) + [("TOTAL", report["total"])]
+    for flow, s in rows:
+        lat = s["latency_ms"]
+        line = (f"{flow:28s} {s['requests']:>10d} {s['errors']:>8d} {s.get('timeouts', 0):>8d} "
+                f"{s['throughput_rps']:>7.2f} "
+                f"{lat['p50']:>9.0f} {lat['p95']:>9.0f} {lat['p99']:>9.0f}")
+        ref = (baseline or {}).get("flows", {}).get(flow) if flow != "TOTAL" else (baseline or {}).get("total")
+        if ref and ref["latency_ms"]["p95"]:
+            delta = (lat["p95"] - ref["latency_ms"]["p95"]) / ref["latency_ms"]["p95"] * 100
+            line += f"   p95 {delta:+.1f}%"
+        print(line)
+    if report["total"]["timeouts"]:
+        print(f"\nTimeouts (fuera de los percentiles): {report['total']['timeouts']}")
+    if report["total"]["dropped"]:
+        print(f"\nDescartadas por --max-inflight: {report['total']['dropped']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Carga sobre los webhooks del workflow")
+    parser.add_argument("--base-url", default="http://localhost:5678/webhook")
+    parser.add_argument("--suffix", default="", help="Sufijo de ruta, p.ej. -desarrollo")
+    parser.add_argument("--flows", help=f"Lista separada por comas (por defecto los {len(FLOWS)})")
+    parser.add_argument("--mix", help="Pesos por flujo: ofertas=1,chat-rfq=5")
+    parser.add_argument("--mode", choices=["closed", "open"], default="closed")
+    parser.add_argument("--concurrency", type=int, default=4, help="Usuarios virtuales (closed)")
+    parser.add_argument("--think-ms", type=float, default=0.0, help="Reflexion media entre peticiones (closed)")
+    parser.add_argument("--rate", type=float, default=1.0, help="Llegadas por segundo (open)")
+    parser.add_argument("--max-inflight", type=int, default=0, help="Limite en vuelo (open, 0 = sin limite)")
+    parser.add_argument("--duration", type=float, default=60.0, help="Segundos de carga")
+    parser.add_argument("--requests", type=int, default=0, help="Maximo de peticiones (0 = sin limite)")
+    parser.add_argument("--timeout", type=float, default=1800.0, help="Timeout por peticion (s)")
+    parser.add_argument("--project-id", action="append", help="Repetible; por defecto un UUID fijo")
+    parser.add_argument("--providers", default=",".join(DEFAULT_PROVIDERS))
+    parser.add_argument("--language", default="es")
+    parser.add_argument("--currency", default="EUR")
+    parser.add_argument("--pdf-dir", default=DEMO_PDFS_DIR)
+    parser.add_argument("--synthetic-offers", action="store_true",
+                        help="Generar en memoria las ofertas de 'ofertas' (generate_demo_pdfs.iter_documents)")
+    parser.add_argument("--synthetic-pages", type=int, default=0, help="Paginas minimas por oferta sintetica")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--json", help="Guardar el informe en JSON")
+    parser.add_argument("--baseline", help="Informe JSON anterior para comparar p95")
+    args = parser.parse_args()
+
+    mix = parse_mix(args)
+    factory = PayloadFactory(args.project_id, args.providers.split(","), args.language, args.currency,
+                             args.pdf_dir, args.seed, args.synthetic_pages if args.synthetic_offers else None)
+    runner = LoadRunner(args.base_url, args.suffix, factory, mix, args.timeout, args.seed)
+    model = (f"closed, {args.concurrency} usuarios" if args.mode == "closed"
+             else f"open, {args.rate} req/s")
+    print(f"Carga {model} durante {args.duration:.0f} s contra {args.base_url} ({len(mix)} flujos)")
+
+    elapsed = asyncio.run(runner.run(args))
+    report = runner.report(elapsed, args)
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+    print_report(report, baseline)
+    if args.json:
+        write_json(args.json, report)
+        print(f"\nInforme guardado en {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,501 @@
+#!/usr/bin/env python3
+"""
+Parches de rendimiento sobre el workflow n8n de produccion.
+
+Cada operacion localiza los nodos por nombre (no por indice), es idempotente
+y tiene su inversa con --revert, para poder activarla o quitarla en cada
+build. Guarda el JSON de forma atomica (fichero temporal + rename), igual que
+scripts/adapt_workflow_project_type.py.
+
+Operaciones:
+
+  scope-retrieval  "Revisar-ofertas" y "Revisar RFQs" envian el project_id de
+                   la sesion (body.project_id del webhook del chat, el mismo
+                   que usan los postgresTool) como filtro de metadata a
+                   match_proposals/match_rfq, y "Default Data Loader1" guarda
+                   project_id en los chunks de RFQ. Requiere la migracion
+                   v13_project_scoped_retrieval.sql (project_scope.py).
+  partition-keys   El upsert "Insert or update rows in a table" casa filas de
+                   provider_responses tambien por project_id, que tiene que
+                   formar parte de la clave unica en la tabla particionada
+                   (partition_migrate.py). Aplicar antes del swap.
+  instrument       Build de medicion: envuelve el jsCode de cada nodo Code con
+                   un cronometro de alta resolucion y el numero de items de
+                   entrada/salida, anade nodos marcador antes y despues de
+                   cada chainLlm y del agente del chat y un nodo final que
+                   escribe todas las medidas de la ejecucion, con el flujo y
+                   el project_id de la peticion, en node_metrics con un unico
+                   INSERT (migrations/v15_node_metrics.sql y
+                   v16_node_metrics_project.sql). El codigo original queda
+                   intacto entre marcas y --revert lo restaura byte a byte.
+
+Uso:
+    python scripts/perf/workflow_patch.py scope-retrieval --dry-run
+    python scripts/perf/workflow_patch.py scope-retrieval
+    python scripts/perf/workflow_patch.py scope-retrieval --revert
+    python scripts/perf/workflow_patch.py scope-retrieval --check   # CI: falla si falta aplicarla
+    python scripts/perf/workflow_patch.py partition-keys
+    python scripts/perf/workflow_patch.py instrument
+    python scripts/perf/workflow_patch.py instrument --revert       # build de produccion
+"""
+
+import argparse
+import copy
+import json
+import os
+import sys
+import tempfile
+import uuid
+
+from common import WORKFLOW_PATH, find_nodes, get_node, load_workflow
+
+RETRIEVAL_NODES = ["Revisar-ofertas", "Revisar RFQs"]
+SESSION_PROJECT_ID = "={{ $json.body.project_id || '' }}"
+RFQ_LOADER = "Default Data Loader1"
+RFQ_PROJECT_ID = "={{ $('Generate IDs1').first().json.project_id }}"
+RESPONSES_UPSERT = "Insert or update rows in a table"
+
+PERF_TAG = "// @bideval-perf"
+CODE_BEGIN = f"{PERF_TAG}:begin (workflow_patch.py instrument; quitar con --revert)"
+CODE_OPEN = f"{PERF_TAG}:code"
+CODE_CLOSE = f"{PERF_TAG}:end-code"
+MARKER_START = "perf start: "
+MARKER_END = "perf end: "
+FLUSH_NODE = "perf flush"
+INSERT_NODE = "perf insert node_metrics"
+TRIGGER_TYPE = "n8n-nodes-base.webhook"
+LLM_NODE_TYPES = ("chainLlm", "agent")
+
+# Measurements live in the workflow static data, which n8n shares between all
+# nodes of one execution; keyed by execution id so a run that failed before
+# the flush never leaks rows into the next one.
+PERF_BUFFER = """const __perfState = $getWorkflowStaticData('global');
+if (!__perfState.bidevalPerf || __perfState.bidevalPerf.execution !== $execution.id) {
+  __perfState.bidevalPerf = { execution: $execution.id, rows: [], open: {} };
+}
+const __perfBuf = __perfState.bidevalPerf;"""
+
+PERF_CLOCK = "(typeof performance !== 'undefined' ? performance.now() : Date.now())"
+
+CODE_TEMPLATE = """__BEGIN__
+const __perfT0 = __CLOCK__;
+const __perfOut = await (async () => {
+__OPEN__
+__CODE__
+__CLOSE__
+})();
+const __perfMs = __CLOCK__ - __perfT0;
+__BUFFER__
+const __perfItems = Array.isArray(__perfOut) ? __perfOut.length : (__perfOut ? 1 : 0);
+const __perfRow = __perfBuf.rows.find(r => r.node === __NODE__ && r.run_index === $runIndex);
+if (__perfRow) {
+  __perfRow.duration_ms += __perfMs;
+  __perfRow.items_in += __ITEMS_IN__;
+  __perfRow.items_out += __perfItems;
+  __perfRow.calls += 1;
+} else {
+  __perfBuf.rows.push({ node: __NODE__, kind: 'code', run_index: $runIndex,
+    started_at: new Date(Date.now() - __perfMs).toISOString(), duration_ms: __perfMs,
+    items_in: __ITEMS_IN__, items_out: __perfItems, calls: 1 });
+}
+return __perfOut;
+__PERF__:end"""
+
+# Explicit pairedItem so $('Node').item keeps resolving through the marker
+PASSTHROUGH = "return $input.all().map((item, i) => ({ json: item.json, binary: item.binary, pairedItem: { item: i } }));"
+
+MARKER_START_TEMPLATE = """__PERF__:marker start
+__BUFFER__
+__perfBuf.open[__NODE__ + '#' + $runIndex] = { started: Date.now(), items_in: $input.all().length };
+__PASSTHROUGH__"""
+
+MARKER_END_TEMPLATE = """__PERF__:marker end
+__BUFFER__
+const __perfKey = __NODE__ + '#' + $runIndex;
+const __perfOpen = __perfBuf.open[__perfKey];
+if (__perfOpen) {
+  delete __perfBuf.open[__perfKey];
+  __perfBuf.rows.push({ node: __NODE__, kind: 'llm', run_index: $runIndex,
+    started_at: new Date(__perfOpen.started).toISOString(), duration_ms: Date.now() - __perfOpen.started,
+    items_in: __perfOpen.items_in, items_out: $input.all().length, calls: 1 });
+}
+__PASSTHROUGH__"""
+
+FLUSH_TEMPLATE = """__PERF__:flush
+const __perfState = $getWorkflowStaticData('global');
+const buffer = __perfState.bidevalPerf;
+delete __perfState.bidevalPerf;
+if (!buffer || buffer.execution !== $execution.id || !buffer.rows.length) {
+  return [];
+}
+const triggers = __TRIGGERS__;
+const flow = triggers.find(name => { try { return $(name).isExecuted; } catch (e) { return false; } }) || null;
+const request = flow ? $(flow).first().json : {};
+const projectId = (request.body && request.body.project_id) || (request.query && request.query.project_id) || null;
+const rows = buffer.rows.map(r => ({ ...r, execution_id: String($execution.id), workflow_id: String($workflow.id), flow,
+  project_id: projectId ? String(projectId) : null }));
+return [{ json: { rows: JSON.stringify(rows) } }];"""
+
+INSERT_QUERY = """INSERT INTO node_metrics (execution_id, workflow_id, flow, project_id, node_name, kind, run_index, started_at, duration_ms, items_in, items_out, calls)
+SELECT execution_id, workflow_id, flow, project_id, node, kind, run_index, started_at, duration_ms, items_in, items_out, calls
+FROM jsonb_to_recordset($1::jsonb) AS r(execution_id text, workflow_id text, flow text, project_id text, node text, kind text, run_index int, started_at timestamptz, duration_ms double precision, items_in int, items_out int, calls int);"""
+
+
+def save_workflow(data, path=WORKFLOW_PATH):
+    # Serialize first so an encoding error never leaves a truncated workflow behind
+    output = json.dumps(data, indent=2, ensure_ascii=False)
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)), suffix='.json')
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            f.write(output)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+def metadata_values(node):
+    """The node's options.metadata.metadataValues list, created if missing."""
+    options = node['parameters'].setdefault('options', {})
+    return options.setdefault('metadata', {}).setdefault('metadataValues', [])
+
+
+def set_metadata_value(node, name, value):
+    values = metadata_values(node)
+    for entry in values:
+        if entry['name'] == name:
+            if entry['value'] == value:
+                return False
+            entry['value'] = value
+            return True
+    values.append({"name": name, "value": value})
+    return True
+
+
+def remove_metadata_value(node, name):
+    options = node['parameters'].get('options', {})
+    values = options.get('metadata', {}).get('metadataValues', [])
+    kept = [v for v in values if v['name'] != name]
+    if len(kept) == len(values):
+        return False
+    if kept:
+        options['metadata']['metadataValues'] = kept
+    else:
+        del options['metadata']
+    return True
+
+
+# ─── operations ──────────────────────────────────────────────────────────────
+
+def scope_retrieval(workflow):
+    changes = []
+    for name in RETRIEVAL_NODES:
+        if set_metadata_value(get_node(workflow, name), "project_id", SESSION_PROJECT_ID):
+            changes.append(f"{name}: filtro project_id de la sesion")
+    if set_metadata_value(get_node(workflow, RFQ_LOADER), "project_id", RFQ_PROJECT_ID):
+        changes.append(f"{RFQ_LOADER}: project_id en el metadata de los chunks")
+    return changes
+
+
+def unscope_retrieval(workflow):
+    changes = []
+    for name in RETRIEVAL_NODES:
+        if remove_metadata_value(get_node(workflow, name), "project_id"):
+            changes.append(f"{name}: sin filtro project_id")
+    # The RFQ loader keeps project_id: it is correct metadata either way and
+    # dropping it would make new chunks invisible to a scoped match_rfq.
+    return changes
+
+
+def set_matching_column(node, column, enabled):
+    mapping = node['parameters']['columns']
+    matching = mapping['matchingColumns']
+    if (column in matching) == enabled:
+        return False
+    if enabled:
+        matching.append(column)
+    else:
+        matching.remove(column)
+    # The n8n editor only offers columns it believes are unique-constrained
+    for field in mapping.get('schema', []):
+        if field['id'] == column:
+            field['canBeUsedToMatch'] = enabled
+    return True
+
+
+def partition_keys(workflow):
+    node = get_node(workflow, RESPONSES_UPSERT)
+    if set_matching_column(node, "project_id", True):
+        return [f"{RESPONSES_UPSERT}: ON CONFLICT incluye project_id"]
+    return []
+
+
+def unpartition_keys(workflow):
+    node = get_node(workflow, RESPONSES_UPSERT)
+    if set_matching_column(node, "project_id", False):
+        return [f"{RESPONSES_UPSERT}: ON CONFLICT sin project_id"]
+    return []
+
+
+def render(template, **values):
+    """Fill the __KEY__ placeholders in order; pass user code last so it is never rewritten."""
+    for key, value in values.items():
+        template = template.replace(f"__{key}__", value)
+    return template
+
+
+def perf_node_id(name):
+    # Stable ids keep repeated builds byte-identical
+    return str(uuid.uuid5(uuid.NAMESPACE_URL, f"bideval-perf/{name}"))
+
+
+def perf_node(name, js_code, position, **extra):
+    node = {
+        "parameters": {"jsCode": js_code},
+        "id": perf_node_id(name),
+        "name": name,
+        "type": "n8n-nodes-base.code",
+        "typeVersion": 2,
+        "position": position,
+    }
+    node.update(extra)
+    return node
+
+
+def main_targets(workflow, name):
+    return [c['node'] for output in workflow['connections'].get(name, {}).get('main', [])
+            for c in output]
+
+
+def retarget(workflow, old, new):
+    """Point every main connection into `old` at `new` (same input index)."""
+    for outputs in workflow['connections'].values():
+        for output in outputs.get('main', []):
+            for conn in output:
+                if conn['node'] == old:
+                    conn['node'] = new
+
+
+def drop_connections(workflow, name):
+    """Remove `name` as a target and as a source; prune the entries that only pointed at it."""
+    connections = workflow['connections']
+    connections.pop(name, None)
+    for source in list(connections):
+        outputs = connections[source]
+        for kind in list(outputs):
+            if not any(c['node'] == name for output in outputs[kind] for c in output):
+                continue
+            lists = [[c for c in output if c['node'] != name] for output in outputs[kind]]
+            while lists and not lists[-1]:
+                lists.pop()
+            if lists:
+                outputs[kind] = lists
+            else:
+                del outputs[kind]
+        if not outputs:
+            del connections[source]
+
+
+def wrap_code(node):
+    code = node['parameters'].get('jsCode', '')
+    if code.startswith(PERF_TAG):
+        return False
+    each_item = node['parameters'].get('mode') == 'runOnceForEachItem'
+    node['parameters']['jsCode'] = render(
+        CODE_TEMPLATE, BEGIN=CODE_BEGIN, OPEN=CODE_OPEN, CLOSE=CODE_CLOSE, PERF=PERF_TAG,
+        BUFFER=PERF_BUFFER, CLOCK=PERF_CLOCK, NODE=json.dumps(node['name'], ensure_ascii=False),
+        ITEMS_IN="1" if each_item else "$input.all().length", CODE=code)
+    return True
+
+
+def unwrap_code(node):
+    code = node['parameters'].get('jsCode', '')
+    if not code.startswith(CODE_BEGIN):
+        return False
+    start = code.index(f"{CODE_OPEN}\n") + len(CODE_OPEN) + 1
+    end = code.rindex(f"\n{CODE_CLOSE}")
+    node['parameters']['jsCode'] = code[start:end]
+    return True
+
+
+def llm_nodes(workflow):
+    return [n for t in LLM_NODE_TYPES for n in find_nodes(workflow, t)]
+
+
+def add_llm_markers(workflow, chain):
+    name = chain['name']
+    start, end = MARKER_START + name, MARKER_END + name
+    if any(n['name'] == start for n in workflow['nodes']):
+        return False
+    node_name = json.dumps(name, ensure_ascii=False)
+    x, y = chain['position']
+    workflow['nodes'].append(perf_node(start, render(
+        MARKER_START_TEMPLATE, PERF=PERF_TAG, BUFFER=PERF_BUFFER, NODE=node_name,
+        PASSTHROUGH=PASSTHROUGH), [x - 120, y - 160]))
+    workflow['nodes'].append(perf_node(end, render(
+        MARKER_END_TEMPLATE, PERF=PERF_TAG, BUFFER=PERF_BUFFER, NODE=node_name,
+        PASSTHROUGH=PASSTHROUGH), [x + 120, y - 160]))
+
+    connections = workflow['connections']
+    retarget(workflow, name, start)
+    connections[start] = {"main": [[{"node": name, "type": "main", "index": 0}]]}
+    # Only the regular output is timed; an error output keeps its own targets
+    outputs = connections.setdefault(name, {}).setdefault('main', [[]])
+    if outputs[0]:
+        connections[end] = {"main": [outputs[0]]}
+    outputs[0] = [{"node": end, "type": "main", "index": 0}]
+    return True
+
+
+def remove_llm_markers(workflow, chain):
+    name = chain['name']
+    start, end = MARKER_START + name, MARKER_END + name
+    if not any(n['name'] == start for n in workflow['nodes']):
+        return False
+    connections = workflow['connections']
+    after = connections.pop(end, {}).get('main', [[]])[0]
+    connections.pop(start, None)
+    retarget(workflow, start, name)
+    outputs = connections[name]['main']
+    outputs[0] = after
+    if not any(outputs):
+        del connections[name]['main']
+        if not connections[name]:
+            del connections[name]
+    workflow['nodes'] = [n for n in workflow['nodes'] if n['name'] not in (start, end)]
+    return True
+
+
+def flow_terminals(workflow):
+    """Nodes reached from a webhook over main connections that have no main successor."""
+    triggers = [n['name'] for n in workflow['nodes'] if n['type'] == TRIGGER_TYPE]
+    seen, stack = set(triggers), list(triggers)
+    while stack:
+        for target in main_targets(workflow, stack.pop()):
+            if target not in seen and target != FLUSH_NODE:
+                seen.add(target)
+                stack.append(target)
+    terminals = [name for name in seen
+                 if not [t for t in main_targets(workflow, name) if t != FLUSH_NODE]]
+    order = {n['name']: i for i, n in enumerate(workflow['nodes'])}
+    return triggers, sorted(terminals, key=order.get)
+
+
+def add_flush(workflow):
+    changes = []
+    triggers, terminals = flow_terminals(workflow)
+    if not any(n['name'] == FLUSH_NODE for n in workflow['nodes']):
+        credentials = next(n['credentials'] for n in workflow['nodes']
+                           if n['type'] == 'n8n-nodes-base.postgres' and 'credentials' in n)
+        x = max(n['position'][0] for n in workflow['nodes']) + 400
+        y = min(n['position'][1] for n in workflow['nodes'])
+        # A missing node_metrics table must never fail a production execution
+        workflow['nodes'].append(perf_node(FLUSH_NODE, render(
+            FLUSH_TEMPLATE, PERF=PERF_TAG, TRIGGERS=json.dumps(triggers, ensure_ascii=False)),
+            [x, y], onError="continueRegularOutput"))
+        workflow['nodes'].append({
+            "parameters": {
+                "operation": "executeQuery",
+                "query": INSERT_QUERY,
+                "options": {"queryReplacement": "={{ [ $json.rows ] }}"},
+            },
+            "id": perf_node_id(INSERT_NODE),
+            "name": INSERT_NODE,
+            "type": "n8n-nodes-base.postgres",
+            "typeVersion": 2.5,
+            "position": [x + 240, y],
+            "credentials": credentials,
+            "onError": "continueRegularOutput",
+        })
+        workflow['connections'][FLUSH_NODE] = {
+            "main": [[{"node": INSERT_NODE, "type": "main", "index": 0}]]}
+        changes.append(f"{FLUSH_NODE} -> {INSERT_NODE}: un INSERT por ejecucion")
+    for name in terminals:
+        outputs = workflow['connections'].setdefault(name, {}).setdefault('main', [[]])
+        if not any(c['node'] == FLUSH_NODE for c in outputs[0]):
+            outputs[0].append({"node": FLUSH_NODE, "type": "main", "index": 0})
+            changes.append(f"{name}: vacia las medidas al terminar")
+    return changes
+
+
+def remove_flush(workflow):
+    names = (FLUSH_NODE, INSERT_NODE)
+    if not any(n['name'] in names for n in workflow['nodes']):
+        return []
+    for name in names:
+        drop_connections(workflow, name)
+    workflow['nodes'] = [n for n in workflow['nodes'] if n['name'] not in names]
+    return [f"{FLUSH_NODE}/{INSERT_NODE}: eliminados"]
+
+
+def instrument(workflow):
+    changes = []
+    for node in find_nodes(workflow, 'code'):
+        if wrap_code(node):
+            changes.append(f"{node['name']}: cronometro e items")
+    for chain in llm_nodes(workflow):
+        if add_llm_markers(workflow, chain):
+            changes.append(f"{chain['name']}: marcadores antes y despues")
+    # Terminals are computed last so an end marker on a final chain gets the flush
+    return changes + add_flush(workflow)
+
+
+def uninstrument(workflow):
+    changes = remove_flush(workflow)
+    for chain in llm_nodes(workflow):
+        if remove_llm_markers(workflow, chain):
+            changes.append(f"{chain['name']}: sin marcadores")
+    for node in find_nodes(workflow, 'code'):
+        if unwrap_code(node):
+            changes.append(f"{node['name']}: codigo original")
+    return changes
+
+
+OPERATIONS = {
+    "scope-retrieval": (scope_retrieval, unscope_retrieval,
+                        "Filtrar la busqueda vectorial del chat por el proyecto de la sesion"),
+    "partition-keys": (partition_keys, unpartition_keys,
+                       "Incluir project_id en el upsert de provider_responses"),
+    "instrument": (instrument, uninstrument,
+                   "Medir nodos Code y LLM y guardar las medidas en node_metrics"),
+}
+
+
+# ─── main ────────────────────────────────────────────────────────────────────
+
+def main():
+    parser = argparse.ArgumentParser(description="Parches de rendimiento del workflow n8n")
+    sub = parser.add_subparsers(dest="op", required=True)
+    for name, (_, _, help_) in OPERATIONS.items():
+        p = sub.add_parser(name, help=help_)
+        p.add_argument("--workflow", default=WORKFLOW_PATH)
+        p.add_argument("--revert", action="store_true", help="Deshacer la operacion")
+        p.add_argument("--dry-run", action="store_true", help="Mostrar los cambios sin guardar")
+        p.add_argument("--check", action="store_true", help="Salir con error si hay cambios pendientes")
+    args = parser.parse_args()
+
+    apply, revert, _ = OPERATIONS[args.op]
+    workflow = load_workflow(args.workflow)
+    patched = copy.deepcopy(workflow)
+    try:
+        changes = (revert if args.revert else apply)(patched)
+    except KeyError as e:
+        sys.exit(str(e))
+
+    label = f"{args.op}{' --revert' if args.revert else ''}"
+    if not changes:
+        print(f"{label}: nada que cambiar")
+        return
+    for change in changes:
+        print(f"  + {change}")
+    if args.check:
+        sys.exit(f"{label}: {len(changes)} cambios pendientes")
+    if args.dry_run:
+        print(f"{label}: {len(changes)} cambios (sin guardar)")
+        return
+    save_workflow(patched, args.workflow)
+    print(f"{label}: {len(changes)} cambios guardados en {os.path.relpath(args.workflow)}")
+
+
+if __name__ == "__main__":
+    main()